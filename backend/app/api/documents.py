@@ -1,33 +1,57 @@
-from typing import List
+import io
+import uuid
+import zipfile
+from typing import Iterator, List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, HTTPException
-from app.db.models import PDFDocument
-from fastapi.responses import Response
-from app.services.documents import document_service
-from app.schemas.documents import DocumentSummary, DocumentUpdate
+from fastapi import APIRouter, Header, HTTPException, Query
+from app.db.models import QuizVersion
+from fastapi.responses import Response, StreamingResponse
+from app.services.document_versions import document_versions
+from app.services.documents import RenderedPage, document_service
+from app.services.page_renderer import PREVIEW_SIZES, page_renderer
+from app.services.preview_cache import PREVIEW_MAX_AGE
+from app.schemas.documents import DocumentDetail, DocumentSummary, DocumentUpdate
 
 router = APIRouter()
 
+MAX_BATCH_PAGES = 50
+MAX_LIST_LIMIT = 200
+
+PreviewFormat = Literal["png", "jpeg", "webp"]
+
 
 @router.get("/", response_model=List[DocumentSummary])
-async def get_documents():
-    return (
-        await PDFDocument.find_all()
-        .project(DocumentSummary)
-        .sort("-updated_at")
-        .to_list()
-    )
+async def get_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_LIST_LIMIT),
+    cursor: Optional[str] = None,
+    name: Optional[str] = Query(None, max_length=200),
+):
+    """A page of documents, newest first; `X-Next-Cursor` fetches the next one."""
+    try:
+        docs, next_cursor = await document_service.list_documents(limit, cursor, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return docs
 
 
-@router.get("/{doc_id}", response_model=PDFDocument)
+@router.get("/{doc_id}", response_model=DocumentDetail)
 async def get_document(doc_id: UUID):
-    doc = await document_service.get_document_by_id(doc_id)
+    doc = await document_service.get_document_detail(doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
 
 
-@router.patch("/{doc_id}", response_model=PDFDocument)
+@router.get("/{doc_id}/quizzes", response_model=List[QuizVersion])
+async def get_quiz_history(doc_id: UUID, limit: int = Query(20, ge=1, le=100)):
+    """Quizzes generated for the document, newest first."""
+    return await document_versions.quiz_history(doc_id, limit)
+
+
+@router.patch("/{doc_id}", response_model=DocumentDetail)
 async def update_document(doc_id: UUID, update_data: DocumentUpdate):
     doc = await document_service.update_document(doc_id, update_data)
     if not doc:
@@ -36,11 +60,101 @@ async def update_document(doc_id: UUID, update_data: DocumentUpdate):
 
 
 @router.get("/{doc_id}/preview/{page}", response_class=Response)
-async def get_document_preview(doc_id: UUID, page: int):
-    image_bytes = await document_service.get_page_image(doc_id, page)
-    if not image_bytes:
+async def get_document_preview(
+    doc_id: UUID,
+    page: int,
+    zoom: float = Query(2.0, gt=0, le=4),
+    format: PreviewFormat = "png",
+    if_none_match: Optional[str] = Header(None),
+):
+    if not page_renderer.supports(format):
+        raise HTTPException(status_code=400, detail=f"Format {format} is not available")
+
+    preview = await document_service.get_page_preview(
+        doc_id, page, zoom=zoom, fmt=format, if_none_match=if_none_match
+    )
+    if not preview:
         raise HTTPException(
             status_code=404, detail="Page not found or document invalid"
         )
 
-    return Response(content=image_bytes, media_type="image/png")
+    headers = {
+        "ETag": preview.etag,
+        "Cache-Control": f"private, max-age={PREVIEW_MAX_AGE}",
+    }
+    if preview.content is None:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=preview.content, media_type=preview.media_type, headers=headers)
+
+
+@router.get("/{doc_id}/previews")
+async def get_document_previews(
+    doc_id: UUID,
+    start: int = Query(1, ge=1),
+    end: Optional[int] = Query(None, ge=1),
+    size: Optional[Literal["thumbnail", "small", "medium", "large"]] = None,
+    zoom: Optional[float] = Query(None, gt=0, le=4),
+    format: PreviewFormat = "jpeg",
+    packaging: Literal["multipart", "zip"] = "multipart",
+):
+    """Render a page range in one go, as a multipart/mixed stream or a zip."""
+    end = end or start + MAX_BATCH_PAGES - 1
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if end - start + 1 > MAX_BATCH_PAGES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_PAGES} pages per request"
+        )
+    if not page_renderer.supports(format):
+        raise HTTPException(status_code=400, detail=f"Format {format} is not available")
+
+    zoom = zoom or PREVIEW_SIZES[size or "large"]
+    pages = await document_service.get_page_range_previews(
+        doc_id, start, end, zoom=zoom, fmt=format
+    )
+    if not pages:
+        raise HTTPException(
+            status_code=404, detail="Pages not found or document invalid"
+        )
+
+    headers = {"Cache-Control": f"private, max-age={PREVIEW_MAX_AGE}"}
+    if packaging == "zip":
+        return Response(
+            content=_zip_pages(pages, format),
+            media_type="application/zip",
+            headers={
+                **headers,
+                "Content-Disposition": f'attachment; filename="pages-{start}-{end}.zip"',
+            },
+        )
+
+    boundary = uuid.uuid4().hex
+    return StreamingResponse(
+        _multipart_pages(pages, boundary),
+        media_type=f"multipart/mixed; boundary={boundary}",
+        headers=headers,
+    )
+
+
+def _multipart_pages(pages: List[RenderedPage], boundary: str) -> Iterator[bytes]:
+    for page in pages:
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Type: {page.media_type}\r\n"
+            f"Content-Length: {len(page.content)}\r\n"
+            f"X-Page-Number: {page.page_number}\r\n"
+            f"ETag: {page.etag}\r\n\r\n"
+        ).encode("ascii")
+        yield page.content
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode("ascii")
+
+
+def _zip_pages(pages: List[RenderedPage], fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    # Images are already compressed; storing them avoids a second deflate pass.
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for page in pages:
+            archive.writestr(f"page-{page.page_number:04d}.{fmt}", page.content)
+    return buffer.getvalue()
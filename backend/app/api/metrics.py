@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from app.core.llm.response_cache import get_response_cache
+from app.services.document_pool import document_pool
+from app.services.preview_cache import preview_cache
+from app.services.toc_cache import toc_cache
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics():
+    llm_cache = get_response_cache()
+    return {
+        "toc_cache": toc_cache.stats(),
+        "preview_cache": preview_cache.stats(),
+        "document_pool": document_pool.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+    }
@@ -1,7 +1,10 @@
 from fastapi.params import Form
+import os
 from typing import Optional
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from app.services.orchestrator import Orchestrator
+from app.services.extraction_engine import ExtractionQueueFull
 from app.dependencies import get_orchestrator
 from app.schemas.toc_api import UploadResponse, TaskStatus
 
@@ -29,6 +32,8 @@ async def upload_pdf(
         task_id = await orchestrator.process_file_async(file, name)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ExtractionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return UploadResponse(task_id=task_id, status="uploaded")
 
 
@@ -36,7 +41,32 @@ async def upload_pdf(
 async def get_status(
     task_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)
 ):
-    status = orchestrator.get_status(task_id)
+    status = await orchestrator.get_status(task_id)
     if not status:
         raise HTTPException(status_code=404, detail="Task not found")
     return status
+
+
+@router.get("/events/{task_id}")
+async def stream_events(
+    task_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)
+):
+    """Server-sent events: the task's status now and on every change until it ends."""
+    if await orchestrator.get_status(task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    heartbeat = float(os.getenv("TASK_EVENTS_HEARTBEAT", 15))
+
+    async def events():
+        async for event in orchestrator.watch(task_id, heartbeat=heartbeat):
+            if event is None:
+                # Comment line; keeps proxies from closing an idle stream.
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -11,10 +11,14 @@ router = APIRouter()
 async def generate_quiz(
     doc_id: str,
     config: QuizConfig,
+    use_cache: bool = True,
+    stream: bool = True,
     orchestrator: Orchestrator = Depends(get_orchestrator),
 ):
     try:
-        task_id = await orchestrator.generate_quiz_async(doc_id, config)
+        task_id = await orchestrator.generate_quiz_async(
+            doc_id, config, use_cache, stream=stream
+        )
         return UploadResponse(task_id=task_id, status="processing")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
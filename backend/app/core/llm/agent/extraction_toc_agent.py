@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+import logging
 from dataclasses import dataclass, field
+from enum import Enum
 from typing import Optional
 
 import fitz
 
 from app.core.llm.config import load_settings
-from app.core.llm.model import LangChainConnection
+from app.core.llm.model import ModelProfile
 from app.core.llm.rag_service import LangChainRAGService
+from app.core.llm.registry import get_connection
+from app.core.llm.response_cache import get_response_cache
 
-from app.core.pdf.toc.manual_extractor import ManualToCExtractor
+from app.core.pdf.toc.manual_extractor import ManualToCExtractor, ProgressCallback
+from app.core.pdf.toc.toc_parser import ParsedToC, ToCParser
 from app.core.pdf.toc.toc_model import Section, TableOfContents
 
+logger = logging.getLogger(__name__)
+
 SYSTEM_MESSAGE = """You are a precision parser for Table of Contents.
 Your task is to flatten the Table of Contents into a single list of items.
 Treat EVERY line that has a title and a page number as a "Section", regardless of whether it is a main chapter (1.) or a subsection (1.1.).
@@ -23,11 +31,42 @@ RULES:
 3. Extract the "start_page" as an integer.
 4. Ignore lines that do not contain a page number (e.g. headers like "Table of Contents")."""
 
+# The ToC text itself is passed once, as the chain's context.
+TOC_QUESTION = (
+    "The context is the raw text of the Table of Contents. "
+    "Please process it according to the system instructions."
+)
+
+# Changes whenever the prompt changes, so cached extractions are not reused.
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_MESSAGE + TOC_QUESTION).encode("utf-8")
+).hexdigest()[:12]
+
+
+class ToCOrigin(str, Enum):
+    outline = "outline"  # the PDF's embedded outline
+    parsed = "parsed"  # a confident local parse
+    llm = "llm"
+    unverified = "unverified"  # a doubtful local parse no LLM could check
+
+
+@dataclass(frozen=True)
+class ExtractedToC:
+    toc: TableOfContents
+    origin: ToCOrigin
+
+    @property
+    def cacheable(self) -> bool:
+        """Unverified parses may be wrong; they are redone once an LLM is available."""
+        return self.origin != ToCOrigin.unverified
+
 
 def _default_rag() -> LangChainRAGService:
     settings = load_settings()
-    connection = LangChainConnection(settings)
-    return LangChainRAGService(connection, system_prompt=SYSTEM_MESSAGE)
+    connection = get_connection(ModelProfile.from_model_id(settings.default_model))
+    return LangChainRAGService(
+        connection, system_prompt=SYSTEM_MESSAGE, cache=get_response_cache()
+    )
 
 
 def _default_manual_extractor() -> ManualToCExtractor:
@@ -37,15 +76,28 @@ def _default_manual_extractor() -> ManualToCExtractor:
 @dataclass
 class ToCExtractor:
     doc: fitz.Document
-    rag: LangChainRAGService = field(default_factory=_default_rag)
+    # None means no LLM is available; low-confidence parses are returned as they are.
+    rag: Optional[LangChainRAGService] = field(default_factory=_default_rag)
     manual_extractor: ManualToCExtractor = field(
         default_factory=_default_manual_extractor
     )
+    parser: Optional[ToCParser] = None
+    # Reports pages scored while looking for a printed ToC.
+    progress: Optional[ProgressCallback] = None
+
+    def __post_init__(self) -> None:
+        if self.parser is None:
+            self.parser = ToCParser(self.manual_extractor.config)
 
     def extract_toc(self) -> Optional[TableOfContents]:
+        extracted = self.extract()
+        return extracted.toc if extracted is not None else None
+
+    def extract(self) -> Optional[ExtractedToC]:
+        """The ToC together with how it was obtained."""
         toc = self._extract_toc_by_fitz()
         if toc is not None:
-            return toc
+            return ExtractedToC(toc, ToCOrigin.outline)
         return self._extract_manual_toc_with_llm()
 
     def _extract_toc_by_fitz(self) -> Optional[TableOfContents]:
@@ -82,25 +134,49 @@ class ToCExtractor:
             return None
         return TableOfContents(sections=sections)
 
-    def _extract_manual_toc_with_llm(self) -> Optional[TableOfContents]:
-        toc_pages = self.manual_extractor.manual_extract(self.doc)
+    def _extract_manual_toc_with_llm(self) -> Optional[ExtractedToC]:
+        toc_as_string = self._manual_toc_text()
+        if toc_as_string is None:
+            return None
+
+        # Well-formed tables are parsed locally; only doubtful ones go to the LLM.
+        parsed = self._parse_locally(toc_as_string)
+        if self._is_confident(parsed):
+            return ExtractedToC(parsed.toc, ToCOrigin.parsed)
+        if self.rag is None:
+            if parsed.toc is None:
+                return None
+            return ExtractedToC(parsed.toc, ToCOrigin.unverified)
+        toc = self._convert_toc_text_into_toc_object_with_llm(toc_as_string)
+        return ExtractedToC(toc, ToCOrigin.llm) if toc is not None else None
+
+    def _parse_locally(self, toc_text: str) -> ParsedToC:
+        try:
+            return self.parser.parse(toc_text)
+        except Exception as e:
+            # Whatever the parser trips over, the LLM can still read the table.
+            logger.warning("Local ToC parse failed, falling back to the LLM: %s", e)
+            return ParsedToC(toc=None, confidence=0.0)
+
+    def _is_confident(self, parsed: ParsedToC) -> bool:
+        return (
+            parsed.toc is not None
+            and parsed.confidence >= self.parser.config.parser_min_confidence
+        )
+
+    def _manual_toc_text(self) -> Optional[str]:
+        toc_pages = self.manual_extractor.manual_extract(self.doc, progress=self.progress)
         if not toc_pages:
             return None
 
         text = [page.clean_text for page in toc_pages]
-        toc_as_string = "\n".join(text)
-        return self._convert_toc_text_into_toc_object_with_llm(toc_as_string)
+        return "\n".join(text)
 
     def _convert_toc_text_into_toc_object_with_llm(
         self, toc_text: str
     ) -> Optional[TableOfContents]:
-        question = (
-            "Here is the raw text of the Table of Contents. Please process it according to the system instructions.\n"
-            "<toc_content>\n"
-            f"{toc_text}"
-        )
         return self.rag.answer_structured(
-            question=question,
+            question=TOC_QUESTION,
             response_model=TableOfContents,
             context=toc_text,
         )
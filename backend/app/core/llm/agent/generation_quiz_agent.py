@@ -1,12 +1,26 @@
+import asyncio
+import json
 import logging
-from typing import Optional, List
-from app.core.llm.config import load_settings
-from app.core.llm.model import LangChainConnection, ModelProfile
+import os
+import re
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Sequence, Tuple, Union
+from pydantic import ValidationError
+from app.core.llm.chunking import TextChunk, allocate_grouped, chunk_sections
+from app.core.llm.model import ModelProfile
 from app.core.llm.rag_service import LangChainRAGService
-from app.schemas.quiz import QuizOutput, QuestionConfig
+from app.core.llm.registry import get_connection
+from app.core.llm.response_cache import get_response_cache
+from app.core.llm.tokens import count_tokens
+from app.schemas.quiz import GeneratedQuestion, QuizOutput, QuestionConfig
 
 logger = logging.getLogger(__name__)
 
+# Awaited with (batches done, batches total, output tokens so far) after each batch.
+QuizProgress = Callable[[int, int, int], Awaitable[None]]
+# Awaited with each question as soon as it is complete, in streaming mode.
+QuestionCallback = Callable[[GeneratedQuestion], Awaitable[None]]
+
 # Few-shot prompting examples
 FEW_SHOT_EXAMPLES = """
 EXAMPLE 1:
@@ -68,25 +82,209 @@ RULES:
 
 
 def _default_rag() -> LangChainRAGService:
-    settings = load_settings()
-    connection = LangChainConnection(settings, ModelProfile.LARGE)
-    return LangChainRAGService(connection, system_prompt=SYSTEM_MESSAGE)
+    connection = get_connection(ModelProfile.LARGE)
+    return LangChainRAGService(
+        connection, system_prompt=SYSTEM_MESSAGE, cache=get_response_cache()
+    )
+
+
+def _question_key(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower()).strip()
 
 
 class GenerationQuizAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        chunk_tokens: Optional[int] = None,
+        top_up_rounds: Optional[int] = None,
+    ):
         self.rag_service = _default_rag()
+        self.batch_size = batch_size or int(os.getenv("QUIZ_BATCH_SIZE", 10))
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("QUIZ_MAX_CONCURRENCY", 4)
+        )
+        self.chunk_tokens = chunk_tokens or int(os.getenv("QUIZ_CHUNK_TOKENS", 30000))
+        self.top_up_rounds = (
+            top_up_rounds
+            if top_up_rounds is not None
+            else int(os.getenv("QUIZ_TOP_UP_ROUNDS", 1))
+        )
 
     async def generate_quiz(
-        self, context: str, questions_config: List[QuestionConfig]
+        self,
+        context: Union[str, Sequence[TextChunk]],
+        questions_config: List[QuestionConfig],
+        use_cache: bool = True,
+        on_progress: Optional[QuizProgress] = None,
+        on_question: Optional[QuestionCallback] = None,
     ) -> Optional[QuizOutput]:
         """
         Generates a quiz based on the provided context and configuration.
+
+        The context, either plain text or chunks already cut along document
+        sections, is packed into chunks of at most `chunk_tokens`. Questions
+        are allocated to chunks in proportion to their size, each question
+        type spread on its own, and requested in batches of `batch_size`,
+        at most `max_concurrency` calls at a time. The partial quizzes are
+        merged in configuration order, duplicate questions dropped and ids
+        renumbered 1..n. Questions lost as duplicates are requested again,
+        for up to `top_up_rounds` more rounds, with the questions kept so
+        far listed for the model to avoid. `on_progress` is awaited as each
+        batch finishes; its total grows when a round is added. A failed
+        batch is skipped; when no batch produced a question, the first
+        failure is raised.
+
+        With `on_question`, batches are streamed instead: each question is
+        validated as soon as the model has finished writing it, numbered in
+        order of arrival and awaited with `on_question`. The returned quiz
+        keeps that order.
         """
-        if not context:
+        if isinstance(context, str):
+            context = [TextChunk(text=context)]
+        chunks = chunk_sections(
+            [(chunk.title, chunk.text) for chunk in context], self.chunk_tokens
+        )
+        if not chunks:
             logger.warning("Empty context provided for quiz generation.")
             return None
 
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        questions: List[GeneratedQuestion] = []
+        failures: List[Exception] = []
+        seen = set()
+        done = 0
+        total = 0
+        tokens = 0
+
+        def accept(question: GeneratedQuestion) -> bool:
+            key = _question_key(question.text)
+            if key in seen:
+                return False
+            seen.add(key)
+            questions.append(question)
+            return True
+
+        async def deliver(question: GeneratedQuestion) -> None:
+            nonlocal tokens
+            if not accept(question):
+                return
+            question.id = len(questions)
+            tokens += count_tokens(question.model_dump_json())
+            try:
+                await on_question(question)
+            except Exception as e:
+                logger.warning(f"Failed to deliver question {question.id}: {e}")
+
+        async def run_job(
+            chunk: TextChunk, batch: List[QuestionConfig], avoid: Sequence[str]
+        ) -> Optional[QuizOutput]:
+            nonlocal done, tokens
+            result = None
+            async with semaphore:
+                try:
+                    if on_question is None:
+                        result = await self._generate_batch(chunk, batch, use_cache, avoid)
+                    else:
+                        await self._stream_batch(chunk, batch, use_cache, deliver, avoid)
+                except Exception as e:
+                    logger.error(f"Error during LLM quiz generation: {e}")
+                    failures.append(e)
+            done += 1
+            if result is not None:
+                tokens += count_tokens(result.model_dump_json())
+            if on_progress is not None:
+                try:
+                    await on_progress(done, total, tokens)
+                except Exception as e:
+                    logger.warning(f"Failed to report quiz progress: {e}")
+            return result
+
+        async def run_round(configs: List[QuestionConfig]) -> None:
+            nonlocal total
+            jobs = self._plan(chunks, configs)
+            avoid = [question.text for question in questions]
+            total += len(jobs)
+            results = await asyncio.gather(
+                *(run_job(chunk, batch, avoid) for chunk, batch in jobs)
+            )
+            if on_question is None:
+                for result in results:
+                    if result is not None:
+                        for question in result.questions:
+                            accept(question)
+
+        await run_round(questions_config)
+        for _ in range(self.top_up_rounds):
+            missing = self._missing(questions_config, questions)
+            if not missing:
+                break
+            logger.info(f"Requesting {len(missing)} more questions to replace duplicates.")
+            await run_round(missing)
+
+        if on_question is None:
+            for new_id, question in enumerate(questions, start=1):
+                question.id = new_id
+
+        if not questions:
+            if failures:
+                # Nothing to salvage: let the caller retry the whole quiz.
+                raise failures[0]
+            return None
+        if len(questions) < len(questions_config):
+            logger.warning(
+                f"Generated {len(questions)} of {len(questions_config)} requested questions "
+                f"across {len(chunks)} chunks."
+            )
+        return QuizOutput(questions=questions)
+
+    def _plan(
+        self, chunks: List[TextChunk], configs: List[QuestionConfig]
+    ) -> List[Tuple[TextChunk, List[QuestionConfig]]]:
+        """Spread `configs` over `chunks` by size, each question type on its own,
+        and cut every chunk's share into batches of `batch_size`."""
+        groups: Dict[Any, List[QuestionConfig]] = {}
+        for config in configs:
+            key = (config.type, json.dumps(config.closedOptions, sort_keys=True))
+            groups.setdefault(key, []).append(config)
+
+        counts = allocate_grouped(
+            [chunk.tokens for chunk in chunks], [len(group) for group in groups.values()]
+        )
+        shares: List[List[QuestionConfig]] = [[] for _ in chunks]
+        for group, group_counts in zip(groups.values(), counts):
+            start = 0
+            for share, count in zip(shares, group_counts):
+                share.extend(group[start : start + count])
+                start += count
+
+        return [
+            (chunk, share[i : i + self.batch_size])
+            for chunk, share in zip(chunks, shares)
+            for i in range(0, len(share), self.batch_size)
+        ]
+
+    @staticmethod
+    def _missing(
+        questions_config: List[QuestionConfig], questions: List[GeneratedQuestion]
+    ) -> List[QuestionConfig]:
+        """Configs of the requested questions that no kept question answers, by type."""
+        produced = Counter(question.type for question in questions)
+        missing = []
+        for config in questions_config:
+            if produced[config.type] > 0:
+                produced[config.type] -= 1
+            else:
+                missing.append(config)
+        return missing
+
+    @staticmethod
+    def _batch_prompt(
+        chunk: TextChunk,
+        questions_config: List[QuestionConfig],
+        avoid: Sequence[str] = (),
+    ) -> str:
         # Serialize questions config to string for the prompt
         questions_conf_str = "\n".join(
             [
@@ -94,22 +292,74 @@ class GenerationQuizAgent:
                 for i, q in enumerate(questions_config)
             ]
         )
+        section = f"The context is taken from: {chunk.title}\n" if chunk.title else ""
+        avoid_str = (
+            "Do not repeat or rephrase any of these existing questions:\n        "
+            + "\n        ".join(f"- {text}" for text in avoid)
+            if avoid
+            else ""
+        )
 
-        user_prompt = f"""
-        CONTEXT:
-        {context[:150000]} #safe limit for now
-
-        INSTRUCTIONS:
+        # The document text travels only as `context`; the question holds the instructions.
+        return f"""
+        {section}INSTRUCTIONS:
         Create a quiz with {len(questions_config)} questions based strictly on the above context.
         Follow this specific configuration structure:
         {questions_conf_str}
+        {avoid_str}
         """
 
+    async def _generate_batch(
+        self,
+        chunk: TextChunk,
+        questions_config: List[QuestionConfig],
+        use_cache: bool = True,
+        avoid: Sequence[str] = (),
+    ) -> Optional[QuizOutput]:
+        return await self.rag_service.aanswer_structured(
+            question=self._batch_prompt(chunk, questions_config, avoid),
+            response_model=QuizOutput,
+            context=chunk.text,
+            use_cache=use_cache,
+        )
+
+    async def _stream_batch(
+        self,
+        chunk: TextChunk,
+        questions_config: List[QuestionConfig],
+        use_cache: bool,
+        deliver: QuestionCallback,
+        avoid: Sequence[str] = (),
+    ) -> None:
+        emitted = 0
+        items: List[Any] = []
+        failure: Optional[Exception] = None
         try:
-            response = self.rag_service.answer_structured(
-                question=user_prompt, response_model=QuizOutput, context=context
-            )
-            return response
+            async for answer in self.rag_service.astream_structured(
+                question=self._batch_prompt(chunk, questions_config, avoid),
+                response_model=QuizOutput,
+                context=chunk.text,
+                use_cache=use_cache,
+            ):
+                items = (answer or {}).get("questions") or []
+                # A question is complete once the model has started the next one.
+                while emitted < len(items) - 1:
+                    await self._deliver_item(items[emitted], deliver)
+                    emitted += 1
         except Exception as e:
-            logger.error(f"Error during LLM quiz generation: {e}")
-            return None
+            failure = e
+        # The last question is complete once the stream ends, even if it ended badly.
+        while emitted < len(items):
+            await self._deliver_item(items[emitted], deliver)
+            emitted += 1
+        if failure is not None:
+            raise failure
+
+    @staticmethod
+    async def _deliver_item(item: Any, deliver: QuestionCallback) -> None:
+        try:
+            question = GeneratedQuestion.model_validate(item)
+        except ValidationError as e:
+            logger.warning(f"Dropping malformed question from stream: {e}")
+            return
+        await deliver(question)
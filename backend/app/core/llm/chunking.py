@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from app.core.llm.tokens import count_tokens, split_tokens
+
+
+@dataclass
+class TextChunk:
+    """A piece of source text sent to the LLM in one call."""
+    text: str
+    title: Optional[str] = None
+    tokens: int = field(default=-1, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.tokens < 0:
+            self.tokens = count_tokens(self.text)
+
+
+def _split_counted(text: str, max_tokens: int) -> List[Tuple[str, int]]:
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return [(text, tokens)]
+
+    parts: List[Tuple[str, int]] = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        if line_tokens > max_tokens:
+            # A single line longer than the budget is cut hard.
+            if current:
+                parts.append(("".join(current), size))
+                current, size = [], 0
+            parts.extend((piece, count_tokens(piece)) for piece in split_tokens(line, max_tokens))
+            continue
+        if size + line_tokens > max_tokens and current:
+            parts.append(("".join(current), size))
+            current, size = [], 0
+        current.append(line)
+        size += line_tokens
+    if current:
+        parts.append(("".join(current), size))
+    return parts
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """Split `text` into parts of at most `max_tokens`, preferring line breaks."""
+    return [part for part, _ in _split_counted(text, max(1, max_tokens))]
+
+
+def chunk_sections(
+    sections: Sequence[Tuple[Optional[str], str]], max_tokens: int
+) -> List[TextChunk]:
+    """Pack `(title, text)` sections into chunks of at most `max_tokens`.
+
+    Sections are kept whole where possible: oversized ones are split along
+    line breaks and consecutive small ones are merged, so every chunk is
+    close to the budget and no call is wasted on a few lines.
+    """
+    chunks: List[TextChunk] = []
+    pending: List[TextChunk] = []
+    pending_tokens = 0
+
+    def flush() -> None:
+        nonlocal pending, pending_tokens
+        if pending:
+            titles = list(dict.fromkeys(c.title for c in pending if c.title))
+            chunks.append(TextChunk(
+                text="\n".join(c.text for c in pending),
+                title=", ".join(titles) if titles else None,
+                tokens=pending_tokens,
+            ))
+        pending, pending_tokens = [], 0
+
+    for title, text in sections:
+        if not text.strip():
+            continue
+        for part, tokens in _split_counted(text, max_tokens):
+            piece = TextChunk(text=part, title=title, tokens=tokens)
+            if pending_tokens + piece.tokens > max_tokens:
+                flush()
+            pending.append(piece)
+            pending_tokens += piece.tokens
+    flush()
+    return chunks
+
+
+def allocate(sizes: Sequence[int], total: int) -> List[int]:
+    """Split `total` items across buckets in proportion to `sizes`.
+
+    Uses the largest-remainder method, so the counts always sum to `total`
+    and buckets of equal size differ by at most one.
+    """
+    weight = sum(sizes)
+    if not sizes or total <= 0:
+        return [0] * len(sizes)
+    if weight <= 0:
+        sizes, weight = [1] * len(sizes), len(sizes)
+
+    quotas = [total * size / weight for size in sizes]
+    counts = [int(q) for q in quotas]
+    by_remainder = sorted(
+        range(len(sizes)), key=lambda i: (quotas[i] - counts[i], sizes[i]), reverse=True
+    )
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def allocate_grouped(sizes: Sequence[int], groups: Sequence[int]) -> List[List[int]]:
+    """Split several groups of items across buckets in proportion to `sizes`.
+
+    Returns `counts[group][bucket]`. Each bucket receives the same total as
+    `allocate(sizes, sum(groups))`, and each group is spread on its own by
+    largest remainder within those totals, so a group is never handed
+    entirely to the first buckets just because of its position.
+    """
+    totals = allocate(sizes, sum(groups))
+    weight = sum(sizes)
+    if weight <= 0:
+        sizes, weight = [1] * len(sizes), len(sizes)
+
+    quotas = [[count * size / weight for size in sizes] for count in groups]
+    counts = [[int(q) for q in row] for row in quotas]
+    group_left = [count - sum(row) for count, row in zip(groups, counts)]
+    bucket_left = [
+        total - sum(row[b] for row in counts) for b, total in enumerate(totals)
+    ]
+
+    by_remainder = sorted(
+        ((g, b) for g in range(len(groups)) for b in range(len(sizes))),
+        key=lambda gb: (quotas[gb[0]][gb[1]] - counts[gb[0]][gb[1]], sizes[gb[1]]),
+        reverse=True,
+    )
+    for g, b in by_remainder:
+        if group_left[g] > 0 and bucket_left[b] > 0:
+            counts[g][b] += 1
+            group_left[g] -= 1
+            bucket_left[b] -= 1
+    # Both sides have the same number of items left; place them wherever fits.
+    for g in range(len(groups)):
+        for b in range(len(sizes)):
+            extra = min(group_left[g], bucket_left[b])
+            counts[g][b] += extra
+            group_left[g] -= extra
+            bucket_left[b] -= extra
+    return counts
+
+
+__all__ = ["TextChunk", "allocate", "allocate_grouped", "chunk_sections", "split_text"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, Optional
+
+from app.core.llm.model import ModelProfile
+from app.core.llm.registry import HUMAN_TEMPLATE
+from app.core.llm.tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextBuilder:
+    """Fit the prompt of one LLM call into the model's context window.
+
+    The window of the selected `ModelProfile` is shared by the system
+    prompt, the human template, the question, the context and the answer.
+    `reserved_output_tokens` are kept free for the answer; whatever the
+    fixed parts leave is the budget for the context, which is truncated
+    when it does not fit. Token counts are computed locally.
+    """
+    def __init__(
+        self,
+        model: ModelProfile,
+        system_prompt: str,
+        reserved_output_tokens: Optional[int] = None,
+    ) -> None:
+        self.model = model
+        self.reserved_output_tokens = (
+            reserved_output_tokens
+            if reserved_output_tokens is not None
+            else int(os.getenv("LLM_RESERVED_OUTPUT_TOKENS", 16384))
+        )
+        self._fixed_tokens = count_tokens(system_prompt) + count_tokens(
+            HUMAN_TEMPLATE.format(context="", question="")
+        )
+
+    def context_budget(self, question: str = "") -> int:
+        """Tokens left for the context once everything else is accounted for."""
+        return max(
+            0,
+            self.model.context_window
+            - self.reserved_output_tokens
+            - self._fixed_tokens
+            - count_tokens(question),
+        )
+
+    def build(self, question: str, context: str = "") -> Dict[str, str]:
+        """Chain inputs for one call, with the context trimmed to the budget."""
+        question_tokens = count_tokens(question)
+        budget = max(0, self.context_budget() - question_tokens)
+        context_tokens = count_tokens(context)
+        if context_tokens > budget:
+            logger.warning(
+                f"Context of {context_tokens} tokens exceeds the {budget} token budget "
+                f"of {self.model.model_id}; truncating."
+            )
+            context = truncate_tokens(context, budget)
+        return {"question": question, "context": context}
+
+    def log_call(self, inputs: Dict[str, str]) -> None:
+        """Log the size of a call built by `build` that is about to reach the model.
+
+        Called only once the response cache missed, so cache hits are not
+        counted as LLM calls.
+        """
+        question_tokens = count_tokens(inputs["question"])
+        context_tokens = count_tokens(inputs["context"])
+        logger.info(
+            f"LLM call to {self.model.model_id}: "
+            f"{self._fixed_tokens + question_tokens + context_tokens} input tokens "
+            f"({context_tokens} context), {self.reserved_output_tokens} reserved for output."
+        )
+
+
+__all__ = ["ContextBuilder"]
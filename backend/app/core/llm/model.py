@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import Enum
+from typing import Hashable
 
+import httpx
 from langchain_openai import ChatOpenAI
 
 from app.core.llm.config import Settings, load_settings
@@ -42,6 +44,8 @@ class LangChainConnection:
         settings: Settings | None = None,
         model: ModelProfile | None = None,
         temperature: float = 0.0,
+        http_client: httpx.Client | None = None,
+        http_async_client: httpx.AsyncClient | None = None,
     ) -> None:
         self.settings = settings or load_settings()
         self.model = model or ModelProfile.from_model_id(self.settings.default_model)
@@ -49,9 +53,17 @@ class LangChainConnection:
         # model nano can only have temperature 1
         if self.model == ModelProfile.NANO:
             temperature = 1
+        self.temperature = temperature
 
         self.chat_model = ChatOpenAI(
             model=self.model.model_id,
             api_key=self.settings.api_key,
             temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client,
         )
+
+    @property
+    def key(self) -> Hashable:
+        """Identifies connections that are interchangeable for chain reuse."""
+        return (self.model, self.temperature, self.settings.api_key)
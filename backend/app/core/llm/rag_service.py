@@ -1,53 +1,151 @@
 from __future__ import annotations
 
-from typing import Optional, Type, TypeVar
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Type, TypeVar
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
+from app.core.llm.context import ContextBuilder
 from app.core.llm.model import LangChainConnection
+from app.core.llm.registry import get_chain
+from app.core.llm.response_cache import ResponseCache, response_cache_key
 
 T = TypeVar("T", bound=BaseModel)
 
+logger = logging.getLogger(__name__)
+
 
 class LangChainRAGService:
     def __init__(
         self,
         connection: LangChainConnection,
         system_prompt: str = "You are a helpful assistant that answers using the provided context.",
+        cache: Optional[ResponseCache] = None,
     ) -> None:
         self.connection = connection
         self.system_prompt = system_prompt
+        self.context_builder = ContextBuilder(connection.model, system_prompt)
+        self.cache = cache
+
+    def answer(self, question: str, context: str = "", use_cache: bool = True) -> str:
+        inputs = self.context_builder.build(question, context)
+        key = self._cache_key(inputs, None, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
 
-    def answer(self, question: str, context: str = "") -> str:
+        self.context_builder.log_call(inputs)
         chain = self._build_chain(structured_model=None)
-        return chain.invoke({"question": question, "context": context})
+        response = chain.invoke(inputs)
+        if key is not None:
+            self.cache.put(key, response)
+        return response
 
     def answer_structured(
-        self, question: str, response_model: Type[T], context: str = ""
+        self, question: str, response_model: Type[T], context: str = "", use_cache: bool = True
     ) -> T:
         """Return a structured answer parsed into the given Pydantic model."""
+        inputs = self.context_builder.build(question, context)
+        key = self._cache_key(inputs, response_model, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return response_model.model_validate(cached)
+
+        self.context_builder.log_call(inputs)
         chain = self._build_chain(structured_model=response_model)
-        return chain.invoke({"question": question, "context": context})
-
-    def _build_chain(self, structured_model: Optional[Type[BaseModel]] = None):
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", self.system_prompt),
-                (
-                    "human",
-                    "Use the context to answer the question.\n\nContext:\n{context}\n\nQuestion: {question}",
-                ),
-            ]
-        )
+        response = chain.invoke(inputs)
+        if key is not None and response is not None:
+            self.cache.put(key, response.model_dump(mode="json"))
+        return response
+
+    async def aanswer(self, question: str, context: str = "", use_cache: bool = True) -> str:
+        inputs = self.context_builder.build(question, context)
+        key = self._cache_key(inputs, None, use_cache)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+
+        self.context_builder.log_call(inputs)
+        chain = self._build_chain(structured_model=None)
+        response = await chain.ainvoke(inputs)
+        if key is not None:
+            await self.cache.aput(key, response)
+        return response
+
+    async def aanswer_structured(
+        self, question: str, response_model: Type[T], context: str = "", use_cache: bool = True
+    ) -> T:
+        """Async variant of `answer_structured`; does not block the event loop."""
+        inputs = self.context_builder.build(question, context)
+        key = self._cache_key(inputs, response_model, use_cache)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return response_model.model_validate(cached)
+
+        self.context_builder.log_call(inputs)
+        chain = self._build_chain(structured_model=response_model)
+        response = await chain.ainvoke(inputs)
+        if key is not None and response is not None:
+            await self.cache.aput(key, response.model_dump(mode="json"))
+        return response
+
+    async def astream_structured(
+        self, question: str, response_model: Type[T], context: str = "", use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a structured answer as successively more complete JSON dicts.
 
-        llm = self.connection.chat_model
-        if structured_model is not None:
-            llm = llm.with_structured_output(structured_model)
-            return prompt | llm
+        Earlier items of a list are final once a later item appears. A cached
+        answer is yielded whole; a streamed one is cached only if it validates
+        against `response_model`. An invalid answer is left to the caller,
+        who already has every part of it.
+        """
+        inputs = self.context_builder.build(question, context)
+        key = self._cache_key(inputs, response_model, use_cache)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                yield cached
+                return
+
+        self.context_builder.log_call(inputs)
+        chain = self._build_chain(structured_model=response_model, partial=True)
+        answer = None
+        async for answer in chain.astream(inputs):
+            yield answer
+        if key is not None and answer is not None:
+            try:
+                response = response_model.model_validate(answer)
+            except ValidationError as e:
+                logger.warning(f"Not caching streamed answer that does not validate: {e}")
+                return
+            await self.cache.aput(key, response.model_dump(mode="json"))
+
+    def _cache_key(
+        self,
+        inputs: Dict[str, Any],
+        response_model: Optional[Type[BaseModel]],
+        use_cache: bool,
+    ) -> Optional[str]:
+        # Keyed on the context actually sent, i.e. after truncation.
+        if self.cache is None or not use_cache:
+            return None
+        return response_cache_key(
+            self.connection.model.model_id,
+            self.system_prompt,
+            inputs["question"],
+            inputs["context"],
+            response_model,
+        )
 
-        return prompt | llm | StrOutputParser()
+    def _build_chain(
+        self, structured_model: Optional[Type[BaseModel]] = None, partial: bool = False
+    ):
+        # Compiled once per (connection, response model, system prompt) and shared.
+        return get_chain(self.connection, self.system_prompt, structured_model, partial)
 
 
 __all__ = ["LangChainRAGService"]
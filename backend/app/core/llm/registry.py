@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple, Type
+
+import httpx
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from app.core.llm.config import Settings, load_settings
+from app.core.llm.model import LangChainConnection, ModelProfile
+
+HUMAN_TEMPLATE = (
+    "Use the context to answer the question.\n\nContext:\n{context}\n\nQuestion: {question}"
+)
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_connections: Dict[Tuple[ModelProfile, float], LangChainConnection] = {}
+_chains: Dict[Tuple[Hashable, Optional[Type[BaseModel]], str, bool], Any] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 20)),
+        max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", 10)),
+    )
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Pooled HTTP clients shared by every model connection in the process.
+
+    Keeping connections alive across requests avoids a TLS handshake per call.
+    """
+    global _http_client, _http_async_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_limits(), timeout=None)
+        if _http_async_client is None:
+            _http_async_client = httpx.AsyncClient(limits=_limits(), timeout=None)
+        return _http_client, _http_async_client
+
+
+def get_connection(
+    model: ModelProfile, temperature: float = 0.0, settings: Settings | None = None
+) -> LangChainConnection:
+    """Return the process-wide connection for a model profile, building it once."""
+    key = (model, temperature)
+    with _lock:
+        connection = _connections.get(key)
+    if connection is not None:
+        return connection
+
+    http_client, http_async_client = get_http_clients()
+    connection = LangChainConnection(
+        settings or load_settings(),
+        model,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+    with _lock:
+        return _connections.setdefault(key, connection)
+
+
+def get_chain(
+    connection: LangChainConnection,
+    system_prompt: str,
+    structured_model: Optional[Type[BaseModel]] = None,
+    partial: bool = False,
+):
+    """Return the compiled prompt | model chain for this combination, built once.
+
+    With `partial`, a structured chain parses into plain dicts and its
+    `astream` yields the object as it grows, instead of one validated model.
+    """
+    key = (connection.key, structured_model, system_prompt, partial)
+    with _lock:
+        chain = _chains.get(key)
+    if chain is not None:
+        return chain
+
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", system_prompt), ("human", HUMAN_TEMPLATE)]
+    )
+    llm = connection.chat_model
+    if structured_model is not None and partial:
+        # Same response format as the validating chain, parsed incrementally.
+        chain = prompt | llm.with_structured_output(
+            structured_model.model_json_schema(), method="json_schema"
+        )
+    elif structured_model is not None:
+        chain = prompt | llm.with_structured_output(structured_model)
+    else:
+        chain = prompt | llm | StrOutputParser()
+
+    with _lock:
+        return _chains.setdefault(key, chain)
+
+
+__all__ = ["get_chain", "get_connection", "get_http_clients"]
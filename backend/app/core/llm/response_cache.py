@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+from pymongo import MongoClient
+
+from app.db.database import client_options, get_database
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# A cache that cannot be reached must not stall the LLM call behind it.
+SERVER_SELECTION_TIMEOUT_MS = 2000
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=None)
+def _schema_of(response_model: Optional[Type[BaseModel]]) -> str:
+    if response_model is None:
+        return "text"
+    return json.dumps(response_model.model_json_schema(), sort_keys=True)
+
+
+def response_cache_key(
+    model_id: str,
+    system_prompt: str,
+    question: str,
+    context: str,
+    response_model: Optional[Type[BaseModel]] = None,
+) -> str:
+    """Hash identifying one LLM request.
+
+    Whitespace is normalized so that prompts differing only in layout (the
+    indented f-strings of the agents, re-extracted page text) share an entry.
+    Structured calls include the JSON schema of the response model, so
+    changing the model invalidates its entries.
+    """
+    parts = [
+        model_id,
+        _normalize(system_prompt),
+        _normalize(question),
+        _normalize(context),
+        _schema_of(response_model),
+    ]
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache(ABC):
+    """Store of LLM responses by `response_cache_key`.
+
+    Values are JSON-compatible: the answer string, or the `model_dump` of a
+    structured answer. Both a blocking and an async interface are needed:
+    ToC extraction runs synchronously in worker processes while quiz
+    generation runs on the event loop. Implementations must never raise;
+    a failing cache behaves like an empty one.
+    """
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value: Any) -> None:
+        ...
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def aput(self, key: str, value: Any) -> None:
+        self.put(key, value)
+
+    def _record(self, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Process-local cache without expiry; for tests and single-process use."""
+    def __init__(self) -> None:
+        super().__init__()
+        self._entries: Dict[str, Any] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._record(self._entries.get(key))
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+
+
+class MongoResponseCache(ResponseCache):
+    """Responses stored in a Mongo collection and expired by a TTL index.
+
+    The async side uses the process's shared database client from
+    `app.db.database`. The blocking side is only used by the extraction
+    worker processes, which have no event loop; it opens its own pymongo
+    client with the same pool settings. Both are created on first use, so
+    the cache can be built before a worker process starts or an event loop
+    exists.
+    """
+    def __init__(
+        self,
+        mongo_url: str,
+        db_name: str,
+        collection: str = "llm_cache",
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.collection_name = collection
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+        )
+        self._lock = threading.Lock()
+        self._sync_collection = None
+        self._sync_indexed = False
+        self._async_collection = None
+        self._async_indexed = False
+
+    def _index_args(self) -> Dict[str, Any]:
+        return {"expireAfterSeconds": self.ttl_seconds, "name": "created_at_ttl"}
+
+    def _get_sync_collection(self):
+        with self._lock:
+            if self._sync_collection is None:
+                client = MongoClient(
+                    self.mongo_url,
+                    serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+                    **client_options(),
+                )
+                self._sync_collection = client[self.db_name][self.collection_name]
+            if not self._sync_indexed:
+                self._sync_collection.create_index("created_at", **self._index_args())
+                self._sync_indexed = True
+            return self._sync_collection
+
+    async def _get_async_collection(self):
+        if self._async_collection is None:
+            self._async_collection = (await get_database())[self.collection_name]
+        if not self._async_indexed:
+            await self._async_collection.create_index("created_at", **self._index_args())
+            self._async_indexed = True
+        return self._async_collection
+
+    @staticmethod
+    def _entry(key: str, value: Any) -> Dict[str, Any]:
+        return {"_id": key, "value": value, "created_at": datetime.now(timezone.utc)}
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            entry = self._get_sync_collection().find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            entry = None
+        return self._record(entry["value"] if entry else None)
+
+    def put(self, key: str, value: Any) -> None:
+        try:
+            self._get_sync_collection().replace_one(
+                {"_id": key}, self._entry(key, value), upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    async def aget(self, key: str) -> Optional[Any]:
+        try:
+            collection = await self._get_async_collection()
+            entry = await collection.find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            entry = None
+        return self._record(entry["value"] if entry else None)
+
+    async def aput(self, key: str, value: Any) -> None:
+        try:
+            collection = await self._get_async_collection()
+            await collection.replace_one({"_id": key}, self._entry(key, value), upsert=True)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_built = False
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide response cache, or None when caching is disabled.
+
+    Enabled when `MONGODB_URL` is set, unless `LLM_CACHE_ENABLED=0`.
+    """
+    global _default_cache, _default_cache_built
+    if not _default_cache_built:
+        _default_cache_built = True
+        mongo_url = os.getenv("MONGODB_URL")
+        if mongo_url and os.getenv("LLM_CACHE_ENABLED", "1") != "0":
+            _default_cache = MongoResponseCache(mongo_url, os.getenv("MONGODB_DB_NAME"))
+    return _default_cache
+
+
+__all__ = [
+    "InMemoryResponseCache",
+    "MongoResponseCache",
+    "ResponseCache",
+    "get_response_cache",
+    "response_cache_key",
+]
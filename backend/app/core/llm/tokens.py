@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer of the GPT-4o/GPT-5 model family used by every ModelProfile.
+ENCODING_NAME = "o200k_base"
+
+# Used when the tokenizer cannot be loaded (tiktoken downloads it on first use).
+CHARS_PER_TOKEN = 4
+
+_lock = threading.Lock()
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    with _lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                logger.warning(
+                    f"Tokenizer {ENCODING_NAME} unavailable, estimating token counts: {e}"
+                )
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens `text` takes in a prompt, counted locally."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, max_tokens: int) -> List[str]:
+    """Cut `text` into consecutive pieces of at most `max_tokens` each."""
+    max_tokens = max(1, max_tokens)
+    encoding = _get_encoding()
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i : i + step] for i in range(0, len(text), step)]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return [
+        encoding.decode(tokens[i : i + max_tokens])
+        for i in range(0, len(tokens), max_tokens)
+    ]
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` that fits in `max_tokens`."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+__all__ = ["count_tokens", "split_tokens", "truncate_tokens"]
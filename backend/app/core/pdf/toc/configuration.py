@@ -1,3 +1,4 @@
+import hashlib
 from dataclasses import dataclass, field
 from typing import List, Tuple
 from .regex_checker import RegexChecker
@@ -7,6 +8,11 @@ class ToCConfiguration:
     min_score_to_be_candidate: float = 0.35
     continuation_threshold: float = 0.20
 
+    # Shard page scoring across this many processes (1 keeps it serial).
+    scoring_workers: int = 1
+    # Below this many pages per shard, process start-up costs more than it saves.
+    min_pages_per_shard: int = 8
+
     keywords: List[Tuple[str, float]] = field(default_factory=lambda: [
         ("table of contents", 1),
         ("contents", 1),
@@ -43,6 +49,31 @@ class ToCConfiguration:
         pattern=r".*?(?P<num>\d+|[ivxlcdm]+)\s*$", ignore_case=True
     ))
 
+    # "[links->pages: 5, 7]" marker appended to lines carrying internal links
+    checker_link_marker: RegexChecker = field(default_factory=lambda: RegexChecker(
+        pattern=r"\s*\[links->pages:\s*(?P<pages>\d+(?:\s*,\s*\d+)*)\]\s*$", ignore_case=False
+    ))
+
+    # ToC entry: title, then leader or space, then an Arabic or lower-case Roman page
+    checker_entry_page: RegexChecker = field(default_factory=lambda: RegexChecker(
+        pattern=r"(?P<body>.*?)(?:\s*\.{3,}\s*|\s+|^)(?P<page>\d+|[ivxlcdm]+)", ignore_case=False
+    ))
+
+    # Leading section number, optionally labelled (e.g. "1.2", "II.", "Chapter 3:")
+    checker_numbering: RegexChecker = field(default_factory=lambda: RegexChecker(
+        pattern=(
+            r"(?:(?P<label>chapter|part|section|appendix|unit|lesson|module)\s+)?"
+            r"(?P<num>\d+(?:\.\d+)*|[ivxlcdm]+(?:\.\d+)*|[a-z](?:\.\d+)*)"
+            r"(?P<sep>[.):]|\s*[-\u2013\u2014])?(?:\s+(?P<title>.*))?"
+        ),
+        ignore_case=True
+    ))
+
+    # The local ToC parser's result is used without an LLM call at or above this
+    parser_min_confidence: float = 0.8
+    # Fewer parsed entries than this is never trusted
+    parser_min_entries: int = 2
+
     noise_checkers: List[RegexChecker] = field(default_factory=lambda: [
         RegexChecker(r"^\s*$", True),
         RegexChecker(r"^\s*page(s)?\s*$", True),
@@ -50,3 +81,26 @@ class ToCConfiguration:
         RegexChecker(r"^\s*_\s*$", True)
     ])
 
+
+    def fingerprint(self) -> str:
+        """Stable hash of every setting that can change extraction results."""
+        checkers = [
+            self.checker_spaced_dots,
+            self.checker_long_dots,
+            self.checker_solo_num,
+            self.checker_trailing_num,
+            self.checker_link_marker,
+            self.checker_entry_page,
+            self.checker_numbering,
+            *self.noise_checkers,
+        ]
+        payload = repr((
+            self.min_score_to_be_candidate,
+            self.continuation_threshold,
+            self.parser_min_confidence,
+            self.parser_min_entries,
+            [tuple(kw) for kw in self.keywords],
+            list(self.negative_keywords),
+            [(c.regex.pattern, c.regex.flags) for c in checkers],
+        ))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+from fitz import Page
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class LineFeature:
+    text: str
+    bbox: Optional[BBox]
+    spans: Tuple[Dict, ...] = ()
+
+
+@dataclass
+class PageFeatures:
+    """Everything the ToC pipeline reads from a single page while scanning.
+
+    Built once per page so that scoring and style analysis never go back to
+    PyMuPDF for the same page. Line geometry is only needed for the few
+    pages selected as ToC and is read for those with `extract_page_lines`.
+    """
+    page_index: int
+    raw_text: str
+    internal_links: List[Dict] = field(default_factory=list)
+
+    @property
+    def internal_link_density(self) -> float:
+        lines_count = max(1, len(self.raw_text.splitlines()))
+        return len(self.internal_links) / lines_count
+
+
+def extract_page_features(page: Page) -> PageFeatures:
+    """Parse a page once and collect its raw text and internal links."""
+    raw_text = page.get_text("text", flags=fitz.TEXTFLAGS_TEXT) or ""
+
+    links = page.get_links() or []
+    internal_links = [lnk for lnk in links if isinstance(lnk.get("page"), int)]
+
+    return PageFeatures(
+        page_index=page.number,
+        raw_text=raw_text,
+        internal_links=internal_links,
+    )
+
+
+def extract_page_lines(page: Page) -> Optional[List[LineFeature]]:
+    """Text lines of a page with their bboxes and spans.
+
+    Uses the same text flags as `extract_page_features`, so the lines hold
+    the same text. Returns None when structured ('dict') extraction is
+    unavailable for the page.
+    """
+    try:
+        page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    except Exception:
+        return None
+
+    lines: List[LineFeature] = []
+    for block in page_dict.get("blocks", []):
+        # Skip non-text blocks (type 0 denotes text)
+        if block.get("type", 0) != 0:
+            continue
+
+        for line in block.get("lines", []):
+            spans = tuple(line.get("spans", []))
+            text = "".join(span.get("text", "") for span in spans)
+            bbox = line.get("bbox")
+            lines.append(LineFeature(
+                text=text,
+                bbox=tuple(bbox) if bbox is not None else None,
+                spans=spans,
+            ))
+    return lines
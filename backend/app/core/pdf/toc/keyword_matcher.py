@@ -0,0 +1,78 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordHits:
+    weight: float
+    negative: bool
+
+
+class KeywordMatcher:
+    """Match every weighted and negative keyword in a single pass over the text.
+
+    Keywords are compiled into one trie-shaped regex wrapped in a lookahead, so
+    the engine tries each text position once and only walks the branches that
+    share a prefix with it. At every position the longest keyword wins; the
+    shorter keywords that are its prefixes are recovered from a precomputed
+    table. The result matches a plain `keyword in text.lower()` check for every
+    keyword, overlapping ones included, without lowercasing the page.
+    """
+    def __init__(self, keywords: Iterable[Tuple[str, float]], negative_keywords: Iterable[str]):
+        self.weights: Dict[str, float] = {}
+        for kw_text, kw_weight in keywords:
+            if kw_text:
+                kw_text = kw_text.lower()
+                self.weights[kw_text] = self.weights.get(kw_text, 0.0) + kw_weight
+
+        self.negative: Set[str] = {k.lower() for k in negative_keywords if k}
+
+        terms = set(self.weights) | self.negative
+        # Every keyword a matched keyword starts with (itself included).
+        self._prefixes: Dict[str, List[str]] = {
+            term: [other for other in terms if term.startswith(other)]
+            for term in terms
+        }
+        self._regex = re.compile(f"(?=({_trie_pattern(terms)}))", re.IGNORECASE) if terms else None
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of configured keywords occurring anywhere in `text`."""
+        found: Set[str] = set()
+        if self._regex is None:
+            return found
+        for match in self._regex.finditer(text):
+            prefixes = self._prefixes.get(match.group(1).lower())
+            if prefixes:
+                found.update(prefixes)
+        return found
+
+    def scan(self, text: str) -> KeywordHits:
+        """Sum weights of the keywords present and flag any negative hit."""
+        found = self.find(text)
+        negative = any(term in self.negative for term in found)
+        weight = sum(self.weights.get(term, 0.0) for term in found)
+        return KeywordHits(weight=weight, negative=negative)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie over `terms`."""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: prefer the longer keyword, fall back to this one.
+            return f"(?:{body})?"
+        return body
+
+    return emit(trie)
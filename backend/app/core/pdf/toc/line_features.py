@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+from .configuration import ToCConfiguration
+
+
+@dataclass(frozen=True)
+class LineStats:
+    """Per-page line counts, computed in one pass.
+
+    Scoring and style analysis both read from the same record.
+    """
+    total_lines: int
+    count_leaders: int
+    count_trailing: int
+    longest_run: int
+
+    @property
+    def ratio_trailing(self) -> float:
+        if not self.total_lines:
+            return 0.0
+        return self.count_trailing / self.total_lines
+
+
+def compute_line_stats(text: str, config: ToCConfiguration) -> LineStats:
+    """Count non-blank lines, leader lines, trailing-number lines and their longest run."""
+    leader_search = config.checker_spaced_dots.search
+    trailing_match = config.checker_trailing_num.match
+
+    total_lines = 0
+    count_leaders = 0
+    count_trailing = 0
+    longest_run = 0
+    current_run = 0
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+
+        total_lines += 1
+        # A spaced-dots match is exactly what normalises to a "..." leader.
+        if leader_search(line) is not None:
+            count_leaders += 1
+        if trailing_match(line) is not None:
+            count_trailing += 1
+            current_run += 1
+            if current_run > longest_run:
+                longest_run = current_run
+        else:
+            current_run = 0
+
+    return LineStats(
+        total_lines=total_lines,
+        count_leaders=count_leaders,
+        count_trailing=count_trailing,
+        longest_run=longest_run,
+    )
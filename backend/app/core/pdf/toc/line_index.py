@@ -0,0 +1,49 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Sequence
+
+Rect = Sequence[float]
+
+
+def rects_intersect(r1: Optional[Rect], r2: Optional[Rect], eps: float = 1e-3) -> bool:
+    if r1 is None or r2 is None:
+        return False
+    x0 = max(r1[0], r2[0])
+    y0 = max(r1[1], r2[1])
+    x1 = min(r1[2], r2[2])
+    y1 = min(r1[3], r2[3])
+    return (x1 - x0) > eps and (y1 - y0) > eps
+
+
+class LineIndex:
+    """Sorted-interval index over line bounding boxes.
+
+    Lines are sorted by their top edge. A query rectangle can only overlap a
+    line whose top edge lies within `max line height` above the rectangle's
+    top and below its bottom, so two binary searches bound the candidates
+    and only those few are tested for an actual intersection.
+    """
+    def __init__(self, bboxes: Sequence[Optional[Rect]], eps: float = 1e-3):
+        self.eps = eps
+        entries = sorted(
+            (bbox[1], idx, bbox) for idx, bbox in enumerate(bboxes) if bbox is not None
+        )
+        self._tops: List[float] = [top for top, _, _ in entries]
+        self._ids: List[int] = [idx for _, idx, _ in entries]
+        self._bboxes: List[Rect] = [bbox for _, _, bbox in entries]
+        self._max_height = max((bbox[3] - bbox[1] for bbox in self._bboxes), default=0.0)
+        self._max_height = max(self._max_height, 0.0)
+
+    def query(self, rect: Optional[Rect]) -> List[int]:
+        """Return indices (in input order) of the lines intersecting `rect`."""
+        if rect is None or not self._tops:
+            return []
+
+        # Bounds are widened by eps; the exact test below filters the edges.
+        lo = bisect_left(self._tops, rect[1] - self._max_height)
+        hi = bisect_right(self._tops, rect[3])
+
+        return [
+            self._ids[pos]
+            for pos in range(lo, hi)
+            if rects_intersect(rect, self._bboxes[pos], self.eps)
+        ]
@@ -1,10 +1,58 @@
-from typing import List, Optional
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
 from fitz import Document
 
 from .configuration import ToCConfiguration
 from .text_cleaner import TextCleaner
 from .scorer import ToCScorer
-from .page import ToCPage, ScoredPage
+from .features import extract_page_features, extract_page_lines
+from .line_index import LineIndex
+from .page import ToCPage, ScoredPage, ToCStyle
+from .source import PdfSource, open_pdf, source_of
+
+# Called with (pages scored so far, pages to score) while scoring.
+ProgressCallback = Callable[[int, int], None]
+
+# One scoring pool per worker count, reused by every extractor in the process.
+_scoring_pools: Dict[int, ProcessPoolExecutor] = {}
+
+
+def _get_scoring_pool(workers: int) -> ProcessPoolExecutor:
+    pool = _scoring_pools.get(workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _scoring_pools[workers] = pool
+        # A process started by multiprocessing (e.g. an extraction engine
+        # worker) skips atexit handlers and joins its children on exit; shut
+        # the pool down first so its idle children are not waited on forever.
+        # It must run before the pool's own queues are finalised (priority 10).
+        multiprocessing.util.Finalize(
+            None, pool.shutdown, kwargs={"wait": True, "cancel_futures": True},
+            exitpriority=100,
+        )
+    return pool
+
+
+def _discard_scoring_pool(workers: int) -> None:
+    pool = _scoring_pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _score_shard(
+    source: PdfSource, config: ToCConfiguration, start: int, stop: int
+) -> List[ScoredPage]:
+    """Score pages [start, stop) in a worker process that opens the PDF itself."""
+    extractor = ManualToCExtractor(config)
+    with open_pdf(source) as pdf_doc:
+        pages = [extractor._score_page(pdf_doc, idx) for idx in range(start, stop)]
+    for page in pages:
+        extractor._style_of(page)
+    return pages
+
 
 class ManualToCExtractor:
     """Table-of-Contents extractor orchestrating cleaning and scoring.
@@ -22,7 +70,12 @@ class ManualToCExtractor:
         self.cleaner = TextCleaner(self.config)
         self.scorer = ToCScorer(self.config)
 
-    def manual_extract(self, pdf_doc: Document, front_scan: int = 35) -> List[ToCPage]:
+    def manual_extract(
+        self,
+        pdf_doc: Document,
+        front_scan: int = 35,
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[ToCPage]:
         """Scan a PDF document and return detected ToC pages.
 
         The algorithm scans up to `front_scan` pages from the start of the
@@ -33,6 +86,7 @@ class ManualToCExtractor:
         Args:
             pdf_doc: PyMuPDF Document instance.
             front_scan: Number of pages from the front to scan (default 35).
+            progress: Optional callback reporting pages scored so far.
 
         Returns:
             A list of ToCPage objects describing the pages identified as ToC.
@@ -41,26 +95,8 @@ class ManualToCExtractor:
         total_pages = pdf_doc.page_count
         scan_limit = min(front_scan, total_pages)
 
-        scored_pages: List[ScoredPage] = []
-
-        # Score all pages.
-        for idx in range(scan_limit):
-            page = pdf_doc.load_page(idx)
-
-            # Plain text used by layout heuristics.
-            raw_text = page.get_text() or ""
-
-            # Compute internal link density (links that point to pages in the same file).
-            links = page.get_links() or []
-            internal_links = [lnk for lnk in links if isinstance(lnk.get("page"), int)]
-            lines_count = max(1, len(raw_text.splitlines()))
-            internal_link_density = len(internal_links) / lines_count
-
-            score = self.scorer.calculate_confidence(
-                raw_text,
-                internal_link_density=internal_link_density
-            )
-            scored_pages.append(ScoredPage(idx, raw_text, score, internal_link_density))
+        scored_pages = self._score_pages(pdf_doc, scan_limit, progress)
+        pages_by_index = {p.page_index: p for p in scored_pages}
 
         # Identify the best candidate.
         candidates = [p for p in scored_pages if p.score >= self.config.min_score_to_be_candidate]
@@ -68,7 +104,7 @@ class ManualToCExtractor:
             return []
 
         best_candidate = max(candidates, key=lambda x: x.score)
-        winner_style = self.scorer.analyze_style(best_candidate.raw_text)
+        winner_style = self._style_of(best_candidate)
 
         final_toc_pages: List[ToCPage] = []
 
@@ -76,12 +112,12 @@ class ManualToCExtractor:
         back_idx = best_candidate.page_index - 1
         backward_pages: List[ToCPage] = []
         while back_idx >= 0:
-            prev_page = next((p for p in scored_pages if p.page_index == back_idx), None)
+            prev_page = pages_by_index.get(back_idx)
             if not prev_page:
                 break
 
             is_score_ok = prev_page.score >= self.config.continuation_threshold
-            current_style = self.scorer.analyze_style(prev_page.raw_text)
+            current_style = self._style_of(prev_page)
             is_style_ok = self.scorer.are_styles_consistent(winner_style, current_style)
 
             if is_score_ok and is_style_ok:
@@ -101,7 +137,7 @@ class ManualToCExtractor:
         current_idx = best_candidate.page_index + 1
 
         while current_idx < scan_limit:
-            next_page = next((p for p in scored_pages if p.page_index == current_idx), None)
+            next_page = pages_by_index.get(current_idx)
 
             if not next_page:
                 break
@@ -110,7 +146,7 @@ class ManualToCExtractor:
             is_score_ok = next_page.score >= self.config.continuation_threshold
 
             # Check B: style consistency vs leader
-            current_style = self.scorer.analyze_style(next_page.raw_text)
+            current_style = self._style_of(next_page)
             is_style_ok = self.scorer.are_styles_consistent(winner_style, current_style)
 
             if is_score_ok and is_style_ok:
@@ -122,12 +158,107 @@ class ManualToCExtractor:
 
         return final_toc_pages
 
+    def _score_pages(
+        self,
+        pdf_doc: Document,
+        scan_limit: int,
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[ScoredPage]:
+        """Score the first `scan_limit` pages, in parallel shards when configured.
+
+        Shards are contiguous page ranges scored by worker processes that each
+        open the PDF themselves; results are merged back in page order, so the
+        outcome is identical to the serial path. The pool is started once per
+        process and reused. If it fails, it is discarded and the pages it has
+        not scored yet are scored serially; progress keeps counting up.
+        """
+        workers = min(
+            self.config.scoring_workers,
+            scan_limit // max(1, self.config.min_pages_per_shard),
+        )
+        if workers <= 1:
+            # Each page is parsed exactly once.
+            return self._score_serially(pdf_doc, scan_limit, progress)
+
+        shard_size = -(-scan_limit // workers)
+        bounds = [
+            (start, min(start + shard_size, scan_limit))
+            for start in range(0, scan_limit, shard_size)
+        ]
+        shards: List[List[ScoredPage]] = []
+        try:
+            source = source_of(pdf_doc)
+            pool = _get_scoring_pool(workers)
+            futures = [
+                pool.submit(_score_shard, source, self.config, start, stop)
+                for start, stop in bounds
+            ]
+            scored = 0
+            for future in as_completed(futures):
+                shards.append(future.result())
+                scored += len(shards[-1])
+                if progress is not None:
+                    progress(scored, scan_limit)
+        except Exception as e:
+            print(f"Parallel scoring failed, scoring serially: {e}")
+            _discard_scoring_pool(workers)
+            done = {page.page_index: page for shard in shards for page in shard}
+            return self._score_serially(pdf_doc, scan_limit, progress, done)
+
+        merged = [page for shard in shards for page in shard]
+        merged.sort(key=lambda p: p.page_index)
+        return merged
+
+    def _score_serially(
+        self,
+        pdf_doc: Document,
+        scan_limit: int,
+        progress: Optional[ProgressCallback] = None,
+        done: Optional[Dict[int, ScoredPage]] = None,
+    ) -> List[ScoredPage]:
+        """Score the first `scan_limit` pages, reusing those already in `done`."""
+        done = done or {}
+        pages = []
+        scored = len(done)
+        for idx in range(scan_limit):
+            if idx in done:
+                pages.append(done[idx])
+                continue
+            pages.append(self._score_page(pdf_doc, idx))
+            scored += 1
+            if progress is not None:
+                progress(scored, scan_limit)
+        return pages
+
+    def _score_page(self, pdf_doc: Document, idx: int) -> ScoredPage:
+        features = extract_page_features(pdf_doc.load_page(idx))
+        internal_link_density = features.internal_link_density
+        # Line counts are computed once and shared by scoring and style analysis.
+        line_stats = self.scorer.line_stats(features.raw_text)
+
+        score = self.scorer.calculate_confidence(
+            features.raw_text,
+            internal_link_density=internal_link_density,
+            line_stats=line_stats,
+        )
+        return ScoredPage(
+            idx, features.raw_text, score, internal_link_density, features, line_stats
+        )
+
+    def _style_of(self, scored_page: ScoredPage) -> ToCStyle:
+        """Return the page style, analysing each page index at most once."""
+        if scored_page.style is None:
+            scored_page.style = self.scorer.analyze_style(
+                scored_page.raw_text, line_stats=scored_page.line_stats
+            )
+        return scored_page.style
+
     def _create_toc_page(self, pdf_doc: Document, scored_page: ScoredPage) -> ToCPage:
         """Construct a ToCPage from a scored page.
 
         Args:
-            pdf_doc: PyMuPDF Document used to resolve link information.
-            scored_page: ScoredPage containing raw text and score.
+            pdf_doc: PyMuPDF Document the page was scored from.
+            scored_page: ScoredPage containing raw text, score and features.
 
         Returns:
             ToCPage with cleaned text and confidence score.
@@ -147,8 +278,11 @@ class ManualToCExtractor:
         short marker indicating target page numbers for each line that contains
         one or more internal links.
 
+        Line geometry is read here, for the selected ToC pages only, rather
+        than while scanning.
+
         Args:
-            pdf_doc: PyMuPDF Document used to access page structure.
+            pdf_doc: PyMuPDF Document the page was scored from.
             scored_page: ScoredPage for which to build the cleaned text.
 
         Returns:
@@ -156,45 +290,25 @@ class ManualToCExtractor:
             like "[links->pages: 5, 7]". Falls back to regular cleaned text
             if the 'dict' text extraction mode is unavailable.
         """
-        page = pdf_doc.load_page(scored_page.page_index)
-
-        try:
-            page_dict = page.get_text("dict")
-        except Exception:
+        features = scored_page.features
+        lines = (
+            extract_page_lines(pdf_doc.load_page(scored_page.page_index))
+            if features is not None
+            else None
+        )
+        if lines is None:
             # Fallback: use cleaned raw text when structured extraction is not available
             return self.cleaner.clean(scored_page.raw_text)
 
-        links = page.get_links() or []
-        internal_links = [lnk for lnk in links if isinstance(lnk.get("page"), int)]
-
     # Prepare structure: line text, bbox and set of target pages
-        line_entries: List[dict] = []
-
-        for block in page_dict.get("blocks", []):
-            # Skip non-text blocks (type 0 denotes text)
-            if block.get("type", 0) != 0:
-                continue
-
-            for line in block.get("lines", []):
-                text = "".join(span.get("text", "") for span in line.get("spans", []))
-                bbox = line.get("bbox")
-                line_entries.append({
-                    "text": text,
-                    "bbox": bbox,
-                    "target_pages": set()
-                })
-
-        def rects_intersect(r1, r2, eps: float = 1e-3) -> bool:
-            if r1 is None or r2 is None:
-                return False
-            x0 = max(r1[0], r2[0])
-            y0 = max(r1[1], r2[1])
-            x1 = min(r1[2], r2[2])
-            y1 = min(r1[3], r2[3])
-            return (x1 - x0) > eps and (y1 - y0) > eps
-
-        # Assign internal links to lines by bbox intersection
-        for link in internal_links:
+        line_entries: List[dict] = [
+            {"text": line.text, "bbox": line.bbox, "target_pages": set()}
+            for line in lines
+        ]
+
+        # Assign internal links to lines through a per-page interval index
+        line_index = LineIndex([entry["bbox"] for entry in line_entries])
+        for link in features.internal_links:
             rect = link.get("from") or link.get("rect")
             target_page = link.get("page")
             if rect is None or target_page is None:
@@ -203,9 +317,8 @@ class ManualToCExtractor:
             # PyMuPDF returns 0-based page indices; convert to 1-based numbers
             page_number = target_page + 1
 
-            for entry in line_entries:
-                if rects_intersect(rect, entry["bbox"]):
-                    entry["target_pages"].add(page_number)
+            for line_idx in line_index.query(rect):
+                line_entries[line_idx]["target_pages"].add(page_number)
 
     # Build raw text with appended link target markers
         lines_with_markers: List[str] = []
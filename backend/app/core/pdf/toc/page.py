@@ -1,4 +1,8 @@
 from dataclasses import dataclass
+from typing import Optional
+
+from .features import PageFeatures
+from .line_features import LineStats
 
 @dataclass(frozen=True)
 class ToCPage:
@@ -13,6 +17,9 @@ class ScoredPage:
     raw_text: str
     score: float
     internal_link_density: float = 0.0
+    features: Optional[PageFeatures] = None
+    line_stats: Optional[LineStats] = None
+    style: Optional["ToCStyle"] = None
 
 @dataclass(frozen=True)
 class ToCStyle:
@@ -14,3 +14,6 @@ class RegexChecker:
 
     def match(self, string: str) -> Optional[Match[str]]:
         return self.regex.match(string)
+
+    def search(self, string: str) -> Optional[Match[str]]:
+        return self.regex.search(string)
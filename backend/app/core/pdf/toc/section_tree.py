@@ -0,0 +1,142 @@
+import bisect
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from .toc_model import TableOfContents
+
+
+class SectionLike(Protocol):
+    section_number: str
+    title: str
+    start_page: int
+
+
+@dataclass
+class SectionNode:
+    """A ToC section with the page range of its whole subtree (1-based, inclusive)."""
+    section_number: str
+    title: str
+    start_page: int
+    end_page: int
+    depth: int
+    parent: Optional[int] = None
+    children: List[int] = field(default_factory=list)
+
+
+def _is_ancestor(number: str, other: str) -> bool:
+    """Whether section `number` contains section `other` ("1" contains "1.2.3")."""
+    return bool(number) and other.startswith(number + ".")
+
+
+def _title_key(title: str) -> str:
+    return " ".join(title.split()).casefold()
+
+
+class SectionTree:
+    """Section hierarchy of a Table of Contents with page-range queries.
+
+    Nesting comes from `section_number` ("1.2" is a child of "1"). A section
+    ends on the page before the next section that is not one of its
+    descendants starts, so chapter 1 spans all of 1.1, 1.2, ... rather than
+    ending where 1.1 begins. Lookups by number or title are dictionary
+    lookups and the section containing a page is found by binary search.
+    """
+    def __init__(self, sections: Sequence[SectionLike], total_pages: int):
+        """Build the tree.
+
+        Args:
+            sections: Sections in ToC order, e.g. `TableOfContents.sections`.
+            total_pages: Page count of the document; the last sections end there.
+        """
+        self.total_pages = total_pages
+        self.nodes: List[SectionNode] = []
+        self._by_number: Dict[str, int] = {}
+        self._by_title: Dict[str, int] = {}
+
+        open_nodes: List[int] = []
+        for section in sections:
+            if not 1 <= section.start_page <= total_pages:
+                continue
+            number = (section.section_number or "").strip().rstrip(".")
+
+            # Close every open section that does not contain this one.
+            while open_nodes and not _is_ancestor(
+                self.nodes[open_nodes[-1]].section_number, number
+            ):
+                self._close(open_nodes.pop(), section.start_page - 1)
+
+            parent = open_nodes[-1] if open_nodes else None
+            index = len(self.nodes)
+            self.nodes.append(SectionNode(
+                section_number=number,
+                title=section.title,
+                start_page=section.start_page,
+                end_page=total_pages,
+                depth=len(open_nodes),
+                parent=parent,
+            ))
+            if parent is not None:
+                self.nodes[parent].children.append(index)
+            if number:
+                self._by_number.setdefault(number, index)
+            self._by_title.setdefault(_title_key(section.title), index)
+            open_nodes.append(index)
+
+        for index in open_nodes:
+            self._close(index, total_pages)
+
+        # Page lookup: nodes by start page, deeper (later) sections last on ties.
+        self._by_start = sorted(
+            range(len(self.nodes)), key=lambda i: (self.nodes[i].start_page, i)
+        )
+        self._starts = [self.nodes[i].start_page for i in self._by_start]
+
+    @classmethod
+    def from_toc_model(cls, toc_model: Optional[Dict], total_pages: int) -> "SectionTree":
+        """Build from a stored `toc_model` dict; empty when there is none."""
+        if not toc_model or "sections" not in toc_model:
+            return cls([], total_pages)
+        return cls(TableOfContents.model_validate(toc_model).sections, total_pages)
+
+    def _close(self, index: int, end_page: int) -> None:
+        node = self.nodes[index]
+        node.end_page = max(node.start_page, min(self.total_pages, end_page))
+
+    def find(self, key: str) -> Optional[SectionNode]:
+        """Section with section number `key`, or else with title `key`."""
+        index = self._by_number.get(key.strip().rstrip("."))
+        if index is None:
+            index = self._by_title.get(_title_key(key))
+        return self.nodes[index] if index is not None else None
+
+    def page_range(self, key: str) -> Optional[Tuple[int, int]]:
+        node = self.find(key)
+        return (node.start_page, node.end_page) if node is not None else None
+
+    def select(self, keys: Iterable[str]) -> List[Tuple[int, int]]:
+        """Merged, sorted page ranges covering every section in `keys`.
+
+        Unknown keys are ignored; overlapping ranges (a chapter together
+        with one of its subsections) are merged.
+        """
+        ranges = sorted(r for r in map(self.page_range, keys) if r is not None)
+        merged: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def section_at(self, page: int) -> Optional[SectionNode]:
+        """Deepest section containing 1-based `page`."""
+        i = bisect.bisect_right(self._starts, page)
+        if not i:
+            return None
+        index: Optional[int] = self._by_start[i - 1]
+        while index is not None and self.nodes[index].end_page < page:
+            index = self.nodes[index].parent
+        return self.nodes[index] if index is not None else None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
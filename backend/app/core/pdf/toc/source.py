@@ -0,0 +1,20 @@
+import os
+from typing import Union
+
+import fitz
+
+# A PDF that another process can open on its own: a file path or the raw bytes.
+PdfSource = Union[str, bytes]
+
+
+def open_pdf(source: PdfSource) -> fitz.Document:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def source_of(pdf_doc: fitz.Document) -> PdfSource:
+    """Return something a worker process can reopen `pdf_doc` from."""
+    if pdf_doc.name and os.path.exists(pdf_doc.name):
+        return pdf_doc.name
+    return pdf_doc.tobytes()
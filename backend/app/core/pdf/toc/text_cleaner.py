@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from typing import List
 from .configuration import ToCConfiguration
 
@@ -7,6 +8,12 @@ from .configuration import ToCConfiguration
 class TextCleaner:
     def __init__(self, config: ToCConfiguration) -> None:
         self.config = config
+        # All noise patterns folded into one alternation, tested once per line
+        self._noise_regex = re.compile("|".join(
+            f"(?i:{checker.regex.pattern})" if checker.regex.flags & re.IGNORECASE
+            else f"(?:{checker.regex.pattern})"
+            for checker in config.noise_checkers
+        )) if config.noise_checkers else None
 
     def clean(self, raw_text: str) -> str:
         lines = raw_text.splitlines()
@@ -24,7 +31,7 @@ class TextCleaner:
         return line
 
     def _is_noise_line(self, line: str) -> bool:
-        return any(checker.fullmatch(line) for checker in self.config.noise_checkers)
+        return self._noise_regex is not None and self._noise_regex.fullmatch(line) is not None
 
     def _collapse_whitespace(self, line: str) -> str:
         return " ".join(line.split())
@@ -0,0 +1,268 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .configuration import ToCConfiguration
+from .toc_model import Section, TableOfContents
+
+_ROMAN = re.compile(r"M{0,4}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})", re.IGNORECASE)
+_ROMAN_VALUES = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+_TRAILING_LEADER = re.compile(r"[\s.]+$")
+
+# Section numbers above this are years or page numbers, not chapters.
+MAX_ROMAN_SECTION = 50
+# Front matter is short; larger "Roman" pages are words like "civil" or "mix".
+MAX_ROMAN_PAGE = 50
+
+
+def roman_to_int(text: str) -> Optional[int]:
+    """Value of a Roman numeral, or None if `text` is not a valid one."""
+    if not text or not _ROMAN.fullmatch(text):
+        return None
+    values = [_ROMAN_VALUES[c] for c in text.upper()]
+    total = 0
+    for i, value in enumerate(values):
+        if i + 1 < len(values) and value < values[i + 1]:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+@dataclass
+class _Entry:
+    number: Optional[str]
+    title: str
+    page: int
+    page_is_roman: bool
+    links: List[int] = field(default_factory=list)
+
+
+@dataclass
+class _Pending:
+    """Start of an entry whose page number is on a following line."""
+    number: Optional[str]
+    title_parts: List[str]
+    links: List[int]
+    lines: int = 1
+
+
+@dataclass(frozen=True)
+class ParsedToC:
+    """Result of the local parser.
+
+    `confidence` is in [0, 1]; `page_offset` is the difference between PDF
+    page numbers and printed page numbers derived from link markers.
+    """
+    toc: Optional[TableOfContents]
+    confidence: float
+    page_offset: int = 0
+
+
+class ToCParser:
+    """Deterministic parser for cleaned Table-of-Contents text.
+
+    Turns the output of `ManualToCExtractor` ("1.2 Title ... 34" lines,
+    optionally followed by "[links->pages: N]" markers) into sections
+    without an LLM. Roman section numbers are converted to Arabic, and
+    printed page numbers are shifted to PDF page numbers using the offset
+    that the link markers agree on. The confidence score says how much of
+    the text was understood and whether the result looks consistent.
+    """
+    def __init__(self, config: Optional[ToCConfiguration] = None):
+        """Initialize parser with provided configuration.
+
+        Args:
+            config: Optional ToCConfiguration. If omitted, defaults are used.
+        """
+        self.config = config or ToCConfiguration()
+
+    def parse(self, text: str) -> ParsedToC:
+        """Parse cleaned ToC text.
+
+        Args:
+            text: Cleaned ToC text, one entry per line.
+
+        Returns:
+            ParsedToC with the sections found (None when there are none)
+            and the confidence in them.
+        """
+        entries, unparsed = self._parse_entries(text)
+        if not entries:
+            return ParsedToC(toc=None, confidence=0.0)
+
+        offset, agreement = self._page_offset(entries)
+        sections = [
+            Section(
+                section_number=entry.number or "",
+                title=entry.title,
+                start_page=self._start_page(entry, offset),
+            )
+            for entry in entries
+        ]
+
+        confidence = self._confidence(entries, sections, unparsed, agreement)
+        return ParsedToC(
+            toc=TableOfContents(sections=sections),
+            confidence=confidence,
+            page_offset=offset,
+        )
+
+    def _parse_entries(self, text: str) -> Tuple[List[_Entry], int]:
+        """Collect entries and count the lines that could not be placed.
+
+        Lines before the first entry (document and ToC headers) are ignored.
+        Numbered lines without a page number are kept pending, since the title
+        or page often wraps onto the next line; if none follows they are
+        treated as part headings, which carry no page and are skipped.
+        """
+        entries: List[_Entry] = []
+        pending: Optional[_Pending] = None
+        unparsed = 0
+
+        for line in text.splitlines():
+            line, links = self._strip_link_marker(line.strip())
+            if not line:
+                if pending is not None and links and not pending.links:
+                    pending.links = links
+                continue
+
+            page_match = self.config.checker_entry_page.fullmatch(line)
+            if page_match is not None:
+                page = page_match.group("page")
+                page_is_roman = not page.isdigit()
+                page_number = self._page_number(page)
+                if page_number is None:
+                    # A title ending in a numeral-like word, not a page reference
+                    if pending is not None:
+                        unparsed += pending.lines
+                        pending = None
+                    unparsed += 1
+                    continue
+
+                number, title = self._split_numbering(page_match.group("body"))
+                if pending is not None:
+                    if number is None:
+                        number = pending.number
+                        title = " ".join(pending.title_parts + [title]).strip()
+                        links = links or pending.links
+                    elif pending.number is None:
+                        unparsed += pending.lines
+                    pending = None
+
+                title = _TRAILING_LEADER.sub("", title)
+                if not title:
+                    unparsed += 1
+                    continue
+
+                entries.append(_Entry(
+                    number=number,
+                    title=title,
+                    page=page_number,
+                    page_is_roman=page_is_roman,
+                    links=links,
+                ))
+                continue
+
+            number, title = self._split_numbering(line)
+            if number is not None:
+                if pending is not None and pending.number is None:
+                    unparsed += pending.lines
+                pending = _Pending(number, [title] if title else [], links)
+            elif pending is not None:
+                # Wrapped title continues on this line
+                pending.title_parts.append(line)
+                pending.lines += 1
+                pending.links = pending.links or links
+            elif entries:
+                pending = _Pending(None, [line], links)
+
+        if pending is not None and pending.number is None:
+            unparsed += pending.lines
+        return entries, unparsed
+
+    @staticmethod
+    def _page_number(page: str) -> Optional[int]:
+        """Printed page number, or None for a Roman one that is invalid or too large."""
+        if page.isdigit():
+            return int(page)
+        value = roman_to_int(page)
+        if value is None or value > MAX_ROMAN_PAGE:
+            return None
+        return value
+
+    def _strip_link_marker(self, line: str) -> Tuple[str, List[int]]:
+        match = self.config.checker_link_marker.search(line)
+        if match is None:
+            return line, []
+        pages = sorted(int(p) for p in match.group("pages").split(","))
+        return line[: match.start()].rstrip(), pages
+
+    def _split_numbering(self, body: str) -> Tuple[Optional[str], str]:
+        """Split a leading section number off `body`.
+
+        Returns:
+            The normalized number (Roman parts converted to Arabic), or None
+            when the body is not numbered, and the remaining title.
+        """
+        body = body.strip()
+        match = self.config.checker_numbering.fullmatch(body)
+        if match is None:
+            return None, body
+
+        label = (match.group("label") or "").lower()
+        head, *rest = match.group("num").split(".")
+        explicit = bool(label or match.group("sep") or rest)
+
+        # Words like "I" or "Mix" only count as numerals when marked as such.
+        roman = roman_to_int(head) if explicit and label != "appendix" else None
+        if head.isdigit():
+            number_head = head
+        elif roman is not None and roman <= MAX_ROMAN_SECTION:
+            number_head = str(roman)
+        elif len(head) == 1 and explicit:
+            number_head = head.upper()
+        else:
+            return None, body
+
+        return ".".join([number_head, *rest]), (match.group("title") or "").strip()
+
+    def _page_offset(self, entries: List[_Entry]) -> Tuple[int, float]:
+        """Most common (link page - printed page) offset and the share agreeing."""
+        offsets = Counter(
+            entry.links[0] - entry.page
+            for entry in entries
+            if entry.links and not entry.page_is_roman
+        )
+        if not offsets:
+            return 0, 1.0
+        offset, votes = offsets.most_common(1)[0]
+        return offset, votes / sum(offsets.values())
+
+    @staticmethod
+    def _start_page(entry: _Entry, offset: int) -> int:
+        if entry.links:
+            return entry.links[0]
+        if entry.page_is_roman:
+            # Front matter is numbered from the start of the file.
+            return entry.page
+        return entry.page + offset
+
+    def _confidence(
+        self,
+        entries: List[_Entry],
+        sections: List[Section],
+        unparsed: int,
+        agreement: float,
+    ) -> float:
+        """Combine coverage, page order, link agreement and numbering into [0, 1]."""
+        if len(entries) < self.config.parser_min_entries:
+            return 0.0
+
+        coverage = len(entries) / (len(entries) + unparsed)
+        pairs = list(zip(sections, sections[1:]))
+        ordered = sum(a.start_page <= b.start_page for a, b in pairs) / len(pairs)
+        numbered = sum(entry.number is not None for entry in entries) / len(entries)
+
+        return coverage * ordered * agreement * (0.5 + 0.5 * numbered)
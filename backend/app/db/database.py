@@ -1,16 +1,88 @@
+import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Any, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from beanie import init_beanie
-from app.db.models import PDFDocument
+from app.db.models import (
+    DocumentTextIndex,
+    PDFDocument,
+    QuizVersion,
+    ToCCacheEntry,
+    ToCVersion,
+)
+
+# One pooled client per process, created by init_db() and shared by every
+# Beanie model, GridFS bucket and raw collection.
+_client: Optional[AsyncIOMotorClient] = None
+_database: Optional[AsyncIOMotorDatabase] = None
+_init_lock: Optional[asyncio.Lock] = None
+
+
+def client_options() -> Dict[str, Any]:
+    """Connection pool settings for the shared client, from the environment."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", 0)),
+    }
+    if os.getenv("MONGODB_MAX_IDLE_TIME_MS"):
+        options["maxIdleTimeMS"] = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS"))
+    if os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS"):
+        # Fail requests that wait this long for a free connection instead of queueing forever.
+        options["waitQueueTimeoutMS"] = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS"))
+    return options
+
+
+async def init_db() -> Tuple[AsyncIOMotorClient, AsyncIOMotorDatabase]:
+    """Create the shared client and initialize Beanie, once per process.
+
+    Later calls return the existing client and database.
+    """
+    global _client, _database, _init_lock
+
+    if _database is not None:
+        return _client, _database
+
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        if _database is None:
+            mongo_url = os.getenv("MONGODB_URL")
+            db_name = os.getenv("MONGODB_DB_NAME")
+
+            client = AsyncIOMotorClient(mongo_url, **client_options())
+            database = client[db_name]
+
+            await init_beanie(
+                database=database,
+                document_models=[
+                    PDFDocument,
+                    ToCVersion,
+                    QuizVersion,
+                    ToCCacheEntry,
+                    DocumentTextIndex,
+                ],
+            )
+
+            _client, _database = client, database
+
+    return _client, _database
 
 
-async def init_db():
-    mongo_url = os.getenv("MONGODB_URL")
-    db_name = os.getenv("MONGODB_DB_NAME")
+async def get_database() -> AsyncIOMotorDatabase:
+    """The shared database, initializing it on first use outside the app lifespan."""
+    if _database is not None:
+        return _database
+    client, database = await init_db()
+    return database
 
-    client = AsyncIOMotorClient(mongo_url)
-    database = client[db_name]
 
-    await init_beanie(database=database, document_models=[PDFDocument])
+def close_db() -> None:
+    """Close the shared client; the next init_db() starts a fresh one."""
+    global _client, _database, _init_lock
 
-    return client, database
+    if _client is not None:
+        _client.close()
+    _client = None
+    _database = None
+    _init_lock = None
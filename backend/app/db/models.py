@@ -1,23 +1,140 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime
 from uuid import UUID, uuid4
 from beanie import Document
-from pydantic import Field
+from pydantic import BaseModel, Field, model_validator
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from app.schemas.quiz import QuizConfig
 
 
+def name_key(name: str) -> str:
+    return name.casefold()
+
+
 class PDFDocument(Document):
+    """The document record read on every request; kept small.
+
+    The ToC and quizzes live in their own collections (ToCVersion,
+    QuizVersion); `toc_id` and `quiz_id` point at the current versions.
+    """
     id: UUID = Field(default_factory=uuid4)
     name: str
+    # Lower-cased `name`, so name searches are index-backed prefix scans.
+    name_key: str = ""
     pdf_name: str
     pdf_file_id: Optional[str] = None
-    toc_model: Optional[Dict] = None
+    toc_id: Optional[UUID] = None
     quiz_conf: Optional[QuizConfig] = None
-    quiz: dict = Field(default_factory=dict)
+    quiz_id: Optional[UUID] = None
     total_pages: int = 0
     is_verified: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @model_validator(mode="after")
+    def _derive_name_key(self) -> "PDFDocument":
+        if not self.name_key:
+            self.name_key = name_key(self.name)
+        return self
+
     class Settings:
         name = "pdf_documents"
+        indexes = [
+            # Keyset pagination of the document list, newest first.
+            IndexModel(
+                [("updated_at", DESCENDING), ("_id", DESCENDING)],
+                name="updated_at_id",
+            ),
+            # Name prefix search, paged the same way.
+            IndexModel(
+                [("name_key", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+                name="name_key_updated_at_id",
+            ),
+        ]
+
+
+class ToCVersion(Document):
+    """One saved Table of Contents of a document; every edit adds a version."""
+    id: UUID = Field(default_factory=uuid4)
+    doc_id: UUID
+    version: int
+    toc_model: Dict
+    # "extracted", "edited" or "migrated"
+    source: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "toc_versions"
+        indexes = [
+            IndexModel([("doc_id", ASCENDING), ("version", DESCENDING)], unique=True)
+        ]
+
+
+class QuizVersion(Document):
+    """One generated quiz of a document, kept as history when a new one is made.
+
+    A streamed quiz is stored with its first question and grows until
+    `complete` is set.
+    """
+    id: UUID = Field(default_factory=uuid4)
+    doc_id: UUID
+    version: int
+    quiz_conf: Optional[QuizConfig] = None
+    quiz: dict = Field(default_factory=dict)
+    complete: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "quiz_versions"
+        indexes = [
+            IndexModel([("doc_id", ASCENDING), ("version", DESCENDING)], unique=True)
+        ]
+
+
+class ToCCacheEntry(Document):
+    content_hash: str
+    config_version: str
+    prompt_version: str
+    toc_model: Dict
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "toc_cache"
+        indexes = [
+            IndexModel(
+                [
+                    ("content_hash", ASCENDING),
+                    ("config_version", ASCENDING),
+                    ("prompt_version", ASCENDING),
+                ],
+                unique=True,
+            )
+        ]
+
+
+class SectionRange(BaseModel):
+    section_number: str = ""
+    title: str
+    # 1-based, inclusive
+    start_page: int
+    end_page: int
+
+
+class DocumentTextIndex(Document):
+    """Extracted text of a document's pages, stored once after upload.
+
+    `text` is the zlib-compressed concatenation of every page's text;
+    page i (0-based) spans characters `page_offsets[i]:page_offsets[i + 1]`
+    of the decompressed string. `sections` holds the page range of every
+    ToC section and is rewritten on its own when the ToC is edited.
+    """
+    doc_id: UUID
+    page_count: int
+    text: bytes
+    page_offsets: List[int]
+    sections: List[SectionRange] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "document_text"
+        indexes = [IndexModel([("doc_id", ASCENDING)], unique=True)]
@@ -0,0 +1,15 @@
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def configure_logging() -> None:
+    """Send `app.*` log records to stderr at `LOG_LEVEL` (default INFO).
+
+    Called by each entry point: the API, the standalone worker and the
+    extraction worker processes, which start without the parent's handlers.
+    """
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(format=LOG_FORMAT)
+    logging.getLogger("app").setLevel(level)
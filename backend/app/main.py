@@ -1,3 +1,6 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,9 +8,57 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.api import documents, pdf, quiz  # noqa: E402
+from app.log_config import configure_logging  # noqa: E402
+
+configure_logging()
+
+from app.api import documents, metrics, pdf, quiz  # noqa: E402
+from app.schemas.tasks import TaskKind  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.db.database import close_db, init_db
+    from app.dependencies import get_orchestrator
+    from app.services.document_versions import document_versions
+    from app.services.documents import document_service
+    from app.worker import worker_kinds
+
+    # One pooled Mongo client for the whole process, closed on shutdown.
+    await init_db()
+
+    # Records from before ToC and quiz versions move their payloads out once.
+    try:
+        migrated = await document_versions.migrate_embedded()
+        if migrated:
+            print(f"Moved embedded ToC/quiz payloads of {migrated} documents into versions")
+    except Exception as e:
+        print(f"Failed to migrate embedded document payloads: {e}")
+    try:
+        await document_service.backfill_name_keys()
+    except Exception as e:
+        print(f"Failed to backfill document name keys: {e}")
 
-app = FastAPI(title="PDF TOC Extractor")
+    # Tasks of these kinds run in the API process; the rest are left to
+    # `python -m app.worker` nodes.
+    orchestrator = get_orchestrator()
+    kinds = worker_kinds(os.getenv("TASK_WORKER_KINDS", "extract_toc,generate_quiz"))
+    worker = None
+    if kinds:
+        if TaskKind.extract_toc in kinds:
+            await orchestrator.engine.warm_up()
+        worker = orchestrator.create_worker(kinds)
+        worker.start()
+
+    yield
+
+    if worker is not None:
+        await worker.stop()
+    orchestrator.engine.shutdown()
+    close_db()
+
+
+app = FastAPI(title="PDF TOC Extractor", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,12 +66,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(pdf.router, prefix="/api/pdf", tags=["pdf"])
 
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(quiz.router, prefix="/api/quiz", tags=["quiz"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 
 @app.get("/")
@@ -33,10 +86,3 @@ async def global_exception_handler(request: Request, exc: Exception):
     return JSONResponse(
         status_code=500, content={"detail": str(exc), "type": type(exc).__name__}
     )
-
-
-@app.on_event("startup")
-async def on_startup():
-    from app.db.database import init_db
-
-    await init_db()
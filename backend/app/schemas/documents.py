@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, Dict
 from uuid import UUID
 from pydantic import BaseModel, Field
@@ -9,6 +10,24 @@ class DocumentSummary(BaseModel):
     name: str
     pdf_name: str
     total_pages: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class DocumentDetail(BaseModel):
+    """A document with its current ToC and quiz, assembled from their versions."""
+    id: UUID
+    name: str
+    pdf_name: str
+    pdf_file_id: Optional[str] = None
+    toc_model: Optional[Dict] = None
+    toc_version: Optional[int] = None
+    quiz_conf: Optional[QuizConfig] = None
+    quiz: dict = Field(default_factory=dict)
+    quiz_version: Optional[int] = None
+    total_pages: int = 0
+    is_verified: bool = False
+    created_at: datetime
+    updated_at: datetime
 
 
 class DocumentUpdate(BaseModel):
@@ -25,6 +25,8 @@ class QuestionConfig(BaseModel):
 class QuizConfig(BaseModel):
     scope: QuizConfigScope
     selectedChapter: Optional[str] = None
+    # Several chapters, by title or section number; takes precedence over selectedChapter
+    selectedChapters: Optional[List[str]] = None
     pageRange: Optional[dict] = None  # start, end
     singlePage: Optional[int] = None
     questions: List[QuestionConfig]
@@ -0,0 +1,50 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from uuid import uuid4
+from pydantic import BaseModel, Field
+
+
+class TaskKind(str, Enum):
+    extract_toc = "extract_toc"
+    generate_quiz = "generate_quiz"
+
+
+class TaskState(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+    @property
+    def is_final(self) -> bool:
+        return self in (TaskState.completed, TaskState.failed)
+
+
+class TaskRecord(BaseModel):
+    """A unit of background work as stored by the task broker.
+
+    `state` drives scheduling; `status` is the progress message shown to
+    clients polling the task.
+    """
+    task_id: str = Field(default_factory=lambda: str(uuid4()))
+    kind: TaskKind
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    state: TaskState = TaskState.queued
+    status: str = "queued"
+    # Higher runs first
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int = 3
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    # Latest TaskProgress fields reported by the handler
+    progress: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    doc_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set once the task is completed or failed for good; finished tasks expire.
+    finished_at: Optional[datetime] = None
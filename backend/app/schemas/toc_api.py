@@ -1,7 +1,10 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
+from app.schemas.tasks import TaskRecord
+
 
 class Section(BaseModel):
     section_number: str
@@ -18,9 +21,43 @@ class UploadResponse(BaseModel):
     status: str
 
 
+class TaskProgress(BaseModel):
+    """How far a running task has got; fields that do not apply stay None."""
+    percent: Optional[float] = None
+    pages_scored: Optional[int] = None
+    pages_total: Optional[int] = None
+    batches_done: Optional[int] = None
+    batches_total: Optional[int] = None
+    tokens: Optional[int] = None
+    questions: Optional[int] = None
+
+
 class TaskStatus(BaseModel):
     task_id: str
     status: str
-    result: Optional[TableOfContents] = None
+    progress: Optional[TaskProgress] = None
+    # A ToC for extraction tasks, the generated quiz for quiz tasks
+    result: Optional[Union[TableOfContents, Dict[str, Any]]] = None
     doc_id: Optional[UUID] = None
     error: Optional[str] = None
+
+
+class TaskEvent(TaskStatus):
+    """A TaskStatus snapshot pushed to subscribers whenever the task changes."""
+    kind: str
+    state: str
+    updated_at: datetime
+
+    @classmethod
+    def from_record(cls, record: TaskRecord) -> "TaskEvent":
+        return cls(
+            task_id=record.task_id,
+            kind=record.kind.value,
+            state=record.state.value,
+            status=record.status,
+            progress=TaskProgress.model_validate(record.progress) if record.progress else None,
+            result=record.result,
+            doc_id=record.doc_id,
+            error=record.error,
+            updated_at=record.updated_at,
+        )
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar, Union
+
+import fitz
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from app.db.database import get_database
+
+R = TypeVar("R")
+
+# Thread of the document the current task holds through `DocumentPool.open`.
+_document_thread: ContextVar[Optional[ThreadPoolExecutor]] = ContextVar(
+    "document_thread", default=None
+)
+
+
+def _document_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="pymupdf")
+
+
+@dataclass
+class _PoolEntry:
+    doc: fitz.Document
+    # The PDF bytes; PyMuPDF keeps the stream it was opened from alive anyway.
+    data: Union[bytes, bytearray]
+    # Every PyMuPDF call on `doc`, closing included, runs here in order.
+    executor: ThreadPoolExecutor = field(default_factory=_document_executor)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+    evicted: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class DocumentPool:
+    """Process-wide pool of open PyMuPDF documents keyed by GridFS file id.
+
+    Documents are downloaded and parsed once, then shared by previews, page
+    counts and quiz text extraction. The pool is an LRU bounded by the size
+    of the underlying PDF bytes. PyMuPDF documents are not safe for
+    concurrent use, so each one is handed out under its own lock and has
+    its own thread: every PyMuPDF call on it (opening, reading, rendering,
+    closing) goes through `run` and executes there, so calls on one
+    document never overlap while different documents proceed in parallel.
+    Concurrent requests for a document that is still loading share one
+    download.
+    """
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("DOCUMENT_POOL_MAX_BYTES", 256 * 1024 * 1024))
+        )
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def run(self, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Run a PyMuPDF call off the event loop.
+
+        Inside `open` it runs on the thread of the document held; elsewhere,
+        e.g. to open fresh bytes, in the loop's default executor.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            _document_thread.get(), functools.partial(fn, *args, **kwargs)
+        )
+
+    @asynccontextmanager
+    async def open(self, pdf_file_id: str) -> AsyncIterator[fitz.Document]:
+        """Yield the open document for `pdf_file_id` with exclusive access.
+
+        Work on the document must go through `run`.
+        """
+        entry = await self._get_entry(pdf_file_id)
+        while entry.evicted:
+            # Evicted (and possibly closed) while this caller awaited a shared load.
+            entry = await self._get_entry(pdf_file_id)
+        entry.users += 1
+        try:
+            async with entry.lock:
+                token = _document_thread.set(entry.executor)
+                try:
+                    yield entry.doc
+                finally:
+                    _document_thread.reset(token)
+        finally:
+            entry.users -= 1
+            if entry.evicted and entry.users == 0:
+                self._close(entry)
+
+    def get_bytes(self, pdf_file_id: str) -> Optional[Union[bytes, bytearray]]:
+        """The PDF bytes if the document is resident, without downloading it."""
+        entry = self._entries.get(pdf_file_id)
+        if entry is None or entry.evicted:
+            return None
+        self._entries.move_to_end(pdf_file_id)
+        return entry.data
+
+    async def preload(
+        self,
+        pdf_file_id: str,
+        pdf_bytes: Union[bytes, bytearray],
+        doc: Optional[fitz.Document] = None,
+    ) -> None:
+        """Adopt bytes that are already in memory, e.g. right after an upload.
+
+        `doc`, if given, is those bytes already opened; the pool takes
+        ownership of it and closes it if it is not kept.
+        """
+        if pdf_file_id in self._entries or len(pdf_bytes) > self.max_bytes:
+            if doc is not None:
+                await self.run(doc.close)
+            return
+        executor = _document_executor()
+        if doc is None:
+            doc = await self._open_on(executor, pdf_bytes)
+        if pdf_file_id in self._entries:
+            # Loaded by a request while this one was opening.
+            self._close(_PoolEntry(doc=doc, data=pdf_bytes, executor=executor))
+            return
+        self._insert(pdf_file_id, _PoolEntry(doc=doc, data=pdf_bytes, executor=executor))
+
+    async def _get_entry(self, pdf_file_id: str) -> _PoolEntry:
+        entry = self._entries.get(pdf_file_id)
+        if entry is not None:
+            self._entries.move_to_end(pdf_file_id)
+            self.hits += 1
+            return entry
+
+        pending = self._loading.get(pdf_file_id)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[pdf_file_id] = future
+        try:
+            pdf_bytes = await self._download(pdf_file_id)
+            executor = _document_executor()
+            try:
+                doc = await self._open_on(executor, pdf_bytes)
+            except Exception:
+                executor.shutdown(wait=False)
+                raise
+            entry = _PoolEntry(doc=doc, data=pdf_bytes, executor=executor)
+            self._insert(pdf_file_id, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: waiters, if any, re-raise it themselves.
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(pdf_file_id, None)
+
+    @staticmethod
+    async def _open_on(
+        executor: ThreadPoolExecutor, pdf_bytes: Union[bytes, bytearray]
+    ) -> fitz.Document:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(fitz.open, stream=pdf_bytes, filetype="pdf")
+        )
+
+    async def _download(self, pdf_file_id: str) -> bytes:
+        fs = AsyncIOMotorGridFSBucket(await get_database())
+        grid_out = await fs.open_download_stream(ObjectId(pdf_file_id))
+        return await grid_out.read()
+
+    def _insert(self, pdf_file_id: str, entry: _PoolEntry) -> None:
+        self._entries[pdf_file_id] = entry
+        self.resident_bytes += entry.size
+
+        # Never evict the entry just inserted, even if it alone exceeds the budget.
+        while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.resident_bytes -= evicted.size
+            evicted.evicted = True
+            if evicted.users == 0:
+                self._close(evicted)
+
+    def _close(self, entry: _PoolEntry) -> None:
+        # Queued behind any PyMuPDF work still running on the document; the
+        # thread exits once it has closed it.
+        entry.executor.submit(entry.doc.close)
+        entry.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "open_documents": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+document_pool = DocumentPool()
@@ -0,0 +1,153 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.models import PDFDocument, QuizVersion, ToCVersion
+from app.schemas.quiz import QuizConfig
+
+V = TypeVar("V", ToCVersion, QuizVersion)
+
+
+class _EmbeddedPayloads(BaseModel):
+    """Payloads of a document record written before they had their own collections."""
+    id: UUID = Field(validation_alias="_id")
+    toc_model: Optional[Dict] = None
+    quiz_conf: Optional[QuizConfig] = None
+    quiz: Optional[Dict] = None
+
+
+class DocumentVersions:
+    """ToC and quiz versions of documents, stored apart from the document record.
+
+    Saving adds a version and points the document at it with a partial
+    `$set`, so the record itself stays small and earlier versions remain
+    as history.
+    """
+    async def current_toc(self, doc: PDFDocument) -> Optional[ToCVersion]:
+        if doc.toc_id is None:
+            return None
+        return await ToCVersion.get(doc.toc_id)
+
+    async def current_toc_model(self, doc: PDFDocument) -> Optional[Dict]:
+        version = await self.current_toc(doc)
+        return version.toc_model if version is not None else None
+
+    async def current_quiz(self, doc: PDFDocument) -> Optional[QuizVersion]:
+        if doc.quiz_id is None:
+            return None
+        return await QuizVersion.get(doc.quiz_id)
+
+    async def quiz_history(self, doc_id: UUID, limit: int = 20) -> List[QuizVersion]:
+        """Quizzes generated for the document, newest first."""
+        return (
+            await QuizVersion.find(QuizVersion.doc_id == doc_id)
+            .sort(-QuizVersion.version)
+            .limit(limit)
+            .to_list()
+        )
+
+    async def save_toc(self, doc: PDFDocument, toc_model: Dict, source: str) -> ToCVersion:
+        version = await self._insert_version(
+            ToCVersion, doc.id, toc_model=toc_model, source=source
+        )
+        await doc.set({
+            PDFDocument.toc_id: version.id,
+            PDFDocument.updated_at: datetime.utcnow(),
+        })
+        return version
+
+    async def save_quiz(
+        self, doc: PDFDocument, quiz: Dict[str, Any], complete: bool = True
+    ) -> QuizVersion:
+        """Add a quiz version made with the document's current quiz config.
+
+        An incomplete version is being streamed; the document keeps its
+        current quiz until `finish_quiz` makes the new one current.
+        """
+        version = await self._insert_version(
+            QuizVersion, doc.id, quiz_conf=doc.quiz_conf, quiz=quiz, complete=complete
+        )
+        if complete:
+            await self._make_current_quiz(doc, version)
+        return version
+
+    async def append_question(self, version: QuizVersion, question: Dict[str, Any]) -> None:
+        await version.update({"$push": {"quiz.questions": question}})
+
+    async def finish_quiz(
+        self, doc: PDFDocument, version: QuizVersion, quiz: Dict[str, Any]
+    ) -> None:
+        await version.set({QuizVersion.quiz: quiz, QuizVersion.complete: True})
+        await self._make_current_quiz(doc, version)
+
+    async def discard_quiz(self, version: QuizVersion) -> None:
+        """Delete a streamed version whose generation failed."""
+        await version.delete()
+
+    async def _make_current_quiz(self, doc: PDFDocument, version: QuizVersion) -> None:
+        await doc.set({
+            PDFDocument.quiz_id: version.id,
+            PDFDocument.updated_at: datetime.utcnow(),
+        })
+
+    async def _insert_version(self, model: Type[V], doc_id: UUID, **fields: Any) -> V:
+        # Numbers are unique per document; a concurrent save makes us take the next one.
+        for _ in range(5):
+            latest = (
+                await model.find(model.doc_id == doc_id)
+                .sort(-model.version)
+                .limit(1)
+                .to_list()
+            )
+            number = latest[0].version + 1 if latest else 1
+            version = model(doc_id=doc_id, version=number, **fields)
+            try:
+                await version.insert()
+                return version
+            except DuplicateKeyError:
+                continue
+        raise RuntimeError(f"Could not allocate a {model.__name__} for document {doc_id}")
+
+    async def migrate_embedded(self) -> int:
+        """Move `toc_model` and `quiz` still embedded in document records into versions.
+
+        Safe to run on every start, and from several processes at once: each
+        record is claimed by the one update that still finds its payloads,
+        and only that claim creates versions.
+        """
+        collection = PDFDocument.get_pymongo_collection()
+        embedded = {"$or": [{"toc_model": {"$exists": True}}, {"quiz": {"$exists": True}}]}
+        migrated = 0
+        async for record in collection.find(embedded, {"_id": 1}):
+            claimed = await collection.find_one_and_update(
+                {"_id": record["_id"], **embedded},
+                {"$unset": {"toc_model": "", "quiz": ""}},
+                projection={"toc_model": 1, "quiz_conf": 1, "quiz": 1},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if claimed is None:
+                # Migrated by another process in the meantime.
+                continue
+            payloads = _EmbeddedPayloads.model_validate(claimed)
+
+            ids: Dict[str, UUID] = {}
+            if payloads.toc_model:
+                toc = await self._insert_version(
+                    ToCVersion, payloads.id, toc_model=payloads.toc_model, source="migrated"
+                )
+                ids["toc_id"] = toc.id
+            if payloads.quiz:
+                quiz = await self._insert_version(
+                    QuizVersion, payloads.id, quiz_conf=payloads.quiz_conf, quiz=payloads.quiz
+                )
+                ids["quiz_id"] = quiz.id
+            if ids:
+                await collection.update_one({"_id": payloads.id}, {"$set": ids})
+            migrated += 1
+        return migrated
+
+document_versions = DocumentVersions()
@@ -1,28 +1,101 @@
-from typing import List, Optional
+import asyncio
+import base64
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
-import fitz
 
-from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import DESCENDING
 
-from app.db.database import init_db
-from app.db.models import PDFDocument
-from app.schemas.documents import DocumentSummary, DocumentUpdate
+from app.db.models import PDFDocument, name_key
+from app.schemas.documents import DocumentDetail, DocumentSummary, DocumentUpdate
+from app.services.document_pool import document_pool
+from app.services.document_versions import document_versions
+from app.services.page_renderer import PREVIEW_MEDIA_TYPES, page_renderer
+from app.services.preview_cache import preview_cache, preview_etag
+from app.services.text_index import text_index
+
+
+def encode_cursor(updated_at: datetime, doc_id: UUID) -> str:
+    """Opaque list cursor pointing just past the given document."""
+    raw = f"{updated_at.isoformat()}|{doc_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of `encode_cursor`; raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        updated_at, doc_id = raw.split("|")
+        return datetime.fromisoformat(updated_at), UUID(doc_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+@dataclass(frozen=True)
+class PagePreview:
+    # None when the client's cached copy is still valid (HTTP 304).
+    content: Optional[bytes]
+    media_type: str
+    etag: str
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    page_number: int
+    content: bytes
+    media_type: str
+    etag: str
 
 
 class DocumentService:
-    async def get_all_documents(self) -> List[DocumentSummary]:
+    async def list_documents(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> Tuple[List[DocumentSummary], Optional[str]]:
+        """One page of document summaries, most recently updated first.
+
+        Pages are keyed on the (updated_at, id) of the last document of the
+        previous page, so every page is a range scan of the `updated_at_id`
+        index however deep the client has paged. `name` keeps documents
+        whose name starts with it, ignoring case, using the `name_key`
+        index. Returns the page and the cursor of the
+        next one, None on the last page.
+        """
+        filters = []
+        if name:
+            # Anchored and case-sensitive on the folded key, so it is an index range.
+            filters.append({"name_key": {"$regex": "^" + re.escape(name_key(name))}})
+        if cursor:
+            updated_at, doc_id = decode_cursor(cursor)
+            filters.append({"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": doc_id}},
+            ]})
+
         try:
-            return (
-                await PDFDocument.find_all()
+            docs = (
+                await PDFDocument.find(*filters)
                 .project(DocumentSummary)
-                .sort("-updated_at")
+                .sort([("updated_at", DESCENDING), ("_id", DESCENDING)])
+                .limit(limit + 1)
                 .to_list()
             )
         except Exception as e:
             print(f"Database error fetching documents: {e}")
             raise e
 
+        if len(docs) <= limit:
+            return docs, None
+        docs = docs[:limit]
+        last = docs[-1]
+        if last.updated_at is None:
+            return docs, None
+        return docs, encode_cursor(last.updated_at, last.id)
+
     async def get_document_by_id(self, doc_id: UUID) -> Optional[PDFDocument]:
         try:
             doc = await PDFDocument.get(doc_id)
@@ -32,17 +105,12 @@ class DocumentService:
             # Update total_pages if missing
             if doc.total_pages == 0 and doc.pdf_file_id:
                 try:
-                    client, db = await init_db()
-                    fs = AsyncIOMotorGridFSBucket(db)
-                    grid_out = await fs.open_download_stream(ObjectId(doc.pdf_file_id))
-                    pdf_content = await grid_out.read()
-
-                    with fitz.open("pdf", pdf_content) as fitz_doc:
-                        doc.total_pages = fitz_doc.page_count
-                        await doc.save()
-                        print(
-                            f"Healed document {doc_id}: Updated total_pages to {doc.total_pages}"
-                        )
+                    async with document_pool.open(doc.pdf_file_id) as fitz_doc:
+                        page_count = await document_pool.run(len, fitz_doc)
+                    await doc.set({PDFDocument.total_pages: page_count})
+                    print(
+                        f"Healed document {doc_id}: Updated total_pages to {doc.total_pages}"
+                    )
                 except Exception as inner_e:
                     print(f"Failed to heal document {doc_id}: {inner_e}")
 
@@ -51,59 +119,162 @@ class DocumentService:
             print(f"Database error fetching document {doc_id}: {e}")
             raise e
 
-    async def get_page_image(self, doc_id: UUID, page_number: int) -> Optional[bytes]:
+    async def get_document_detail(self, doc_id: UUID) -> Optional[DocumentDetail]:
+        """The document with its current ToC and quiz versions joined in."""
+        doc = await self.get_document_by_id(doc_id)
+        if not doc:
+            return None
+        return await self._detail(doc)
+
+    async def _detail(self, doc: PDFDocument) -> DocumentDetail:
+        toc = await document_versions.current_toc(doc)
+        quiz = await document_versions.current_quiz(doc)
+        return DocumentDetail(
+            **doc.model_dump(exclude={"toc_id", "quiz_id"}),
+            toc_model=toc.toc_model if toc else None,
+            toc_version=toc.version if toc else None,
+            quiz=quiz.quiz if quiz else {},
+            quiz_version=quiz.version if quiz else None,
+        )
+
+    async def get_page_preview(
+        self,
+        doc_id: UUID,
+        page_number: int,
+        zoom: float = 2.0,
+        fmt: str = "png",
+        if_none_match: Optional[str] = None,
+    ) -> Optional[PagePreview]:
         try:
             doc_record = await PDFDocument.get(doc_id)
             if not doc_record or not doc_record.pdf_file_id:
                 return None
 
-            client, db = await init_db()
-            fs = AsyncIOMotorGridFSBucket(db)
-
-            grid_out = await fs.open_download_stream(ObjectId(doc_record.pdf_file_id))
-            pdf_content = await grid_out.read()
+            # Pages outside a known page count never need the PDF.
+            if doc_record.total_pages and not 1 <= page_number <= doc_record.total_pages:
+                return None
 
-            doc = fitz.open("pdf", pdf_content)
+            media_type = PREVIEW_MEDIA_TYPES[fmt]
+            etag = preview_etag(doc_record.pdf_file_id, page_number, zoom, fmt)
+            if if_none_match and etag in {
+                t.strip().removeprefix("W/") for t in if_none_match.split(",")
+            }:
+                return PagePreview(content=None, media_type=media_type, etag=etag)
 
-            # Update total_pages if missing during preview
-            if doc_record.total_pages == 0:
-                try:
-                    doc_record.total_pages = len(doc)
-                    await doc_record.save()
-                    print(
-                        f"Healed document {doc_id} in preview: Updated total_pages to {doc_record.total_pages}"
-                    )
-                except Exception as save_err:
-                    print(f"Failed to save healed doc {doc_id} in preview: {save_err}")
-
-            # Use 0-based index internally, assuming API sends 1-based
-            page_idx = page_number - 1
-            if page_idx < 0 or page_idx >= len(doc):
+            rendered = await self._render_pages(doc_record, [page_number], zoom, fmt)
+            if page_number not in rendered:
                 return None
 
-            page = doc.load_page(page_idx)
-            # Render to image (zoom=2 for better quality)
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            return pix.tobytes("png")
+            return PagePreview(content=rendered[page_number], media_type=media_type, etag=etag)
 
         except Exception as e:
             print(f"Error rendering page {page_number} for doc {doc_id}: {e}")
             return None
 
+    async def get_page_range_previews(
+        self, doc_id: UUID, start: int, end: int, zoom: float = 2.0, fmt: str = "png"
+    ) -> Optional[List[RenderedPage]]:
+        """Render pages start..end (1-based, inclusive) within one document open."""
+        doc_record = await PDFDocument.get(doc_id)
+        if not doc_record or not doc_record.pdf_file_id:
+            return None
+
+        if doc_record.total_pages:
+            end = min(end, doc_record.total_pages)
+        if start < 1 or start > end:
+            return None
+
+        page_numbers = list(range(start, end + 1))
+        rendered = await self._render_pages(doc_record, page_numbers, zoom, fmt)
+
+        media_type = PREVIEW_MEDIA_TYPES[fmt]
+        return [
+            RenderedPage(
+                page_number=page_number,
+                content=rendered[page_number],
+                media_type=media_type,
+                etag=preview_etag(doc_record.pdf_file_id, page_number, zoom, fmt),
+            )
+            for page_number in page_numbers
+            if page_number in rendered
+        ]
+
+    async def _render_pages(
+        self, doc_record: PDFDocument, page_numbers: List[int], zoom: float, fmt: str
+    ) -> Dict[int, bytes]:
+        """Serve pages from the preview cache and render the rest in one pass."""
+        doc_key = str(doc_record.id)
+        images: Dict[int, bytes] = {}
+        missing: List[int] = []
+        cached_pages = await asyncio.gather(*(
+            preview_cache.get((doc_key, page_number, zoom, fmt))
+            for page_number in page_numbers
+        ))
+        for page_number, cached in zip(page_numbers, cached_pages):
+            if cached is not None:
+                images[page_number] = cached
+            else:
+                missing.append(page_number)
+
+        if not missing:
+            return images
+
+        page_count, rendered = await page_renderer.render_pages(
+            doc_record.pdf_file_id, missing, zoom, fmt
+        )
+        await asyncio.gather(*(
+            preview_cache.put((doc_key, page_number, zoom, fmt), image_bytes)
+            for page_number, image_bytes in rendered.items()
+        ))
+        images.update(rendered)
+
+        # Update total_pages if missing during preview
+        if doc_record.total_pages == 0:
+            try:
+                await doc_record.set({PDFDocument.total_pages: page_count})
+                print(
+                    f"Healed document {doc_record.id} in preview: Updated total_pages to {doc_record.total_pages}"
+                )
+            except Exception as save_err:
+                print(f"Failed to save healed doc {doc_record.id} in preview: {save_err}")
+
+        return images
+
+    async def backfill_name_keys(self) -> int:
+        """Derive `name_key` for records stored before it existed; safe to rerun."""
+        collection = PDFDocument.get_pymongo_collection()
+        filled = 0
+        async for record in collection.find(
+            {"name_key": {"$exists": False}}, {"name": 1}
+        ):
+            # Folded in Python, as for new records; $toLower only handles ASCII.
+            await collection.update_one(
+                {"_id": record["_id"]}, {"$set": {"name_key": name_key(record["name"])}}
+            )
+            filled += 1
+        return filled
+
     async def update_document(
         self, doc_id: UUID, update_data: DocumentUpdate
-    ) -> Optional[PDFDocument]:
+    ) -> Optional[DocumentDetail]:
         try:
             doc = await PDFDocument.get(doc_id)
             if not doc:
                 return None
 
             updates = update_data.model_dump(exclude_unset=True)
-            for field, value in updates.items():
-                setattr(doc, field, value)
+            toc_model = updates.pop("toc_model", None)
+            # Only the changed fields are written; an edited ToC becomes a new version.
+            fields = {getattr(PDFDocument, name): value for name, value in updates.items()}
+            if "name" in updates:
+                fields[PDFDocument.name_key] = name_key(updates["name"])
+            fields[PDFDocument.updated_at] = datetime.utcnow()
+            await doc.set(fields)
 
-            await doc.save()
-            return doc
+            if toc_model is not None:
+                await document_versions.save_toc(doc, toc_model, source="edited")
+                await text_index.update_sections(doc, toc_model)
+            return await self._detail(doc)
         except Exception as e:
             print(f"Error updating document {doc_id}: {e}")
             raise e
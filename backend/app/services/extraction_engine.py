@@ -0,0 +1,201 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.llm.agent.extraction_toc_agent import ExtractedToC, ToCExtractor, _default_rag
+from app.core.llm.rag_service import LangChainRAGService
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.manual_extractor import ManualToCExtractor
+from app.core.pdf.toc.source import PdfSource, open_pdf
+from app.log_config import configure_logging
+
+# Per-process state, built once by the pool initializer.
+_worker_extractor: Optional[ManualToCExtractor] = None
+_worker_rag: Optional[LangChainRAGService] = None
+_worker_progress = None
+
+# Awaited with (pages scored, pages to score) as a job progresses.
+ExtractionProgress = Callable[[int, int], Awaitable[None]]
+
+# Seconds a finished job waits for progress reports still in transit.
+PROGRESS_FLUSH_TIMEOUT = 1.0
+
+
+class ExtractionQueueFull(RuntimeError):
+    """Raised when the engine already holds as many jobs as it may queue."""
+
+
+def _init_worker(config: ToCConfiguration, progress_queue=None) -> None:
+    """Warm up a worker: keep the configuration and its compiled regexes resident."""
+    global _worker_extractor, _worker_rag, _worker_progress
+    configure_logging()
+    _worker_extractor = ManualToCExtractor(config)
+    _worker_progress = progress_queue
+    try:
+        _worker_rag = _default_rag()
+    except Exception as e:
+        # The LLM client is only needed for ToCs that cannot be parsed locally.
+        print(f"Extraction worker started without LLM client: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _extract_in_worker(
+    source: PdfSource, job_id: Optional[str] = None
+) -> Optional[ExtractedToC]:
+    global _worker_rag
+    extractor = _worker_extractor or ManualToCExtractor()
+    if _worker_rag is None:
+        try:
+            _worker_rag = _default_rag()
+        except Exception as e:
+            # Embedded and confidently parsed ToCs need no LLM.
+            print(f"Extracting without LLM client: {e}")
+    progress = None
+    if job_id is not None and _worker_progress is not None:
+        def progress(scored: int, total: int) -> None:
+            _worker_progress.put((job_id, scored, total))
+    try:
+        with open_pdf(source) as doc:
+            return ToCExtractor(
+                doc, rag=_worker_rag, manual_extractor=extractor, progress=progress
+            ).extract()
+    except Exception as e:
+        print(f"Extraction error: {e}")
+        return None
+    finally:
+        if progress is not None:
+            # Queued behind this job's reports: the engine knows it has them all.
+            _worker_progress.put((job_id, None, None))
+
+
+class ExtractionEngine:
+    """Runs ToC extraction in a pool of worker processes.
+
+    PyMuPDF parsing and regex scoring hold the GIL, so threads give no real
+    parallelism. `capacity` (`max_workers + queue_size`) bounds the extraction
+    backlog; uploads beyond it are rejected with ExtractionQueueFull instead
+    of piling up in the task queue.
+    """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        config: Optional[ToCConfiguration] = None,
+    ):
+        self.max_workers = max_workers or int(
+            os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 1)
+        )
+        self.queue_size = (
+            queue_size
+            if queue_size is not None
+            else int(os.getenv("EXTRACTION_QUEUE_SIZE", self.max_workers * 4))
+        )
+        self.config = config or ToCConfiguration(
+            scoring_workers=int(os.getenv("TOC_SCORING_WORKERS", 1))
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Progress reports from the workers, routed to the job that awaits them.
+        self._progress_queue = None
+        self._progress_reader: Optional[threading.Thread] = None
+        self._listeners: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = {}
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers avoid inheriting the event loop and Mongo client threads.
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.Queue()
+            self._progress_reader = threading.Thread(
+                target=self._read_progress, args=(self._progress_queue,), daemon=True
+            )
+            self._progress_reader.start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.config, self._progress_queue),
+            )
+        return self._executor
+
+    def _read_progress(self, progress_queue) -> None:
+        while (item := progress_queue.get()) is not None:
+            job_id, scored, total = item
+            listener = self._listeners.get(job_id)
+            if listener is not None:
+                loop, updates = listener
+                loop.call_soon_threadsafe(updates.put_nowait, (scored, total))
+
+    async def warm_up(self) -> None:
+        """Start every worker now so the first uploads do not pay for spawning."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _ping) for _ in range(self.max_workers))
+        )
+
+    async def extract(
+        self, source: PdfSource, on_progress: Optional[ExtractionProgress] = None
+    ) -> Optional[ExtractedToC]:
+        """Extract the ToC in a worker process, noting how it was obtained.
+
+        `source` is a file path or the PDF bytes; either is reopened by the worker.
+        `on_progress` is awaited with the pages scored so far; reports that
+        arrive while it runs are collapsed into the latest one.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        if on_progress is None:
+            return await loop.run_in_executor(executor, _extract_in_worker, source)
+
+        job_id = uuid.uuid4().hex
+        updates: asyncio.Queue = asyncio.Queue()
+        self._listeners[job_id] = (loop, updates)
+        reporter = asyncio.create_task(self._report(updates, on_progress))
+        try:
+            result = await loop.run_in_executor(
+                executor, _extract_in_worker, source, job_id
+            )
+            # Reports travel apart from the result; let the last ones arrive.
+            await asyncio.wait({reporter}, timeout=PROGRESS_FLUSH_TIMEOUT)
+            return result
+        finally:
+            del self._listeners[job_id]
+            reporter.cancel()
+
+    @staticmethod
+    async def _report(updates: asyncio.Queue, on_progress: ExtractionProgress) -> None:
+        """Forward reports until the worker marks the end of the job."""
+        while True:
+            latest = None
+            update = await updates.get()
+            # Collapse the backlog into its latest report.
+            while update != (None, None) and not updates.empty():
+                latest, update = update, updates.get_nowait()
+            if update != (None, None):
+                latest = update
+            if latest is not None:
+                try:
+                    await on_progress(*latest)
+                except Exception as e:
+                    print(f"Failed to report extraction progress: {e}")
+            if update == (None, None):
+                return
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            self._progress_queue = None
+            self._progress_reader = None
@@ -1,170 +1,307 @@
-import asyncio
+import hashlib
 import os
-import shutil
 import uuid
-import fitz
 
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
+import fitz
 from fastapi import UploadFile
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
-
-from app.core.llm.agent.extraction_toc_agent import ToCExtractor
+from bson import ObjectId
+
+from app.services.document_pool import document_pool
+from app.services.document_versions import document_versions
+from app.services.extraction_engine import ExtractionEngine, ExtractionQueueFull
+from app.services.task_queue import TaskBroker, create_task_broker
+from app.services.task_worker import TaskFailed, TaskHandler, TaskWorker
+from app.services.toc_cache import ToCCache, toc_cache
 from app.services.quiz_service import QuizService
+from app.services.text_index import text_index
 
-from app.schemas.quiz import QuizConfig
+from app.schemas.quiz import GeneratedQuestion, QuizConfig
+from app.schemas.tasks import TaskKind, TaskRecord
 
 from app.db.models import PDFDocument
-from app.schemas.toc_api import TaskStatus, TableOfContents
-from app.db.database import init_db
+from app.schemas.toc_api import TaskEvent, TaskProgress, TaskStatus
+from app.db.database import get_database
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-class Orchestrator:
-    def __init__(self):
-        self._executor = ThreadPoolExecutor(max_workers=4)
-        self._tasks: Dict[str, TaskStatus] = {}
 
-    async def get_database(self):
-        client, db = await init_db()
-        return db
+class Orchestrator:
+    """Accepts uploads and quiz requests and runs them as brokered tasks.
+
+    The API side stores the upload and enqueues a task; the handlers below
+    run wherever a TaskWorker claims it, in this process or in a separate
+    `python -m app.worker`. Task status is read back from the broker, so
+    any node can answer a status request.
+    """
+    def __init__(
+        self,
+        engine: Optional[ExtractionEngine] = None,
+        cache: Optional[ToCCache] = None,
+        broker: Optional[TaskBroker] = None,
+    ):
+        self._engine = engine or ExtractionEngine()
+        self._cache = cache or toc_cache
+        self._broker = broker or create_task_broker()
+        self._quiz_service: Optional[QuizService] = None
+
+    @property
+    def engine(self) -> ExtractionEngine:
+        return self._engine
+
+    @property
+    def broker(self) -> TaskBroker:
+        return self._broker
+
+    @property
+    def quiz_service(self) -> QuizService:
+        # Built on first use and reused: its agent holds the shared LLM chain.
+        if self._quiz_service is None:
+            self._quiz_service = QuizService()
+        return self._quiz_service
+
+    def handlers(self) -> Dict[TaskKind, TaskHandler]:
+        return {
+            TaskKind.extract_toc: self._process_task,
+            TaskKind.generate_quiz: self._process_quiz_generation,
+        }
+
+    def create_worker(self, kinds: Optional[list] = None) -> TaskWorker:
+        """A worker for `kinds` (default: all) sized from the environment."""
+        handlers = {
+            kind: handler
+            for kind, handler in self.handlers().items()
+            if kinds is None or kind in kinds
+        }
+        return TaskWorker(
+            self._broker,
+            handlers,
+            concurrency={
+                TaskKind.extract_toc: self._engine.max_workers,
+                TaskKind.generate_quiz: int(os.getenv("QUIZ_TASK_CONCURRENCY", 4)),
+            },
+        )
 
     async def process_file_async(
         self, file: UploadFile, name: Optional[str] = None
     ) -> str:
-        task_id = str(uuid.uuid4())
-        temp_filename = f"temp_{task_id}.pdf"
-
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
         if not name:
             raise ValueError("Space name is required")
 
-        self._tasks[task_id] = TaskStatus(task_id=task_id, status="uploading")
-
-        asyncio.create_task(
-            self._process_task(task_id, temp_filename, name, file.filename)
-        )
-        return task_id
+        # Reject before anything is stored when the backlog is already full.
+        pending = await self._broker.count_pending(TaskKind.extract_toc)
+        if pending >= self._engine.capacity:
+            raise ExtractionQueueFull(
+                f"Extraction queue is full ({pending} jobs pending)"
+            )
 
-    async def generate_quiz_async(self, doc_id: str, config: QuizConfig) -> str:
         task_id = str(uuid.uuid4())
-        self._tasks[task_id] = TaskStatus(task_id=task_id, status="processing_llm")
+        file_id, pdf_bytes, content_hash, doc = await self._stream_upload(
+            task_id, file, name
+        )
 
-        asyncio.create_task(self._process_quiz_generation(task_id, doc_id, config))
+        # The freshly uploaded PDF is usually previewed next; keep it open.
+        await document_pool.preload(file_id, pdf_bytes, doc)
+
+        await self._broker.enqueue(TaskRecord(
+            task_id=task_id,
+            kind=TaskKind.extract_toc,
+            payload={
+                "file_id": file_id,
+                "file_name": name,
+                "pdf_name": file.filename,
+                "content_hash": content_hash,
+            },
+        ))
         return task_id
 
-    async def _process_quiz_generation(
-        self, task_id: str, doc_id: str, config: QuizConfig
-    ):
+    async def _stream_upload(
+        self, task_id: str, file: UploadFile, file_name: str
+    ) -> Tuple[str, bytearray, str, fitz.Document]:
+        """Single pass over the upload: tee each chunk into GridFS, a SHA-256
+        digest and an in-memory buffer that PyMuPDF opens directly.
+
+        The buffer is opened before the GridFS file is finalised, so an upload
+        that is not a readable PDF is discarded and raises ValueError.
+        """
+        fs = AsyncIOMotorGridFSBucket(await get_database())
+        file_id = ObjectId()
+        grid_in = fs.open_upload_stream_with_id(
+            file_id, file_name, metadata={"task_id": task_id}
+        )
+
+        digest = hashlib.sha256()
+        buffer = bytearray()
         try:
-            await self.get_database()
-            doc = await PDFDocument.get(uuid.UUID(doc_id))
-            if not doc:
-                self._fail_task(task_id, "Document not found")
-                return
-
-            doc.quiz_conf = config
-            await doc.save()
-
-            # Generate questions with QuizService
-            self._update_status(task_id, "Generating questions with AI...")
-
-            quiz_service = QuizService()
-            db = await self.get_database()
-            result = await quiz_service.generate_quiz_content(doc_id, db)
-
-            if result:
-                self._tasks[
-                    task_id
-                ].result = result.model_dump()  # Store generic result
-                self._tasks[task_id].status = "completed"
-            else:
-                self._fail_task(task_id, "Failed to generate quiz content")
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.extend(chunk)
+                await grid_in.write(chunk)
+        except Exception:
+            await grid_in.abort()
+            raise
 
+        try:
+            doc = await document_pool.run(fitz.open, stream=buffer, filetype="pdf")
         except Exception as e:
-            self._fail_task(task_id, str(e))
+            await grid_in.abort()
+            raise ValueError(f"Uploaded file is not a readable PDF: {e}") from e
+        await grid_in.close()
+
+        return str(file_id), buffer, digest.hexdigest(), doc
+
+    async def generate_quiz_async(
+        self,
+        doc_id: str,
+        config: QuizConfig,
+        use_cache: bool = True,
+        stream: bool = True,
+    ) -> str:
+        record = await self._broker.enqueue(TaskRecord(
+            kind=TaskKind.generate_quiz,
+            status="processing_llm",
+            payload={
+                "doc_id": doc_id,
+                "config": config.model_dump(mode="json"),
+                "use_cache": use_cache,
+                "stream": stream,
+            },
+        ))
+        return record.task_id
+
+    async def _process_quiz_generation(self, record: TaskRecord) -> Dict[str, Any]:
+        task_id = record.task_id
+        doc_id = record.payload["doc_id"]
+
+        doc = await PDFDocument.get(uuid.UUID(doc_id))
+        if not doc:
+            raise TaskFailed("Document not found")
+
+        await doc.set({
+            PDFDocument.quiz_conf: QuizConfig.model_validate(record.payload["config"])
+        })
+
+        # Generate questions with QuizService
+        await self._update_status(record, "processing_llm")
+
+        streamed: List[Dict[str, Any]] = []
+        progress = TaskProgress()
+
+        async def on_batch(done: int, total: int, tokens: int) -> None:
+            nonlocal progress
+            progress = self._progress(
+                done, total, batches_done=done, batches_total=total,
+                tokens=tokens, questions=len(streamed) or None,
+            )
+            await self._broker.update(
+                task_id, record.lease_owner, progress=progress.model_dump(exclude_none=True)
+            )
 
-    async def _process_task(
-        self, task_id: str, temp_path: str, file_name: str, pdf_name: str
-    ):
-        try:
-            self._update_status(task_id, "uploading_to_db")
+        async def on_question(question: GeneratedQuestion) -> None:
+            # Questions so far go out as the partial result of the running task.
+            streamed.append(question.model_dump(mode="json"))
+            progress.questions = len(streamed)
+            await self._broker.update(
+                task_id,
+                record.lease_owner,
+                result={"questions": list(streamed)},
+                progress=progress.model_dump(exclude_none=True),
+            )
 
-            db = await self.get_database()
-            fs = AsyncIOMotorGridFSBucket(db)
+        result = await self.quiz_service.generate_quiz_content(
+            doc_id,
+            await get_database(),
+            use_cache=record.payload.get("use_cache", True),
+            on_progress=on_batch,
+            on_question=on_question if record.payload.get("stream") else None,
+        )
+        if not result:
+            raise TaskFailed("Failed to generate quiz content")
+        return result.model_dump()  # Store generic result
 
-            with open(temp_path, "rb") as f:
-                file_id = await fs.upload_from_stream(
-                    file_name, f, metadata={"task_id": task_id}
-                )
+    async def _process_task(self, record: TaskRecord) -> Dict[str, Any]:
+        task_id = record.task_id
+        payload = record.payload
+        file_id = payload["file_id"]
 
-            with fitz.open(temp_path) as doc_pdf:
-                page_count = doc_pdf.page_count
+        # A retried task reuses the document its earlier attempt created.
+        doc = await PDFDocument.get(uuid.UUID(record.doc_id)) if record.doc_id else None
+        if doc is None:
+            async with document_pool.open(file_id) as doc_pdf:
+                page_count = await document_pool.run(len, doc_pdf)
 
             doc = PDFDocument(
-                name=file_name,
-                pdf_name=pdf_name,
-                pdf_file_id=str(file_id),
-                toc_model=None,
+                name=payload["file_name"],
+                pdf_name=payload["pdf_name"],
+                pdf_file_id=file_id,
                 total_pages=page_count,
                 is_verified=False,
             )
             await doc.insert()
-            if task_id in self._tasks:
-                self._tasks[task_id].doc_id = doc.id
+            await self._broker.update(task_id, record.lease_owner, doc_id=str(doc.id))
 
-            self._update_status(task_id, "extracting")
-
-            loop = asyncio.get_event_loop()
-            toc_result = await loop.run_in_executor(
-                self._executor, self._run_extraction, temp_path
-            )
+        await self._update_status(record, "extracting")
 
-            if toc_result:
-                doc.toc_model = toc_result.model_dump()
-                await doc.save()
-
-                self._complete_task(task_id, toc_result)
-            else:
-                self._fail_task(task_id, "Could not extract Table of Contents")
-
-        except Exception as e:
-            self._fail_task(task_id, str(e))
-
-        finally:
-            self._cleanup_temp_file(temp_path)
-
-    def _update_status(self, task_id: str, status: str):
-        if task_id in self._tasks:
-            self._tasks[task_id].status = status
-
-    def _complete_task(self, task_id: str, result: TableOfContents):
-        if task_id in self._tasks:
-            self._tasks[task_id].result = result
-            self._tasks[task_id].status = "completed"
+        # Same PDF, config and prompt as an earlier upload: reuse its ToC.
+        toc_result = await self._cache.get(payload["content_hash"])
+        if toc_result is None:
+            async def on_pages(scored: int, total: int) -> None:
+                progress = self._progress(
+                    scored, total, pages_scored=scored, pages_total=total
+                )
+                await self._broker.update(
+                    task_id, record.lease_owner, progress=progress.model_dump(exclude_none=True)
+                )
 
-    def _fail_task(self, task_id: str, error: str):
-        if task_id in self._tasks:
-            self._tasks[task_id].status = "failed"
-            self._tasks[task_id].error = error
+            extracted = await self._engine.extract(
+                await self._read_upload(file_id), on_progress=on_pages
+            )
+            toc_result = extracted.toc if extracted is not None else None
+            # A doubtful parse made without an LLM is redone on the next upload.
+            if extracted is not None and extracted.cacheable:
+                await self._cache.put(payload["content_hash"], toc_result)
 
-    def _cleanup_temp_file(self, path: str):
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-            except OSError:
-                pass
+        toc_model = toc_result.model_dump() if toc_result else None
+        if toc_model:
+            await document_versions.save_toc(doc, toc_model, source="extracted")
 
-    def _run_extraction(self, file_path: str) -> Optional[TableOfContents]:
+        # Index page text while the PDF is still open in the pool, so
+        # quizzes never have to parse it again.
         try:
-            doc = fitz.open(file_path)
-            extractor = ToCExtractor(doc)
-            return extractor.extract_toc()
+            await text_index.build(doc, toc_model)
         except Exception as e:
-            print(f"Extraction error: {e}")
+            print(f"Failed to build text index for {doc.id}: {e}")
+
+        if not toc_result:
+            raise TaskFailed("Could not extract Table of Contents")
+        return toc_result.model_dump()
+
+    async def _read_upload(self, file_id: str) -> bytes:
+        # Still in the pool after the upload or the page count above; other
+        # worker nodes download it once.
+        pdf_bytes = document_pool.get_bytes(file_id)
+        if pdf_bytes is not None:
+            return pdf_bytes
+        fs = AsyncIOMotorGridFSBucket(await get_database())
+        grid_out = await fs.open_download_stream(ObjectId(file_id))
+        return await grid_out.read()
+
+    async def _update_status(self, record: TaskRecord, status: str):
+        await self._broker.update(record.task_id, record.lease_owner, status=status)
+
+    @staticmethod
+    def _progress(done: int, total: int, **fields) -> TaskProgress:
+        percent = round(100 * done / total, 1) if total else None
+        return TaskProgress(percent=percent, **fields)
+
+    async def get_status(self, task_id: str) -> Optional[TaskStatus]:
+        record = await self._broker.get(task_id)
+        if record is None:
             return None
+        return TaskEvent.from_record(record)
 
-    def get_status(self, task_id: str) -> Optional[TaskStatus]:
-        return self._tasks.get(task_id)
+    def watch(self, task_id: str, heartbeat: Optional[float] = None):
+        """Async iterator of TaskEvents for `task_id`; see TaskEventBus.subscribe."""
+        return self._broker.events.subscribe(task_id, heartbeat)
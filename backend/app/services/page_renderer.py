@@ -0,0 +1,109 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+
+from app.services.document_pool import document_pool
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; PNG and JPEG fall back to PyMuPDF.
+    Image = None
+
+PREVIEW_MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Named render sizes, expressed as zoom factors over the PDF's 72 dpi.
+PREVIEW_SIZES = {"thumbnail": 0.3, "small": 1.0, "medium": 1.5, "large": 2.0}
+
+LOSSY_QUALITY = 80
+
+
+def _encode_raw(
+    samples: bytes, width: int, height: int, alpha: bool, fmt: str
+) -> bytes:
+    """Encode raw RGB(A) samples with Pillow. Runs in the encoder thread pool."""
+    image = Image.frombytes("RGBA" if alpha else "RGB", (width, height), samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=LOSSY_QUALITY)
+    return buffer.getvalue()
+
+
+def _rasterise(doc: fitz.Document, page_index: int, matrix: fitz.Matrix, fmt: str):
+    """Render one page. Runs on the document's thread in the document pool.
+
+    PNG (and JPEG without Pillow) is encoded by PyMuPDF and returned as
+    bytes; otherwise the raw samples are returned for `_encode_raw`.
+    """
+    pix = doc.load_page(page_index).get_pixmap(matrix=matrix)
+    if fmt == "png" or Image is None:
+        return pix.tobytes(fmt)
+    return pix.samples, pix.width, pix.height, bool(pix.alpha)
+
+
+class PageRenderer:
+    """Render pages of a stored PDF to images.
+
+    All pages of a request are rasterised within one open of the pooled
+    document. PyMuPDF documents are not thread-safe, so rasterising runs on
+    the document's own thread in the document pool. JPEG and WebP encoding
+    works on plain sample bytes and runs in a thread pool; Pillow releases
+    the GIL while it compresses.
+    """
+    def __init__(self, encode_workers: Optional[int] = None):
+        self.encode_workers = encode_workers or int(os.getenv("PREVIEW_ENCODE_WORKERS", 4))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.encode_workers, thread_name_prefix="preview-encode"
+        )
+
+    def supports(self, fmt: str) -> bool:
+        return fmt in ("png", "jpeg") or Image is not None
+
+    async def render_pages(
+        self, pdf_file_id: str, page_numbers: List[int], zoom: float, fmt: str
+    ) -> Tuple[int, Dict[int, bytes]]:
+        """Render 1-based `page_numbers`.
+
+        Returns the document's page count and the encoded image of every
+        requested page that exists.
+        """
+        if not self.supports(fmt):
+            raise ValueError(f"Rendering to {fmt} requires Pillow")
+
+        loop = asyncio.get_running_loop()
+        matrix = fitz.Matrix(zoom, zoom)
+        images: Dict[int, bytes] = {}
+        pending: Dict[int, asyncio.Future] = {}
+
+        async with document_pool.open(pdf_file_id) as doc:
+            page_count = await document_pool.run(len, doc)
+            for page_number in page_numbers:
+                if not 1 <= page_number <= page_count:
+                    continue
+
+                rendered = await document_pool.run(
+                    _rasterise, doc, page_number - 1, matrix, fmt
+                )
+                if isinstance(rendered, bytes):
+                    images[page_number] = rendered
+                    continue
+
+                pending[page_number] = loop.run_in_executor(
+                    self._executor, _encode_raw, *rendered, fmt
+                )
+                # Bound how many raw pixmaps wait in memory for an encoder.
+                if len(pending) >= self.encode_workers * 2:
+                    await self._drain(pending, images)
+
+        await self._drain(pending, images)
+        return page_count, images
+
+    async def _drain(self, pending: Dict[int, asyncio.Future], images: Dict[int, bytes]) -> None:
+        results = await asyncio.gather(*pending.values())
+        images.update(zip(pending.keys(), results))
+        pending.clear()
+
+
+page_renderer = PageRenderer()
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# (doc_id, page_number, zoom, format)
+PreviewKey = Tuple[str, int, float, str]
+
+# Bump when rendering changes so browsers and disk entries are invalidated.
+RENDER_VERSION = "1"
+
+# Browsers reuse a preview this long, then revalidate it with its ETag.
+PREVIEW_MAX_AGE = int(os.getenv("PREVIEW_MAX_AGE", 3600))
+
+
+def preview_etag(pdf_file_id: str, page_number: int, zoom: float, fmt: str) -> str:
+    """Strong ETag for a rendered page.
+
+    The stored PDF behind a `pdf_file_id` never changes and rendering is
+    deterministic, so the ETag can be derived without rendering anything.
+    """
+    raw = f"{RENDER_VERSION}:{pdf_file_id}:{page_number}:{zoom:g}:{fmt}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+class PreviewCache:
+    """Byte-budgeted LRU of rendered pages with an optional disk tier.
+
+    The memory tier evicts least recently used images once `max_bytes` is
+    exceeded. When `disk_dir` is set, every rendered page is also written
+    there and memory misses are served from disk before re-rendering. The
+    disk tier is an LRU of its own, bounded by `disk_max_bytes`: files are
+    ordered by modification time, which a disk hit refreshes, so recency
+    survives restarts and is shared by processes using the same directory.
+    Disk reads and writes run in worker threads.
+    """
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("PREVIEW_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        )
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("PREVIEW_CACHE_DIR")
+        self.disk_max_bytes = (
+            disk_max_bytes
+            if disk_max_bytes is not None
+            else int(os.getenv("PREVIEW_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+        )
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self._entries: "OrderedDict[PreviewKey, bytes]" = OrderedDict()
+        self.resident_bytes = 0
+        # File name -> size, least recently used first; scanned on first use.
+        self._disk_entries: "Optional[OrderedDict[str, int]]" = None
+        self._disk_lock = threading.Lock()
+        self.disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: PreviewKey) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        if self.disk_dir:
+            data = await asyncio.to_thread(self._read_disk, key)
+        if data is not None:
+            self.disk_hits += 1
+            self._remember(key, data)
+            return data
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: PreviewKey, data: bytes) -> None:
+        self._remember(key, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, data)
+
+    def _remember(self, key: PreviewKey, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.resident_bytes -= len(previous)
+
+        self._entries[key] = data
+        self.resident_bytes += len(data)
+
+        while self.resident_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.resident_bytes -= len(evicted)
+
+    @staticmethod
+    def _disk_name(key: PreviewKey) -> str:
+        doc_id, page_number, zoom, fmt = key
+        return f"{doc_id}_{page_number}_{zoom:g}_v{RENDER_VERSION}.{fmt}"
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        # Caller holds _disk_lock.
+        if self._disk_entries is None:
+            files = []
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name, stat.st_size))
+            files.sort()
+            self._disk_entries = OrderedDict((name, size) for _, name, size in files)
+            self.disk_bytes = sum(size for _, _, size in files)
+        return self._disk_entries
+
+    def _read_disk(self, key: PreviewKey) -> Optional[bytes]:
+        name = self._disk_name(key)
+        path = os.path.join(self.disk_dir, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        with self._disk_lock:
+            index = self._disk_index()
+            if name in index:
+                index.move_to_end(name)
+            else:
+                # Written by another process sharing the directory.
+                index[name] = len(data)
+                self.disk_bytes += len(data)
+        return data
+
+    def _write_disk(self, key: PreviewKey, data: bytes) -> None:
+        if len(data) > self.disk_max_bytes:
+            return
+        name = self._disk_name(key)
+        path = os.path.join(self.disk_dir, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write preview cache file {path}: {e}")
+            return
+
+        with self._disk_lock:
+            index = self._disk_index()
+            self.disk_bytes += len(data) - index.pop(name, 0)
+            index[name] = len(data)
+            while self.disk_bytes > self.disk_max_bytes:
+                evicted, size = index.popitem(last=False)
+                self.disk_bytes -= size
+                try:
+                    os.remove(os.path.join(self.disk_dir, evicted))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Failed to evict preview cache file {evicted}: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_bytes": self.disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes,
+        }
+
+
+preview_cache = PreviewCache()
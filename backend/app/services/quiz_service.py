@@ -1,14 +1,19 @@
-import os
-import uuid
-import fitz
 import logging
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from app.db.models import PDFDocument
-from app.schemas.quiz import QuizOutput, QuizConfigScope
-from app.core.llm.agent.generation_quiz_agent import GenerationQuizAgent
+from app.core.llm.chunking import TextChunk
+from app.core.pdf.toc.section_tree import SectionTree
+from app.db.models import PDFDocument, QuizVersion
+from app.schemas.quiz import GeneratedQuestion, QuizOutput, QuizConfigScope
+from app.core.llm.agent.generation_quiz_agent import (
+    GenerationQuizAgent,
+    QuestionCallback,
+    QuizProgress,
+)
+from app.services.document_pool import document_pool
+from app.services.document_versions import document_versions
+from app.services.text_index import text_index
 
 logger = logging.getLogger(__name__)
 
@@ -17,120 +22,150 @@ class QuizService:
     def __init__(self):
         self.agent = GenerationQuizAgent()
 
-    async def generate_quiz_content(self, doc_id: str, db) -> Optional[QuizOutput]:
+    async def generate_quiz_content(
+        self,
+        doc_id: str,
+        db,
+        use_cache: bool = True,
+        on_progress: Optional[QuizProgress] = None,
+        on_question: Optional[QuestionCallback] = None,
+    ) -> Optional[QuizOutput]:
         """
         Main entry point to generate quiz content for a document.
+        With `use_cache=False` every question is freshly generated;
+        `on_progress` is passed on to the agent. With `on_question` the
+        quiz is streamed: each question is appended to a new quiz version
+        and then handed to `on_question` as soon as it is generated. Every
+        run adds a version; earlier quizzes stay as history.
+
+        Returns None when the document has nothing to quiz on. Failures
+        reading the document or calling the model are raised, so the task
+        running this can be retried.
         """
+        # 1. Fetch Document
+        doc = await PDFDocument.get(UUID(doc_id))
+        if not doc or not doc.quiz_conf:
+            logger.error(f"Document {doc_id} not found or missing quiz config.")
+            return None
+
+        # 2. Extract Context
+        context = await self._extract_content(doc, db)
+        if not context:
+            logger.warning(f"No content extracted for document {doc_id}")
+            return None
+
+        # 3. Generate Quiz via Agent
+        version: Optional[QuizVersion] = None
+
+        async def store_question(question: GeneratedQuestion) -> None:
+            nonlocal version
+            # The previous quiz stays current until this one is finished.
+            entry = question.model_dump(mode="json")
+            if version is None:
+                version = await document_versions.save_quiz(
+                    doc, {"questions": [entry]}, complete=False
+                )
+            else:
+                await document_versions.append_question(version, entry)
+            await on_question(question)
+
+        quiz_output = None
         try:
-            # 1. Fetch Document
-            doc = await PDFDocument.get(UUID(doc_id))
-            if not doc or not doc.quiz_conf:
-                logger.error(f"Document {doc_id} not found or missing quiz config.")
-                return None
-
-            # 2. Extract Context
-            context = await self._extract_content(doc, db)
-            if not context:
-                logger.warning(f"No content extracted for document {doc_id}")
-                return None
-
-            # 3. Generate Quiz via Agent
             quiz_output = await self.agent.generate_quiz(
-                context=context, questions_config=doc.quiz_conf.questions
+                context=context,
+                questions_config=doc.quiz_conf.questions,
+                use_cache=use_cache,
+                on_progress=on_progress,
+                on_question=store_question if on_question is not None else None,
             )
+        finally:
+            if version is not None and not quiz_output:
+                await document_versions.discard_quiz(version)
 
-            if quiz_output:
-                # 4. Save result
-                # We store the raw dict/json in the 'quiz' field (dict) of PDFDocument
-                doc.quiz = quiz_output.model_dump()
-                await doc.save()
-                return quiz_output
-
-            return None
+        if quiz_output:
+            # 4. Save result as the document's current quiz version
+            if version is None:
+                await document_versions.save_quiz(doc, quiz_output.model_dump())
+            else:
+                await document_versions.finish_quiz(doc, version, quiz_output.model_dump())
+            return quiz_output
 
-        except Exception as e:
-            logger.error(f"Error in generate_quiz_content: {e}")
-            return None
+        return None
 
-    async def _extract_content(self, doc: PDFDocument, db) -> str:
+    async def _extract_content(self, doc: PDFDocument, db) -> List[TextChunk]:
         """
-        Extracts text content from PDF based on the quiz configuration scope.
+        Extracts text content based on the quiz configuration scope.
+        Text comes from the document's text index; the PDF is only opened
+        when no index can be built. Pages are grouped by the ToC section
+        they belong to, so the agent can chunk along section boundaries.
         """
         if not doc.pdf_file_id:
-            return ""
-
-        fs = AsyncIOMotorGridFSBucket(db)
-        temp_filename = f"temp_quiz_extract_{uuid.uuid4()}.pdf"
-
-        try:
-            from bson import ObjectId
-
-            # Download file
-            with open(temp_filename, "wb") as f:
-                await fs.download_to_stream(ObjectId(doc.pdf_file_id), f)
-
-            text_content = []
-            with fitz.open(temp_filename) as pdf:
-                target_pages = self._resolve_target_pages(doc, pdf)
-
-                for p_idx in target_pages:
-                    if 0 <= p_idx < len(pdf):
-                        page = pdf.load_page(p_idx)
-                        text_content.append(page.get_text())
-
-            return "\n".join(text_content)
-
-        except Exception as e:
-            logger.error(f"Error extraction extraction: {e}")
-            return ""
-        finally:
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
-
-    def _resolve_target_pages(self, doc: PDFDocument, pdf: fitz.Document) -> range:
+            return []
+
+        index = await text_index.get_or_build(doc)
+        if index is not None:
+            tree = SectionTree(index.sections, index.page_count)
+            target_pages = self._resolve_target_pages(doc, index.page_count, tree)
+            texts = text_index.page_texts(index, target_pages)
+        else:
+            toc_model = await document_versions.current_toc_model(doc)
+            async with document_pool.open(doc.pdf_file_id) as pdf:
+                page_count = await document_pool.run(len, pdf)
+                tree = SectionTree.from_toc_model(toc_model, page_count)
+                target_pages = self._resolve_target_pages(doc, page_count, tree)
+                texts = await document_pool.run(
+                    lambda: [pdf.load_page(p_idx).get_text() for p_idx in target_pages]
+                )
+
+        return self._group_by_section(tree, target_pages, texts)
+
+    @staticmethod
+    def _group_by_section(
+        tree: SectionTree, target_pages: List[int], texts: List[str]
+    ) -> List[TextChunk]:
+        groups: List[Tuple[Optional[str], List[str]]] = []
+        for p_idx, text in zip(target_pages, texts):
+            section = tree.section_at(p_idx + 1)
+            title = section.title if section is not None else None
+            if not groups or groups[-1][0] != title:
+                groups.append((title, []))
+            groups[-1][1].append(text)
+
+        return [TextChunk(text="\n".join(texts), title=title) for title, texts in groups]
+
+    def _resolve_target_pages(
+        self, doc: PDFDocument, total_pages: int, tree: SectionTree
+    ) -> List[int]:
         """
         Determines which pages to extract based on QuizConfig.
-        Returns a range or list of page indices (0-indexed).
+        Returns a list of page indices (0-indexed).
         """
-        scope = doc.quiz_conf.scope
-        total_pages = len(pdf)
+        conf = doc.quiz_conf
+        scope = conf.scope
 
         if scope == QuizConfigScope.document:
-            return range(total_pages)
+            return list(range(total_pages))
 
-        elif scope == QuizConfigScope.page and doc.quiz_conf.singlePage:
-            p = doc.quiz_conf.singlePage - 1
+        elif scope == QuizConfigScope.page and conf.singlePage:
+            p = conf.singlePage - 1
             if 0 <= p < total_pages:
-                return range(p, p + 1)
+                return [p]
 
-        elif scope == QuizConfigScope.range and doc.quiz_conf.pageRange:
-            start = doc.quiz_conf.pageRange["start"] - 1
-            end = doc.quiz_conf.pageRange["end"] - 1
+        elif scope == QuizConfigScope.range and conf.pageRange:
+            start = conf.pageRange["start"] - 1
+            end = conf.pageRange["end"] - 1
             start = max(0, start)
             end = min(total_pages - 1, end)
             if start <= end:
-                return range(start, end + 1)
-
-        elif scope == QuizConfigScope.chapter and doc.quiz_conf.selectedChapter:
-            if doc.toc_model and "sections" in doc.toc_model:
-                sections = doc.toc_model["sections"]
-                idx = -1
-                for i, s in enumerate(sections):
-                    if s["title"] == doc.quiz_conf.selectedChapter:
-                        idx = i
-                        break
-
-                if idx != -1:
-                    start_page = sections[idx]["start_page"] - 1
-                    if idx + 1 < len(sections):
-                        end_page = sections[idx + 1]["start_page"] - 2
-                    else:
-                        end_page = total_pages - 1
-
-                    start_page = max(0, start_page)
-                    end_page = min(total_pages - 1, end_page)
-
-                    if start_page <= end_page:
-                        return range(start_page, end_page + 1)
-
-        return range(0)  # Default empty
+                return list(range(start, end + 1))
+
+        elif scope == QuizConfigScope.chapter and (conf.selectedChapters or conf.selectedChapter):
+            # Each chapter covers its subsections; overlapping picks are merged.
+            chapters = conf.selectedChapters or [conf.selectedChapter]
+            return [
+                p_idx
+                for start, end in tree.select(chapters)
+                for p_idx in range(start - 1, min(end, total_pages))
+            ]
+
+        return []  # Default empty
@@ -0,0 +1,118 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.schemas.tasks import TaskRecord, TaskState
+from app.schemas.toc_api import TaskEvent
+
+TaskLoader = Callable[[str], Awaitable[Optional[TaskRecord]]]
+
+
+class TaskEventBus:
+    """Fans task changes out to every subscriber in this process.
+
+    The broker publishes each change it makes, so subscribers see tasks run
+    in this process immediately. Tasks run by other workers are picked up
+    by one poller per watched task, which re-reads the record every
+    `poll_interval` seconds no matter how many clients follow it.
+    """
+    def __init__(
+        self,
+        loader: TaskLoader,
+        poll_interval: Optional[float] = None,
+        queue_size: int = 64,
+    ):
+        self._loader = loader
+        self.poll_interval = poll_interval or float(os.getenv("TASK_EVENTS_POLL_INTERVAL", 1))
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._last_seen: Dict[str, datetime] = {}
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return task_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, record: TaskRecord) -> None:
+        queues = self._subscribers.get(record.task_id)
+        if not queues:
+            return
+        self._seen(record)
+        event = TaskEvent.from_record(record)
+        for queue in queues:
+            if queue.full():
+                # A slow client only needs the latest state; drop its oldest event.
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def subscribe(
+        self, task_id: str, heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[TaskEvent]]:
+        """Yield the task's current state, then every change until it finishes.
+
+        With `heartbeat`, None is yielded after that many idle seconds so
+        the caller can keep its connection alive. Nothing is yielded for an
+        unknown task.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        if task_id not in self._pollers:
+            self._pollers[task_id] = asyncio.create_task(self._poll(task_id))
+        try:
+            record = await self._loader(task_id)
+            if record is None:
+                return
+            self._seen(record)
+            last = record.updated_at
+            yield TaskEvent.from_record(record)
+            if record.state.is_final:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event.updated_at < last:
+                    continue
+                last = event.updated_at
+                yield event
+                if TaskState(event.state).is_final:
+                    return
+        finally:
+            self._unsubscribe(task_id, queue)
+
+    def _seen(self, record: TaskRecord) -> None:
+        last = self._last_seen.get(record.task_id)
+        if last is None or record.updated_at > last:
+            self._last_seen[record.task_id] = record.updated_at
+
+    def _unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[task_id]
+            self._last_seen.pop(task_id, None)
+            poller = self._pollers.pop(task_id, None)
+            if poller is not None:
+                poller.cancel()
+
+    async def _poll(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                record = await self._loader(task_id)
+            except Exception as e:
+                print(f"Failed to poll task {task_id}: {e}")
+                continue
+            if record is None:
+                continue
+            last = self._last_seen.get(task_id)
+            if last is None or record.updated_at > last:
+                self.publish(record)
@@ -0,0 +1,363 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from app.db.database import get_database
+from app.schemas.tasks import TaskKind, TaskRecord, TaskState
+from app.services.task_events import TaskEventBus
+
+# Retries wait this long, doubling per attempt up to MAX_RETRY_DELAY.
+RETRY_DELAY = float(os.getenv("TASK_RETRY_DELAY", 5))
+MAX_RETRY_DELAY = 300.0
+# Completed and failed tasks are kept this long for status lookups.
+FINISHED_TASK_TTL = int(os.getenv("TASK_FINISHED_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** max(0, attempts - 1)))
+
+
+class TaskBroker(ABC):
+    """Stores tasks and hands them out to workers under time-limited leases.
+
+    A claimed task is `running` until its worker completes or fails it. If the
+    worker dies, the lease runs out and the task is claimed again. Failed
+    attempts are retried with exponential backoff until `max_attempts`.
+    Writes given a `worker_id` only apply while that worker holds the lease,
+    so a worker that lost its task cannot overwrite the new holder's state.
+    Every change made through the broker is published on `events`.
+    """
+    def __init__(self) -> None:
+        self._wakeup: Optional[asyncio.Event] = None
+        self.events = TaskEventBus(self.get)
+
+    @abstractmethod
+    async def enqueue(self, record: TaskRecord) -> TaskRecord:
+        ...
+
+    @abstractmethod
+    async def get(self, task_id: str) -> Optional[TaskRecord]:
+        ...
+
+    @abstractmethod
+    async def claim(
+        self, kinds: Sequence[TaskKind], worker_id: str, lease_seconds: float
+    ) -> Optional[TaskRecord]:
+        """Lease the most urgent runnable task of `kinds`, if there is one."""
+
+    @abstractmethod
+    async def extend_lease(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Push the lease out; False when the task is no longer held by `worker_id`."""
+
+    @abstractmethod
+    async def update(
+        self, task_id: str, worker_id: Optional[str] = None, **fields: Any
+    ) -> bool:
+        """Set progress fields (`status`, `doc_id`, ...) of a task.
+
+        With `worker_id`, only while that worker holds the lease. Returns
+        False when nothing was written.
+        """
+
+    async def complete(
+        self, task_id: str, result: Optional[Dict[str, Any]], worker_id: Optional[str] = None
+    ) -> bool:
+        return await self.update(
+            task_id, worker_id, state=TaskState.completed, status="completed", result=result,
+            lease_owner=None, lease_expires_at=None, finished_at=datetime.utcnow(),
+        )
+
+    async def fail(
+        self, task_id: str, error: str, retry: bool = True, worker_id: Optional[str] = None
+    ) -> bool:
+        """Record a failed attempt; requeue it unless attempts are exhausted."""
+        record = await self.get(task_id)
+        if record is None:
+            return False
+        if retry and record.attempts < record.max_attempts:
+            return await self.update(
+                task_id, worker_id, state=TaskState.queued, status="queued", error=error,
+                lease_owner=None, lease_expires_at=None,
+                available_at=datetime.utcnow() + retry_delay(record.attempts),
+            )
+        return await self.update(
+            task_id, worker_id, state=TaskState.failed, status="failed", error=error,
+            lease_owner=None, lease_expires_at=None, finished_at=datetime.utcnow(),
+        )
+
+    @abstractmethod
+    async def count_pending(self, kind: TaskKind) -> int:
+        """Tasks of `kind` that are queued or running."""
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep until a task is enqueued in this process or `timeout` passes."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+
+def _claimable(record: TaskRecord, kinds: Sequence[TaskKind], now: datetime) -> bool:
+    if record.kind not in kinds:
+        return False
+    if record.state == TaskState.queued:
+        return record.available_at <= now
+    return (
+        record.state == TaskState.running
+        and record.lease_expires_at is not None
+        and record.lease_expires_at < now
+    )
+
+
+class InMemoryTaskBroker(TaskBroker):
+    """Process-local broker; tasks and their status live only as long as the process."""
+    def __init__(self) -> None:
+        super().__init__()
+        self._records: Dict[str, TaskRecord] = {}
+
+    async def enqueue(self, record: TaskRecord) -> TaskRecord:
+        self._records[record.task_id] = record
+        self._notify()
+        return record
+
+    async def get(self, task_id: str) -> Optional[TaskRecord]:
+        record = self._records.get(task_id)
+        return record.model_copy() if record is not None else None
+
+    async def claim(
+        self, kinds: Sequence[TaskKind], worker_id: str, lease_seconds: float
+    ) -> Optional[TaskRecord]:
+        now = datetime.utcnow()
+        candidates = [r for r in self._records.values() if _claimable(r, kinds, now)]
+        if not candidates:
+            return None
+        record = min(candidates, key=lambda r: (-r.priority, r.created_at))
+        record.state = TaskState.running
+        record.lease_owner = worker_id
+        record.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        record.attempts += 1
+        record.updated_at = now
+        self.events.publish(record.model_copy())
+        return record.model_copy()
+
+    async def extend_lease(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        record = self._records.get(task_id)
+        if record is None or record.lease_owner != worker_id:
+            return False
+        record.lease_expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        return True
+
+    async def update(
+        self, task_id: str, worker_id: Optional[str] = None, **fields: Any
+    ) -> bool:
+        record = self._records.get(task_id)
+        if record is None or (worker_id is not None and record.lease_owner != worker_id):
+            return False
+        for name, value in fields.items():
+            setattr(record, name, value)
+        record.updated_at = datetime.utcnow()
+        self.events.publish(record.model_copy())
+        if fields.get("state") == TaskState.queued:
+            self._notify()
+        return True
+
+    async def count_pending(self, kind: TaskKind) -> int:
+        return sum(
+            r.kind == kind and r.state in (TaskState.queued, TaskState.running)
+            for r in self._records.values()
+        )
+
+
+class MongoTaskBroker(TaskBroker):
+    """Durable broker on a Mongo collection, shared by every API and worker node.
+
+    Claims are a single `find_one_and_update`, so concurrent workers never
+    receive the same task.
+    """
+    def __init__(self, collection_name: str = "tasks") -> None:
+        super().__init__()
+        self.collection_name = collection_name
+        self._collection = None
+
+    async def _get_collection(self):
+        if self._collection is None:
+            collection = (await get_database())[self.collection_name]
+            await collection.create_index(
+                [
+                    ("state", ASCENDING),
+                    ("kind", ASCENDING),
+                    ("priority", DESCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="claim_order",
+            )
+            # Unfinished tasks have no `finished_at` date and never expire.
+            await collection.create_index(
+                "finished_at", name="finished_ttl", expireAfterSeconds=FINISHED_TASK_TTL
+            )
+            self._collection = collection
+        return self._collection
+
+    @staticmethod
+    def _to_document(record: TaskRecord) -> Dict[str, Any]:
+        document = record.model_dump()
+        document["_id"] = document.pop("task_id")
+        return document
+
+    @staticmethod
+    def _from_document(document: Optional[Dict[str, Any]]) -> Optional[TaskRecord]:
+        if document is None:
+            return None
+        document["task_id"] = document.pop("_id")
+        return TaskRecord.model_validate(document)
+
+    async def enqueue(self, record: TaskRecord) -> TaskRecord:
+        collection = await self._get_collection()
+        await collection.insert_one(self._to_document(record))
+        self._notify()
+        return record
+
+    async def get(self, task_id: str) -> Optional[TaskRecord]:
+        collection = await self._get_collection()
+        return self._from_document(await collection.find_one({"_id": task_id}))
+
+    async def claim(
+        self, kinds: Sequence[TaskKind], worker_id: str, lease_seconds: float
+    ) -> Optional[TaskRecord]:
+        collection = await self._get_collection()
+        now = datetime.utcnow()
+        document = await collection.find_one_and_update(
+            {
+                "kind": {"$in": [kind.value for kind in kinds]},
+                "$or": [
+                    {"state": TaskState.queued.value, "available_at": {"$lte": now}},
+                    {"state": TaskState.running.value, "lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "state": TaskState.running.value,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", DESCENDING), ("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        record = self._from_document(document)
+        if record is not None:
+            self.events.publish(record)
+        return record
+
+    async def extend_lease(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        collection = await self._get_collection()
+        result = await collection.update_one(
+            {"_id": task_id, "lease_owner": worker_id},
+            {"$set": {
+                "lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)
+            }},
+        )
+        return result.matched_count == 1
+
+    async def update(
+        self, task_id: str, worker_id: Optional[str] = None, **fields: Any
+    ) -> bool:
+        collection = await self._get_collection()
+        query: Dict[str, Any] = {"_id": task_id}
+        if worker_id is not None:
+            query["lease_owner"] = worker_id
+        values = {
+            name: value.value if isinstance(value, TaskState) else value
+            for name, value in fields.items()
+        }
+        values["updated_at"] = datetime.utcnow()
+        if self.events.has_subscribers(task_id):
+            # Someone is watching: read the result back in the same round trip.
+            document = await collection.find_one_and_update(
+                query, {"$set": values}, return_document=ReturnDocument.AFTER
+            )
+            if document is not None:
+                self.events.publish(self._from_document(document))
+            written = document is not None
+        else:
+            result = await collection.update_one(query, {"$set": values})
+            written = result.matched_count == 1
+        if written and fields.get("state") == TaskState.queued:
+            self._notify()
+        return written
+
+    async def fail(
+        self, task_id: str, error: str, retry: bool = True, worker_id: Optional[str] = None
+    ) -> bool:
+        """Requeue or fail the task in one write, decided on the stored attempt count."""
+        collection = await self._get_collection()
+        query: Dict[str, Any] = {"_id": task_id}
+        if worker_id is not None:
+            query["lease_owner"] = worker_id
+        now = datetime.utcnow()
+        retryable = {"$lt": ["$attempts", "$max_attempts"]} if retry else False
+        # retry_delay() on the stored attempt count, in milliseconds.
+        delay_ms = {"$min": [
+            MAX_RETRY_DELAY * 1000,
+            {"$multiply": [
+                RETRY_DELAY * 1000,
+                {"$pow": [2, {"$max": [0, {"$subtract": ["$attempts", 1]}]}]},
+            ]},
+        ]}
+        document = await collection.find_one_and_update(
+            query,
+            [{"$set": {
+                "state": {"$cond": [
+                    retryable, TaskState.queued.value, TaskState.failed.value
+                ]},
+                "status": {"$cond": [
+                    retryable, TaskState.queued.value, TaskState.failed.value
+                ]},
+                "error": {"$literal": error},
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "available_at": {"$cond": [
+                    retryable, {"$add": [now, delay_ms]}, "$available_at"
+                ]},
+                "finished_at": {"$cond": [retryable, None, now]},
+                "updated_at": now,
+            }}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if document is None:
+            return False
+        record = self._from_document(document)
+        self.events.publish(record)
+        if record.state == TaskState.queued:
+            self._notify()
+        return True
+
+    async def count_pending(self, kind: TaskKind) -> int:
+        collection = await self._get_collection()
+        return await collection.count_documents({
+            "kind": kind.value,
+            "state": {"$in": [TaskState.queued.value, TaskState.running.value]},
+        })
+
+
+def create_task_broker(name: Optional[str] = None) -> TaskBroker:
+    """Broker selected by `TASK_BROKER`: "mongo" (default) or "memory"."""
+    name = name or os.getenv("TASK_BROKER", "mongo")
+    if name == "memory":
+        return InMemoryTaskBroker()
+    if name == "mongo":
+        return MongoTaskBroker()
+    raise ValueError(f"Unknown task broker: {name}")
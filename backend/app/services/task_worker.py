@@ -0,0 +1,125 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.schemas.tasks import TaskKind, TaskRecord
+from app.services.task_queue import TaskBroker
+
+TaskHandler = Callable[[TaskRecord], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class TaskFailed(Exception):
+    """Raised by a handler for failures that retrying cannot fix."""
+
+
+class TaskWorker:
+    """Claims tasks from a broker and runs their handlers.
+
+    Each task kind has its own concurrency limit, so extraction and quiz
+    generation scale independently. While a handler runs, its lease is
+    renewed every third of `lease_seconds`. A handler returns the task result; raising
+    TaskFailed fails the task for good, any other exception schedules a retry.
+    """
+    def __init__(
+        self,
+        broker: TaskBroker,
+        handlers: Dict[TaskKind, TaskHandler],
+        concurrency: Optional[Dict[TaskKind, int]] = None,
+        lease_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.broker = broker
+        self.handlers = handlers
+        self.concurrency = {kind: (concurrency or {}).get(kind, 1) for kind in handlers}
+        self.lease_seconds = lease_seconds or float(os.getenv("TASK_LEASE_SECONDS", 60))
+        self.poll_interval = poll_interval or float(os.getenv("TASK_POLL_INTERVAL", 1))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._loops: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start one claim loop per task kind on the running event loop."""
+        self._stopping = False
+        self._loops = [
+            asyncio.create_task(self._claim_loop(kind)) for kind in self.handlers
+        ]
+
+    async def stop(self) -> None:
+        """Stop claiming and wait for tasks already running to finish."""
+        self._stopping = True
+        for loop_task in self._loops:
+            loop_task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def run_forever(self) -> None:
+        self.start()
+        try:
+            await asyncio.gather(*self._loops)
+        except asyncio.CancelledError:
+            pass
+
+    async def _claim_loop(self, kind: TaskKind) -> None:
+        slots = asyncio.Semaphore(self.concurrency[kind])
+        while not self._stopping:
+            await slots.acquire()
+            try:
+                record = await self.broker.claim([kind], self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Task claim failed for {kind.value}: {e}")
+                record = None
+
+            if record is None:
+                slots.release()
+                await self.broker.wait(self.poll_interval)
+                continue
+
+            task = asyncio.create_task(self._execute(record, slots))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, record: TaskRecord, slots: asyncio.Semaphore) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(record.task_id))
+        try:
+            if record.attempts > record.max_attempts:
+                # Reclaimed after its worker died once too often.
+                await self._finish(self.broker.fail(
+                    record.task_id, f"Abandoned after {record.max_attempts} attempts",
+                    retry=False, worker_id=self.worker_id,
+                ), record)
+                return
+            result = await self.handlers[record.kind](record)
+            await self._finish(
+                self.broker.complete(record.task_id, result, worker_id=self.worker_id), record
+            )
+        except TaskFailed as e:
+            await self._finish(self.broker.fail(
+                record.task_id, str(e), retry=False, worker_id=self.worker_id
+            ), record)
+        except Exception as e:
+            print(f"Task {record.task_id} ({record.kind.value}) attempt {record.attempts} failed: {e}")
+            await self._finish(self.broker.fail(
+                record.task_id, str(e), retry=True, worker_id=self.worker_id
+            ), record)
+        finally:
+            heartbeat.cancel()
+            slots.release()
+
+    @staticmethod
+    async def _finish(write: Awaitable[bool], record: TaskRecord) -> None:
+        if not await write:
+            # Another worker reclaimed the task after our lease ran out; its outcome wins.
+            print(f"Lost the lease on task {record.task_id}; dropping attempt {record.attempts}")
+
+    async def _heartbeat(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.broker.extend_lease(task_id, self.worker_id, self.lease_seconds):
+                    print(f"Lost the lease on task {task_id}")
+                    return
+            except Exception as e:
+                print(f"Failed to extend lease on task {task_id}: {e}")
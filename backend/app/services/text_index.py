@@ -0,0 +1,114 @@
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import fitz
+
+from app.core.pdf.toc.section_tree import SectionTree
+from app.db.models import DocumentTextIndex, PDFDocument, SectionRange
+from app.services.document_pool import document_pool
+from app.services.document_versions import document_versions
+
+# Mongo rejects documents over 16 MB; larger texts are read from the PDF.
+MAX_COMPRESSED_BYTES = 15 * 1024 * 1024
+
+
+def section_ranges(toc_model: Optional[Dict], total_pages: int) -> List[SectionRange]:
+    """Page range of every ToC section, covering its subsections."""
+    return [
+        SectionRange(
+            section_number=node.section_number,
+            title=node.title,
+            start_page=node.start_page,
+            end_page=node.end_page,
+        )
+        for node in SectionTree.from_toc_model(toc_model, total_pages).nodes
+    ]
+
+
+def _extract_pages(pdf: fitz.Document) -> Tuple[bytes, List[int]]:
+    """Compressed text of every page and the offset each page starts at."""
+    texts = [page.get_text() for page in pdf]
+    offsets = [0]
+    for text in texts:
+        offsets.append(offsets[-1] + len(text))
+    return zlib.compress("".join(texts).encode("utf-8")), offsets
+
+
+class TextIndex:
+    """Per-document store of page text and section ranges in Mongo.
+
+    Quiz generation slices text from here instead of opening the PDF. The
+    page text is extracted once; editing the ToC only rewrites `sections`.
+    """
+    async def get(self, doc_id) -> Optional[DocumentTextIndex]:
+        return await DocumentTextIndex.find_one(DocumentTextIndex.doc_id == doc_id)
+
+    async def get_or_build(self, doc: PDFDocument) -> Optional[DocumentTextIndex]:
+        """The document's index, building it first for documents uploaded before indexing."""
+        try:
+            index = await self.get(doc.id)
+            if index is None:
+                index = await self.build(doc)
+            return index
+        except Exception as e:
+            print(f"Text index unavailable for document {doc.id}: {e}")
+            return None
+
+    async def build(
+        self, doc: PDFDocument, toc_model: Optional[Dict] = None
+    ) -> Optional[DocumentTextIndex]:
+        """Index the document's pages; sections come from `toc_model`, else its current ToC."""
+        if not doc.pdf_file_id:
+            return None
+        if toc_model is None:
+            toc_model = await document_versions.current_toc_model(doc)
+
+        async with document_pool.open(doc.pdf_file_id) as pdf:
+            text, offsets = await document_pool.run(_extract_pages, pdf)
+        page_count = len(offsets) - 1
+
+        if len(text) > MAX_COMPRESSED_BYTES:
+            print(f"Text of document {doc.id} too large to index ({len(text)} bytes)")
+            return None
+
+        index = DocumentTextIndex(
+            doc_id=doc.id,
+            page_count=page_count,
+            text=text,
+            page_offsets=offsets,
+            sections=section_ranges(toc_model, page_count),
+        )
+        try:
+            await index.insert()
+        except Exception:
+            # Built concurrently by another request; keep the stored one.
+            stored = await self.get(doc.id)
+            if stored is not None:
+                return stored
+            raise
+        return index
+
+    async def update_sections(self, doc: PDFDocument, toc_model: Optional[Dict]) -> None:
+        """Re-derive section ranges after a ToC edit, leaving page text untouched."""
+        try:
+            index = await self.get(doc.id)
+            if index is None:
+                return
+            ranges = section_ranges(toc_model, index.page_count)
+            await index.set({DocumentTextIndex.sections: ranges})
+        except Exception as e:
+            print(f"Failed to update text index sections of {doc.id}: {e}")
+
+    @staticmethod
+    def page_texts(index: DocumentTextIndex, page_indices: Iterable[int]) -> List[str]:
+        """Text of the given 0-based pages, in the order requested."""
+        text = zlib.decompress(index.text).decode("utf-8")
+        offsets = index.page_offsets
+        return [
+            text[offsets[p] : offsets[p + 1]]
+            for p in page_indices
+            if 0 <= p < index.page_count
+        ]
+
+
+text_index = TextIndex()
@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+
+from app.core.llm.agent.extraction_toc_agent import PROMPT_VERSION
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.toc_model import TableOfContents
+from app.db.models import ToCCacheEntry
+
+
+class ToCCache:
+    """Content-addressed store of extracted Tables of Contents.
+
+    Entries are keyed by the SHA-256 of the uploaded PDF together with the
+    extraction configuration and LLM prompt versions, so re-uploading the
+    same file skips extraction (and its LLM call) entirely.
+    """
+    def __init__(self, config: Optional[ToCConfiguration] = None):
+        self.config_version = (config or ToCConfiguration()).fingerprint()
+        self.prompt_version = PROMPT_VERSION
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, content_hash: str) -> Optional[TableOfContents]:
+        try:
+            entry = await ToCCacheEntry.find_one(
+                ToCCacheEntry.content_hash == content_hash,
+                ToCCacheEntry.config_version == self.config_version,
+                ToCCacheEntry.prompt_version == self.prompt_version,
+            )
+        except Exception as e:
+            print(f"ToC cache lookup failed for {content_hash}: {e}")
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return TableOfContents.model_validate(entry.toc_model)
+
+    async def put(self, content_hash: str, toc: TableOfContents) -> None:
+        try:
+            await ToCCacheEntry(
+                content_hash=content_hash,
+                config_version=self.config_version,
+                prompt_version=self.prompt_version,
+                toc_model=toc.model_dump(),
+            ).insert()
+        except Exception as e:
+            # A concurrent upload of the same file may have stored it first.
+            print(f"ToC cache store skipped for {content_hash}: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+toc_cache = ToCCache()
@@ -0,0 +1,57 @@
+"""Standalone task worker.
+
+Runs extraction and quiz tasks from the shared broker, so they can be
+scaled apart from the API:
+
+    python -m app.worker --kinds extract_toc
+"""
+import argparse
+import asyncio
+import signal
+from typing import List
+
+from dotenv import load_dotenv
+
+from app.log_config import configure_logging
+from app.schemas.tasks import TaskKind
+
+
+def worker_kinds(value: str) -> List[TaskKind]:
+    """Parse a comma-separated list of task kinds; empty means none."""
+    return [TaskKind(kind.strip()) for kind in value.split(",") if kind.strip()]
+
+
+async def main(kinds: List[TaskKind]) -> None:
+    from app.db.database import close_db, init_db
+    from app.services.orchestrator import Orchestrator
+
+    await init_db()
+    orchestrator = Orchestrator()
+    if TaskKind.extract_toc in kinds:
+        await orchestrator.engine.warm_up()
+
+    worker = orchestrator.create_worker(kinds)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker.start()
+    print(f"Worker {worker.worker_id} running {', '.join(k.value for k in kinds)}")
+    await stop.wait()
+    print("Stopping worker, waiting for running tasks...")
+    await worker.stop()
+    orchestrator.engine.shutdown()
+    close_db()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    configure_logging()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--kinds",
+        default=",".join(kind.value for kind in TaskKind),
+        help="Comma-separated task kinds to run (default: all)",
+    )
+    asyncio.run(main(worker_kinds(parser.parse_args().kinds)))
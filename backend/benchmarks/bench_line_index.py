@@ -0,0 +1,75 @@
+"""Benchmark: assigning internal links to text lines on dense ToC pages.
+
+Builds synthetic pages with one line per entry and one link per line (plus a
+few multi-line links) and compares the pairwise rectangle test with the
+sorted-interval LineIndex.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_line_index [--links 1000 2000 5000] [--rounds N]
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from app.core.pdf.toc.line_index import LineIndex, rects_intersect
+
+Rect = Tuple[float, float, float, float]
+
+
+def _synthetic_page(n_links: int, seed: int = 0) -> Tuple[List[Rect], List[Rect]]:
+    rng = random.Random(seed)
+    line_height = 11.0
+    lines = [
+        (72.0, 40.0 + i * line_height, 540.0, 40.0 + i * line_height + line_height - 1)
+        for i in range(n_links)
+    ]
+    links = []
+    for x0, y0, x1, y1 in lines:
+        pad = rng.uniform(0.0, 1.5)
+        links.append((x0 + 200.0, y0 + pad, x1, y1 - pad))
+    return lines, links
+
+
+def _pairwise(lines: List[Rect], links: List[Rect]) -> int:
+    hits = 0
+    for rect in links:
+        for bbox in lines:
+            if rects_intersect(rect, bbox):
+                hits += 1
+    return hits
+
+
+def _indexed(lines: List[Rect], links: List[Rect]) -> int:
+    index = LineIndex(lines)
+    return sum(len(index.query(rect)) for rect in links)
+
+
+def _timed(fn, lines: List[Rect], links: List[Rect], rounds: int) -> Tuple[float, int]:
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(rounds):
+        hits = fn(lines, links)
+    return (time.perf_counter() - start) / rounds, hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, nargs="+", default=[1000, 2000, 5000])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'links':>8} {'pairwise ms':>12} {'indexed ms':>12} {'speedup':>9}")
+    for n_links in args.links:
+        lines, links = _synthetic_page(n_links)
+        before, hits_before = _timed(_pairwise, lines, links, args.rounds)
+        after, hits_after = _timed(_indexed, lines, links, args.rounds)
+        assert hits_before == hits_after, "index disagrees with pairwise test"
+        print(
+            f"{n_links:>8} {before * 1000:>12.1f} {after * 1000:>12.2f} "
+            f"{before / after:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
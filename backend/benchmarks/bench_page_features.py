@@ -0,0 +1,115 @@
+"""Microbenchmark: pages parsed per second during manual ToC extraction.
+
+Compares three parse paths over the scanned front pages:
+
+- legacy: plain text + links for every scanned page, then the selected ToC
+  pages reloaded for 'dict' + links;
+- eager: text, 'dict' lines and links for every scanned page;
+- lazy (current): `extract_page_features` for every scanned page and
+  `extract_page_lines` for the selected ToC pages only.
+
+Without a PDF argument a synthetic book is generated: `--pages` pages of
+body text behind `--toc-pages` pages of ToC entries.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_page_features [path/to/file.pdf] [--pages N]
+        [--front-scan N] [--toc-pages N] [--rounds N]
+"""
+import argparse
+import time
+
+import fitz
+
+from app.core.pdf.toc.features import extract_page_features, extract_page_lines
+
+
+def _synthetic_book(pages: int, toc_pages: int) -> fitz.Document:
+    doc = fitz.open()
+    entry = 0
+    for _ in range(toc_pages):
+        page = doc.new_page()
+        lines = []
+        for _ in range(40):
+            entry += 1
+            lines.append(f"{entry}. Section {entry} " + "." * 30 + f" {entry * 3}")
+        page.insert_text((50, 50), "\n".join(lines), fontsize=9)
+    for number in range(pages - toc_pages):
+        page = doc.new_page()
+        body = "\n".join(
+            f"Paragraph {number}.{line}: the quick brown fox jumps over the lazy dog."
+            for line in range(45)
+        )
+        page.insert_text((50, 50), body, fontsize=9)
+    return fitz.open(stream=doc.tobytes(), filetype="pdf")
+
+
+def _legacy_parse(pdf_doc: fitz.Document, scan_limit: int, toc_pages: int) -> None:
+    for idx in range(scan_limit):
+        page = pdf_doc.load_page(idx)
+        page.get_text()
+        page.get_links()
+
+    # Pages selected as ToC were reloaded and parsed a second time.
+    for idx in range(min(toc_pages, scan_limit)):
+        page = pdf_doc.load_page(idx)
+        page.get_text("dict")
+        page.get_links()
+
+
+def _eager_parse(pdf_doc: fitz.Document, scan_limit: int, toc_pages: int) -> None:
+    for idx in range(scan_limit):
+        page = pdf_doc.load_page(idx)
+        extract_page_features(page)
+        extract_page_lines(page)
+
+
+def _lazy_parse(pdf_doc: fitz.Document, scan_limit: int, toc_pages: int) -> None:
+    for idx in range(scan_limit):
+        extract_page_features(pdf_doc.load_page(idx))
+
+    for idx in range(min(toc_pages, scan_limit)):
+        extract_page_lines(pdf_doc.load_page(idx))
+
+
+def _pages_per_second(
+    fn, pdf_doc: fitz.Document, scan_limit: int, toc_pages: int, rounds: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(pdf_doc, scan_limit, toc_pages)
+    elapsed = time.perf_counter() - start
+    return (scan_limit * rounds) / elapsed if elapsed else float("inf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--pages", type=int, default=300,
+                        help="pages of the synthetic book used without a PDF")
+    parser.add_argument("--front-scan", type=int, default=35)
+    parser.add_argument("--toc-pages", type=int, default=2,
+                        help="pages selected as ToC, parsed for lines")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    pdf_doc = (
+        fitz.open(args.pdf) if args.pdf else _synthetic_book(args.pages, args.toc_pages)
+    )
+    with pdf_doc:
+        scan_limit = min(args.front_scan, pdf_doc.page_count)
+        results = {
+            name: _pages_per_second(fn, pdf_doc, scan_limit, args.toc_pages, args.rounds)
+            for name, fn in (
+                ("legacy", _legacy_parse), ("eager", _eager_parse), ("lazy", _lazy_parse)
+            )
+        }
+        page_count = pdf_doc.page_count
+
+    print(f"document pages: {page_count}, scanned per round: {scan_limit}, "
+          f"ToC pages: {args.toc_pages}")
+    for name, rate in results.items():
+        print(f"{name:7s} {rate:10.1f} pages/s  ({rate / results['legacy']:.2f}x legacy)")
+
+
+if __name__ == "__main__":
+    main()
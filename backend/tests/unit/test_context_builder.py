@@ -0,0 +1,61 @@
+import logging
+
+from app.core.llm.context import ContextBuilder
+from app.core.llm.model import ModelProfile
+from app.core.llm.tokens import count_tokens
+from app.log_config import configure_logging
+
+
+def _builder_with_budget(budget):
+    builder = ContextBuilder(ModelProfile.NANO, "System prompt.", reserved_output_tokens=0)
+    builder.reserved_output_tokens = builder.context_budget() - budget
+    return builder
+
+
+def test_build_keeps_context_that_fits():
+    builder = _builder_with_budget(1000)
+
+    inputs = builder.build("What is it?", "short context")
+
+    assert inputs == {"question": "What is it?", "context": "short context"}
+
+
+def test_build_truncates_context_to_the_window():
+    builder = _builder_with_budget(60)
+    question = "What is it?"
+    context = "word " * 1000
+
+    inputs = builder.build(question, context)
+
+    assert inputs["question"] == question
+    assert context.startswith(inputs["context"])
+    assert count_tokens(inputs["context"]) <= 60 - count_tokens(question)
+
+
+def test_reserved_output_shrinks_the_budget():
+    small = ContextBuilder(ModelProfile.LARGE, "System prompt.", reserved_output_tokens=1000)
+    large = ContextBuilder(ModelProfile.LARGE, "System prompt.", reserved_output_tokens=5000)
+
+    assert small.context_budget() - large.context_budget() == 4000
+    assert small.context_budget() < ModelProfile.LARGE.context_window
+
+
+def test_log_call_logs_the_input_token_count(caplog):
+    builder = _builder_with_budget(1000)
+
+    with caplog.at_level(logging.INFO, logger="app.core.llm.context"):
+        builder.log_call(builder.build("What is it?", "short context"))
+
+    record = caplog.records[-1]
+    assert record.levelno == logging.INFO
+    assert f"({count_tokens('short context')} context)" in record.getMessage()
+
+
+def test_configure_logging_enables_info_for_app_loggers(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "info")
+    app_logger = logging.getLogger("app")
+    monkeypatch.setattr(app_logger, "level", app_logger.level)
+
+    configure_logging()
+
+    assert logging.getLogger("app.core.llm.context").isEnabledFor(logging.INFO)
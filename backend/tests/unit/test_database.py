@@ -0,0 +1,33 @@
+import asyncio
+
+from app.db import database
+
+
+def test_init_db_creates_one_client(monkeypatch):
+    calls = []
+
+    async def fake_init_beanie(database, document_models):
+        calls.append(database)
+
+    monkeypatch.setenv("MONGODB_URL", "mongodb://localhost:1")
+    monkeypatch.setenv("MONGODB_DB_NAME", "test")
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "7")
+    monkeypatch.setattr(database, "init_beanie", fake_init_beanie)
+
+    async def scenario():
+        results = await asyncio.gather(*(database.init_db() for _ in range(5)))
+        db = await database.get_database()
+        return results, db
+
+    try:
+        results, db = asyncio.run(scenario())
+        clients = {id(client) for client, _ in results}
+
+        assert len(calls) == 1
+        assert len(clients) == 1
+        assert db is results[0][1]
+        assert results[0][0].options.pool_options.max_pool_size == 7
+    finally:
+        database.close_db()
+
+    assert database._database is None
@@ -0,0 +1,61 @@
+import asyncio
+import re
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.db.models import PDFDocument
+from app.services import documents
+from app.services.documents import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    updated_at = datetime(2024, 5, 17, 9, 30, 12, 345000)
+    doc_id = uuid4()
+
+    cursor = encode_cursor(updated_at, doc_id)
+
+    assert decode_cursor(cursor) == (updated_at, doc_id)
+    assert "/" not in cursor and "+" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(), uuid4())[:-4]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_name_key_is_derived_from_the_name():
+    doc = PDFDocument.model_construct(name="Straße Guide", pdf_name="guide.pdf", name_key="")
+
+    assert doc._derive_name_key().name_key == "strasse guide"
+
+
+def test_name_filter_is_an_anchored_prefix_on_the_folded_key(monkeypatch):
+    seen = []
+
+    class FakeQuery:
+        def project(self, model):
+            return self
+
+        def sort(self, keys):
+            return self
+
+        def limit(self, n):
+            return self
+
+        async def to_list(self):
+            return []
+
+    class FakeDocuments:
+        @staticmethod
+        def find(*filters):
+            seen.extend(filters)
+            return FakeQuery()
+
+    monkeypatch.setattr(documents, "PDFDocument", FakeDocuments)
+
+    asyncio.run(documents.document_service.list_documents(name="Intro (2nd)"))
+
+    assert seen == [{"name_key": {"$regex": "^" + re.escape("intro (2nd)")}}]
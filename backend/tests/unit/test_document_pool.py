@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+import fitz
+
+from app.services.document_pool import DocumentPool
+
+
+def _pdf_bytes(pages: int = 1) -> bytes:
+    with fitz.open() as doc:
+        for _ in range(pages):
+            doc.new_page()
+        return doc.tobytes()
+
+
+def test_each_document_has_its_own_thread_off_the_event_loop():
+    async def scenario():
+        pool = DocumentPool()
+        await pool.preload("a", _pdf_bytes())
+        await pool.preload("b", _pdf_bytes())
+
+        async def read(file_id):
+            async with pool.open(file_id) as doc:
+                return await pool.run(lambda: (threading.get_ident(), len(doc)))
+
+        return await asyncio.gather(read("a"), read("b"), read("a"))
+
+    (thread_a, _), (thread_b, _), (thread_a_again, _) = asyncio.run(scenario())
+
+    assert thread_a == thread_a_again
+    assert thread_a != thread_b
+    assert threading.get_ident() not in (thread_a, thread_b)
+
+
+def test_documents_are_read_in_parallel():
+    both_running = threading.Barrier(2, timeout=2)
+
+    async def scenario():
+        pool = DocumentPool()
+        await pool.preload("a", _pdf_bytes())
+        await pool.preload("b", _pdf_bytes())
+
+        async def read(file_id):
+            async with pool.open(file_id) as doc:
+                # Only passes if the other document's call runs at the same time.
+                return await pool.run(lambda: (both_running.wait(), len(doc))[1])
+
+        return await asyncio.gather(read("a"), read("b"))
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+
+def test_resident_bytes_are_returned_without_a_download():
+    async def scenario():
+        pool = DocumentPool()
+
+        async def no_download(file_id):
+            raise AssertionError("GridFS should not be read")
+
+        pool._download = no_download
+        data = _pdf_bytes()
+        await pool.preload("a", data)
+        return data, pool.get_bytes("a"), pool.get_bytes("missing")
+
+    data, resident, missing = asyncio.run(scenario())
+
+    assert resident is data
+    assert missing is None
+
+
+def _pool_with_fake_gridfs(max_bytes, files):
+    pool = DocumentPool(max_bytes=max_bytes)
+    downloads = []
+
+    async def download(file_id):
+        downloads.append(file_id)
+        await asyncio.sleep(0.01)
+        return files[file_id]
+
+    pool._download = download
+    return pool, downloads
+
+
+def test_least_recently_used_documents_are_evicted():
+    # Equal sizes, so exactly two documents fit the budget.
+    files = dict.fromkeys("abc", _pdf_bytes())
+    size = len(files["a"])
+
+    async def scenario():
+        pool, downloads = _pool_with_fake_gridfs(2 * size, files)
+        for file_id in ["a", "b", "a", "c", "a", "b"]:
+            async with pool.open(file_id):
+                pass
+        return pool, downloads
+
+    pool, downloads = asyncio.run(scenario())
+
+    # "b" was least recently used when "c" arrived, then "c" when "b" returned.
+    assert downloads == ["a", "b", "c", "b"]
+    assert list(pool._entries) == ["a", "b"]
+    assert pool.resident_bytes <= 2 * size
+
+
+def test_concurrent_opens_share_one_download():
+    files = {"a": _pdf_bytes(3)}
+
+    async def scenario():
+        pool, downloads = _pool_with_fake_gridfs(None, files)
+
+        async def page_count():
+            async with pool.open("a") as doc:
+                return await pool.run(len, doc)
+
+        counts = await asyncio.gather(*(page_count() for _ in range(5)))
+        return counts, downloads, pool.stats()
+
+    counts, downloads, stats = asyncio.run(scenario())
+
+    assert counts == [3] * 5
+    assert downloads == ["a"]
+    assert stats["misses"] == 1 and stats["hits"] == 4
+
+
+def test_preloaded_documents_are_not_downloaded():
+    files = {"a": _pdf_bytes(2)}
+
+    async def scenario():
+        pool, downloads = _pool_with_fake_gridfs(None, files)
+        await pool.preload("a", files["a"])
+        async with pool.open("a") as doc:
+            count = await pool.run(len, doc)
+        too_large = DocumentPool(max_bytes=1)
+        await too_large.preload("a", files["a"])
+        return count, downloads, too_large.stats()["open_documents"]
+
+    count, downloads, too_large_open = asyncio.run(scenario())
+
+    assert count == 2
+    assert downloads == []
+    assert too_large_open == 0
@@ -0,0 +1,53 @@
+import io
+import zipfile
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import documents as documents_api
+from app.services.documents import RenderedPage
+
+
+def _client(monkeypatch):
+    requested = []
+
+    async def fake_previews(doc_id, start, end, zoom, fmt):
+        requested.append((start, end))
+        return [
+            RenderedPage(page_number=n, content=b"img", media_type="image/png", etag=f'"{n}"')
+            for n in range(start, end + 1)
+        ]
+
+    monkeypatch.setattr(
+        documents_api.document_service, "get_page_range_previews", fake_previews
+    )
+    app = FastAPI()
+    app.include_router(documents_api.router, prefix="/api/documents")
+    return TestClient(app), requested
+
+
+def test_batch_is_limited_to_max_pages(monkeypatch):
+    client, requested = _client(monkeypatch)
+    url = f"/api/documents/{uuid4()}/previews"
+    last = documents_api.MAX_BATCH_PAGES
+
+    too_many = client.get(url, params={"start": 1, "end": last + 1, "format": "png"})
+    default = client.get(url, params={"start": 3, "format": "png", "packaging": "zip"})
+
+    assert too_many.status_code == 400
+    assert default.status_code == 200
+    assert requested == [(3, last + 2)]
+    with zipfile.ZipFile(io.BytesIO(default.content)) as archive:
+        assert len(archive.namelist()) == last
+
+
+def test_end_before_start_is_rejected(monkeypatch):
+    client, requested = _client(monkeypatch)
+
+    response = client.get(
+        f"/api/documents/{uuid4()}/previews", params={"start": 5, "end": 4, "format": "png"}
+    )
+
+    assert response.status_code == 400
+    assert requested == []
@@ -0,0 +1,228 @@
+import asyncio
+from uuid import uuid4
+
+from pymongo.errors import DuplicateKeyError
+
+from app.services import document_versions as versions_module
+from app.services.document_versions import DocumentVersions
+
+
+class _Field:
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, value):
+        return self.name, value
+
+    def __neg__(self):
+        return self
+
+    __hash__ = object.__hash__
+
+
+class _Query:
+    def __init__(self, items):
+        self.items = items
+
+    def sort(self, field):
+        self.items = sorted(self.items, key=lambda i: getattr(i, field.name), reverse=True)
+        return self
+
+    def limit(self, n):
+        self.items = self.items[:n]
+        return self
+
+    async def to_list(self):
+        return list(self.items)
+
+
+def _version_model():
+    """In-memory stand-in for ToCVersion/QuizVersion with the unique (doc_id, version) index."""
+    class Version:
+        stored = []
+        before_insert = None
+        doc_id = _Field("doc_id")
+        version = _Field("version")
+        quiz = _Field("quiz")
+        complete = _Field("complete")
+
+        def __init__(self, **fields):
+            self.id = uuid4()
+            self.__dict__.update(fields)
+
+        async def insert(self):
+            if Version.before_insert is not None:
+                hook, Version.before_insert = Version.before_insert, None
+                await hook()
+            if any(
+                v.doc_id == self.doc_id and v.version == self.version for v in Version.stored
+            ):
+                raise DuplicateKeyError("duplicate version")
+            Version.stored.append(self)
+
+        async def set(self, values):
+            for field, value in values.items():
+                setattr(self, field.name, value)
+
+        async def delete(self):
+            Version.stored.remove(self)
+
+        @classmethod
+        def find(cls, condition):
+            name, value = condition
+            return _Query([v for v in cls.stored if getattr(v, name) == value])
+
+    return Version
+
+
+class _RawCollection:
+    """The raw document collection, as migrate_embedded sees it."""
+    def __init__(self, records):
+        self.records = records
+
+    @staticmethod
+    def _has_payload(record, query):
+        return any(next(iter(clause)) in record for clause in query["$or"])
+
+    async def find(self, query, projection):
+        for record in list(self.records):
+            await asyncio.sleep(0)
+            if self._has_payload(record, query):
+                yield {"_id": record["_id"]}
+
+    async def find_one_and_update(self, query, update, projection, return_document):
+        await asyncio.sleep(0)
+        for record in self.records:
+            if record["_id"] == query["_id"] and self._has_payload(record, query):
+                before = dict(record)
+                for name in update["$unset"]:
+                    record.pop(name, None)
+                return before
+        return None
+
+    async def update_one(self, query, update):
+        record = next(r for r in self.records if r["_id"] == query["_id"])
+        record.update(update["$set"])
+
+
+class FakeDocuments:
+    raw = []
+    id = _Field("_id")
+    toc_id = _Field("toc_id")
+    quiz_id = _Field("quiz_id")
+    updated_at = _Field("updated_at")
+
+    def __init__(self):
+        self.id = uuid4()
+        self.quiz_conf = None
+        self.toc_id = None
+        self.quiz_id = None
+
+    async def set(self, values):
+        for field, value in values.items():
+            setattr(self, field.name, value)
+
+    @classmethod
+    def get_pymongo_collection(cls):
+        return _RawCollection(cls.raw)
+
+
+def _fake_store(monkeypatch, raw=()):
+    monkeypatch.setattr(FakeDocuments, "raw", list(raw))
+    toc_version, quiz_version = _version_model(), _version_model()
+    monkeypatch.setattr(versions_module, "PDFDocument", FakeDocuments)
+    monkeypatch.setattr(versions_module, "ToCVersion", toc_version)
+    monkeypatch.setattr(versions_module, "QuizVersion", quiz_version)
+    return toc_version, quiz_version
+
+
+def test_versions_are_numbered_per_document(monkeypatch):
+    toc_version, quiz_version = _fake_store(monkeypatch)
+    doc, other = FakeDocuments(), FakeDocuments()
+    versions = DocumentVersions()
+
+    async def scenario():
+        first = await versions.save_toc(doc, {"sections": []}, source="extracted")
+        second = await versions.save_toc(doc, {"sections": []}, source="edited")
+        elsewhere = await versions.save_toc(other, {"sections": []}, source="extracted")
+        quiz = await versions.save_quiz(doc, {"questions": []})
+        return first, second, elsewhere, quiz
+
+    first, second, elsewhere, quiz = asyncio.run(scenario())
+
+    assert (first.version, second.version, elsewhere.version, quiz.version) == (1, 2, 1, 1)
+    assert doc.toc_id == second.id and doc.quiz_id == quiz.id
+    assert second.source == "edited"
+
+
+def test_streamed_quiz_becomes_current_only_when_finished(monkeypatch):
+    _, quiz_version = _fake_store(monkeypatch)
+    doc = FakeDocuments()
+    versions = DocumentVersions()
+
+    async def scenario():
+        previous = await versions.save_quiz(doc, {"questions": ["old"]})
+        failed = await versions.save_quiz(doc, {"questions": ["q1"]}, complete=False)
+        during_failed = doc.quiz_id
+        await versions.discard_quiz(failed)
+        streamed = await versions.save_quiz(doc, {"questions": ["q1"]}, complete=False)
+        during = doc.quiz_id
+        await versions.finish_quiz(doc, streamed, {"questions": ["q1", "q2"]})
+        return previous, during_failed, during, streamed
+
+    previous, during_failed, during, streamed = asyncio.run(scenario())
+
+    assert during_failed == previous.id and during == previous.id
+    assert doc.quiz_id == streamed.id
+    assert streamed.complete and streamed.quiz == {"questions": ["q1", "q2"]}
+    assert [v.id for v in quiz_version.stored] == [previous.id, streamed.id]
+
+
+def test_concurrently_taken_number_moves_to_the_next(monkeypatch):
+    toc_version, _ = _fake_store(monkeypatch)
+    doc = FakeDocuments()
+
+    async def racing_save():
+        toc_version.stored.append(toc_version(doc_id=doc.id, version=1, source="edited"))
+
+    toc_version.before_insert = racing_save
+    saved = asyncio.run(DocumentVersions().save_toc(doc, {"sections": []}, source="extracted"))
+
+    assert saved.version == 2
+    assert sorted(v.version for v in toc_version.stored) == [1, 2]
+
+
+def test_migration_moves_embedded_payloads_once(monkeypatch):
+    legacy_id, current_id = uuid4(), uuid4()
+    toc = {"sections": [{"section_number": "1", "title": "Intro", "start_page": 1}]}
+    legacy = {"_id": legacy_id, "toc_model": toc, "quiz": {"questions": []}}
+    current = {"_id": current_id, "toc_id": uuid4()}
+    toc_version, quiz_version = _fake_store(monkeypatch, [legacy, current])
+    versions = DocumentVersions()
+
+    first = asyncio.run(versions.migrate_embedded())
+    second = asyncio.run(versions.migrate_embedded())
+
+    assert (first, second) == (1, 0)
+    assert "toc_model" not in legacy and "quiz" not in legacy
+    [migrated_toc] = toc_version.stored
+    [migrated_quiz] = quiz_version.stored
+    assert migrated_toc.doc_id == legacy_id and migrated_toc.toc_model == toc
+    assert migrated_toc.source == "migrated"
+    assert legacy["toc_id"] == migrated_toc.id and legacy["quiz_id"] == migrated_quiz.id
+    assert current == {"_id": current_id, "toc_id": current["toc_id"]}
+
+
+def test_concurrent_migrations_move_each_record_once(monkeypatch):
+    legacy = {"_id": uuid4(), "toc_model": {"sections": []}, "quiz": {"questions": []}}
+    toc_version, quiz_version = _fake_store(monkeypatch, [legacy])
+
+    async def scenario():
+        # As when every server process migrates on start-up.
+        return await asyncio.gather(*(DocumentVersions().migrate_embedded() for _ in range(3)))
+
+    counts = asyncio.run(scenario())
+
+    assert sorted(counts) == [0, 0, 1]
+    assert len(toc_version.stored) == 1 and len(quiz_version.stored) == 1
+    assert legacy["toc_id"] == toc_version.stored[0].id
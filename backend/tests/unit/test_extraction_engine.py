@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.core.llm.agent.extraction_toc_agent import ToCOrigin
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.schemas.tasks import TaskKind, TaskRecord
+from app.services.extraction_engine import ExtractionEngine, ExtractionQueueFull
+from app.services.orchestrator import Orchestrator
+from app.services.task_queue import InMemoryTaskBroker
+
+
+def test_uploads_beyond_capacity_are_rejected():
+    engine = ExtractionEngine(max_workers=1, queue_size=1)
+    broker = InMemoryTaskBroker()
+    orchestrator = Orchestrator(engine=engine, broker=broker)
+
+    async def scenario():
+        for _ in range(engine.capacity):
+            await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc))
+        await orchestrator.process_file_async(file=None, name="Full")
+
+    with pytest.raises(ExtractionQueueFull):
+        asyncio.run(scenario())
+
+
+def test_progress_is_forwarded_and_workers_exit_on_shutdown(sample_pdf_path: str):
+    # Parallel scoring inside the worker used to leave children it hung joining at exit.
+    engine = ExtractionEngine(
+        max_workers=1,
+        queue_size=0,
+        config=ToCConfiguration(scoring_workers=2, min_pages_per_shard=1),
+    )
+    reports = []
+
+    async def on_progress(scored, total):
+        reports.append((scored, total))
+
+    async def scenario():
+        extracted = await engine.extract(sample_pdf_path, on_progress=on_progress)
+        # Reports still in flight are delivered through the event loop.
+        await asyncio.sleep(0.1)
+        return extracted
+
+    try:
+        extracted = asyncio.run(scenario())
+        workers = list(engine._executor._processes.values())
+    finally:
+        engine.shutdown()
+
+    assert [s.title for s in extracted.toc.sections] == ["Introduction", "Chapter One"]
+    assert extracted.origin == ToCOrigin.parsed
+    assert reports and reports[-1][0] == reports[-1][1]
+    for process in workers:
+        process.join(timeout=20)
+    hung = [process for process in workers if process.is_alive()]
+    for process in hung:
+        process.kill()
+    assert not hung
@@ -0,0 +1,236 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.llm.agent import generation_quiz_agent
+from app.core.llm.chunking import TextChunk, allocate, allocate_grouped
+from app.core.llm.model import ModelProfile
+from app.core.llm.rag_service import LangChainRAGService
+from app.core.llm.response_cache import InMemoryResponseCache
+from app.core.llm.tokens import count_tokens
+from app.core.llm.agent.generation_quiz_agent import GenerationQuizAgent
+from app.schemas.quiz import (
+    GeneratedQuestion,
+    QuestionConfig,
+    QuestionType,
+    QuizAnswer,
+    QuizOutput,
+)
+
+
+class FakeRag:
+    def __init__(self):
+        self.calls = 0
+        self.contexts = []
+
+    async def aanswer_structured(self, question, response_model, context="", use_cache=True):
+        self.calls += 1
+        self.contexts.append(context)
+        count = question.count("- Question ")
+        return QuizOutput(questions=[
+            GeneratedQuestion(
+                id=i + 1,
+                text=f"call {self.calls} question {i + 1}",
+                type=QuestionType.OPEN,
+                answers=[QuizAnswer(text="answer", is_correct=True)],
+            )
+            for i in range(count)
+        ])
+
+
+def test_generate_quiz_merges_batches_with_stable_ids(monkeypatch):
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", FakeRag)
+    agent = GenerationQuizAgent(batch_size=2, max_concurrency=2)
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(5)]
+
+    quiz = asyncio.run(agent.generate_quiz("Some context", config))
+
+    assert agent.rag_service.calls == 3
+    assert [q.id for q in quiz.questions] == [1, 2, 3, 4, 5]
+
+
+def test_generate_quiz_spreads_questions_over_chunks(monkeypatch):
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", FakeRag)
+    agent = GenerationQuizAgent(batch_size=10, max_concurrency=4, chunk_tokens=100)
+    chunks = [
+        TextChunk(text="a" * 1200, title="Chapter 1"),
+        TextChunk(text="b" * 400, title="Chapter 2"),
+    ]
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(8)]
+
+    quiz = asyncio.run(agent.generate_quiz(chunks, config))
+
+    contexts = agent.rag_service.contexts
+    assert all(count_tokens(context) <= 100 for context in contexts)
+    assert any(context.startswith("a") for context in contexts)
+    assert any(context.startswith("b") for context in contexts)
+    assert [q.id for q in quiz.questions] == list(range(1, 9))
+
+
+def test_generate_quiz_drops_duplicate_questions(monkeypatch):
+    class RepeatingRag(FakeRag):
+        async def aanswer_structured(self, question, response_model, context="", use_cache=True):
+            quiz = await super().aanswer_structured(question, response_model, context)
+            for q in quiz.questions:
+                q.text = "What is  the answer?" if self.calls % 2 else "what is the answer"
+            return quiz
+
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", RepeatingRag)
+    agent = GenerationQuizAgent(batch_size=1, max_concurrency=1)
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(3)]
+
+    quiz = asyncio.run(agent.generate_quiz("Some context", config))
+
+    assert len(quiz.questions) == 1
+
+
+def test_allocate_is_proportional_and_exact():
+    assert allocate([300, 100], 8) == [6, 2]
+    assert allocate([1, 1, 1], 2) == [1, 1, 0]
+    assert sum(allocate([5, 7, 11], 13)) == 13
+    assert allocate([10, 10], 0) == [0, 0]
+
+
+class StreamingRag(FakeRag):
+    """Streams each answer the way the JSON parser does: growing partial dicts."""
+    def __init__(self):
+        super().__init__()
+        self.delivered_before_end = []
+
+    async def astream_structured(self, question, response_model, context="", use_cache=True):
+        full = (await self.aanswer_structured(question, response_model, context)).model_dump()
+        items = full["questions"]
+        for n in range(1, len(items) + 1):
+            partial = [dict(item) for item in items[:n]]
+            # The newest question is still being written.
+            partial[-1]["answers"] = []
+            partial[-1]["text"] = partial[-1]["text"][:4]
+            yield {"questions": partial}
+        yield full
+        # Malformed items are dropped, not fatal.
+        yield {"questions": items + [{"id": 9, "text": "broken"}]}
+
+
+def test_streamed_questions_arrive_complete_and_numbered(monkeypatch):
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", StreamingRag)
+    agent = GenerationQuizAgent(batch_size=3, max_concurrency=1)
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(5)]
+    received = []
+
+    async def on_question(question):
+        received.append(question.model_copy())
+
+    quiz = asyncio.run(agent.generate_quiz("Some context", config, on_question=on_question))
+
+    assert [q.id for q in received] == [1, 2, 3, 4, 5]
+    assert all(q.answers and q.text.startswith("call") for q in received)
+    assert [q.text for q in quiz.questions] == [q.text for q in received]
+
+
+def test_malformed_streamed_question_does_not_drop_the_last_one(monkeypatch):
+    def question(text):
+        return {"id": 1, "text": text, "type": "open", "answers": [{"text": "a", "is_correct": True}]}
+
+    class FakeStreamChain:
+        async def astream(self, inputs):
+            items = [question("q1"), {"id": 2, "text": "q2"}, question("q3")]
+            for n in range(1, len(items) + 1):
+                yield {"questions": items[:n]}
+
+    rag = LangChainRAGService(
+        SimpleNamespace(model=ModelProfile.NANO), cache=InMemoryResponseCache()
+    )
+    monkeypatch.setattr(rag, "_build_chain", lambda structured_model=None, partial=False: FakeStreamChain())
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", lambda: rag)
+    agent = GenerationQuizAgent(batch_size=3, max_concurrency=1)
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(3)]
+    received = []
+
+    async def on_question(q):
+        received.append(q.text)
+
+    asyncio.run(agent.generate_quiz("Some context", config, on_question=on_question))
+
+    assert received == ["q1", "q3"]
+
+
+def test_failed_batches_are_skipped_but_a_total_failure_is_raised(monkeypatch):
+    class FlakyRag(FakeRag):
+        def __init__(self, fail_every):
+            super().__init__()
+            self.fail_every = fail_every
+
+        async def aanswer_structured(self, question, response_model, context="", use_cache=True):
+            quiz = await super().aanswer_structured(question, response_model, context)
+            if self.calls % self.fail_every == 0:
+                raise RuntimeError("rate limited")
+            return quiz
+
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(4)]
+
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", lambda: FlakyRag(2))
+    agent = GenerationQuizAgent(batch_size=1, max_concurrency=1, top_up_rounds=0)
+    quiz = asyncio.run(agent.generate_quiz("Some context", config))
+    assert len(quiz.questions) == 2
+
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", lambda: FlakyRag(1))
+    agent = GenerationQuizAgent(batch_size=1, max_concurrency=1)
+    with pytest.raises(RuntimeError, match="rate limited"):
+        asyncio.run(agent.generate_quiz("Some context", config))
+
+
+def test_allocate_grouped_spreads_each_group_within_bucket_totals():
+    assert allocate_grouped([1, 1, 1], [1, 1, 1]) == [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+    counts = allocate_grouped([5, 7, 11], [4, 4, 5])
+    assert [sum(row) for row in counts] == [4, 4, 5]
+    assert [sum(column) for column in zip(*counts)] == allocate([5, 7, 11], 13)
+
+
+def test_question_types_are_spread_over_chunks(monkeypatch):
+    class TypedRag(FakeRag):
+        def __init__(self):
+            super().__init__()
+            self.requests = []
+
+        async def aanswer_structured(self, question, response_model, context="", use_cache=True):
+            self.requests.append((context[0], question.count("Type=true_false")))
+            return await super().aanswer_structured(question, response_model, context)
+
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", TypedRag)
+    # FakeRag answers every type with open questions; no top-up for the rest.
+    agent = GenerationQuizAgent(
+        batch_size=10, max_concurrency=1, chunk_tokens=100, top_up_rounds=0
+    )
+    chunks = [TextChunk(text="a" * 300, title="1"), TextChunk(text="b" * 300, title="2")]
+    config = (
+        [QuestionConfig(type=QuestionType.OPEN) for _ in range(2)]
+        + [QuestionConfig(type=QuestionType.TRUE_FALSE) for _ in range(2)]
+    )
+
+    asyncio.run(agent.generate_quiz(chunks, config))
+
+    assert sorted(agent.rag_service.requests) == [("a", 1), ("b", 1)]
+
+
+def test_duplicates_are_replaced_by_a_top_up_round(monkeypatch):
+    class RepeatOnceRag(FakeRag):
+        async def aanswer_structured(self, question, response_model, context="", use_cache=True):
+            quiz = await super().aanswer_structured(question, response_model, context)
+            if self.calls == 1:
+                for q in quiz.questions:
+                    q.text = "the same question"
+            else:
+                assert "- the same question" in question
+            return quiz
+
+    monkeypatch.setattr(generation_quiz_agent, "_default_rag", RepeatOnceRag)
+    agent = GenerationQuizAgent(batch_size=10, max_concurrency=1)
+    config = [QuestionConfig(type=QuestionType.OPEN) for _ in range(3)]
+
+    quiz = asyncio.run(agent.generate_quiz("Some context", config))
+
+    assert agent.rag_service.calls == 2
+    assert [q.id for q in quiz.questions] == [1, 2, 3]
+    assert len({q.text for q in quiz.questions}) == 3
+
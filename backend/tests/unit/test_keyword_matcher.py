@@ -0,0 +1,21 @@
+from app.core.pdf.toc.keyword_matcher import KeywordMatcher
+
+
+def test_keyword_matcher_finds_overlapping_keywords():
+    matcher = KeywordMatcher(
+        [("table of contents", 1), ("contents", 1), ("index", 0.2), ("index of contents", 1)],
+        [],
+    )
+
+    assert matcher.find("TABLE OF CONTENTS") == {"table of contents", "contents"}
+    assert matcher.find("Index of Contents") == {"index", "index of contents", "contents"}
+
+
+def test_keyword_matcher_weights_and_negatives():
+    matcher = KeywordMatcher([("chapter", 0.3), ("part", 0.1)], ["isbn"])
+
+    hits = matcher.scan("Part I\nChapter 1 ... 3")
+    assert abs(hits.weight - 0.4) < 1e-9
+    assert not hits.negative
+
+    assert matcher.scan("ISBN 978-3-16-148410-0").negative
@@ -0,0 +1,29 @@
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.line_features import compute_line_stats
+
+
+def test_line_stats_count_leaders_and_trailing_runs():
+    text = "\n".join([
+        "Contents",
+        "",
+        "1 Introduction . . . . . 1",
+        "2 Background 5",
+        "3 Methods 9",
+        "A note",
+        "4 Results 14",
+    ])
+
+    stats = compute_line_stats(text, ToCConfiguration())
+
+    assert stats.total_lines == 6
+    assert stats.count_leaders == 1
+    assert stats.count_trailing == 4
+    assert stats.longest_run == 3
+    assert stats.ratio_trailing == 4 / 6
+
+
+def test_blank_page_has_no_lines():
+    stats = compute_line_stats("\n  \n", ToCConfiguration())
+
+    assert stats.total_lines == 0
+    assert stats.ratio_trailing == 0.0
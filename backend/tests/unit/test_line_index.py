@@ -0,0 +1,18 @@
+from app.core.pdf.toc.line_index import LineIndex, rects_intersect
+
+
+def test_line_index_matches_pairwise_intersection():
+    lines = [(0, i * 10, 100, i * 10 + 9) for i in range(50)] + [None]
+    index = LineIndex(lines)
+
+    link = (50, 102, 80, 125)
+    expected = [i for i, bbox in enumerate(lines) if rects_intersect(link, bbox)]
+
+    assert sorted(index.query(link)) == expected == [10, 11, 12]
+
+
+def test_line_index_ignores_touching_edges():
+    index = LineIndex([(0, 0, 100, 10)])
+
+    assert index.query((0, 10, 100, 20)) == []
+    assert index.query(None) == []
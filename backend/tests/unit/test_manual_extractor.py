@@ -0,0 +1,90 @@
+from concurrent.futures import Future
+
+import fitz
+
+from app.core.pdf.toc import manual_extractor
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.features import extract_page_lines
+from app.core.pdf.toc.manual_extractor import ManualToCExtractor
+
+
+def test_parallel_scoring_matches_serial_and_reuses_its_pool(sample_pdf_path: str):
+    serial = ManualToCExtractor(ToCConfiguration())
+    parallel = ManualToCExtractor(
+        ToCConfiguration(scoring_workers=2, min_pages_per_shard=1)
+    )
+
+    try:
+        with fitz.open(sample_pdf_path) as doc:
+            expected = serial.manual_extract(doc)
+            actual = parallel.manual_extract(doc)
+            pool = manual_extractor._scoring_pools[2]
+            again = parallel.manual_extract(doc)
+
+        assert actual == expected and again == expected
+        assert manual_extractor._scoring_pools[2] is pool
+    finally:
+        manual_extractor._discard_scoring_pool(2)
+
+
+def test_failed_parallel_scoring_keeps_progress_monotonic(monkeypatch, sample_pdf_path: str):
+    class FailingPool:
+        """Scores the first shard, then breaks the way a crashed pool does."""
+        def __init__(self):
+            self.submitted = 0
+
+        def submit(self, fn, *args):
+            future = Future()
+            self.submitted += 1
+            if self.submitted == 1:
+                future.set_result(fn(*args))
+            else:
+                future.set_exception(RuntimeError("worker died"))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setitem(manual_extractor._scoring_pools, 2, FailingPool())
+    reports = []
+    extractor = ManualToCExtractor(ToCConfiguration(scoring_workers=2, min_pages_per_shard=1))
+
+    with fitz.open(sample_pdf_path) as doc:
+        toc = extractor.manual_extract(
+            doc, progress=lambda scored, total: reports.append(scored)
+        )
+        expected = ManualToCExtractor().manual_extract(doc)
+        page_count = doc.page_count
+
+    assert toc == expected
+    assert reports == sorted(reports) and reports[-1] == page_count
+    assert 2 not in manual_extractor._scoring_pools
+
+
+def test_scoring_reports_progress(sample_pdf_path: str):
+    reports = []
+    with fitz.open(sample_pdf_path) as doc:
+        ManualToCExtractor().manual_extract(
+            doc, progress=lambda scored, total: reports.append((scored, total))
+        )
+        page_count = doc.page_count
+
+    assert reports == [(i, page_count) for i in range(1, page_count + 1)]
+
+
+def test_line_geometry_is_read_for_selected_toc_pages_only(monkeypatch, sample_pdf_path: str):
+    read = []
+
+    def counting_extract_page_lines(page):
+        read.append(page.number)
+        return extract_page_lines(page)
+
+    monkeypatch.setattr(manual_extractor, "extract_page_lines", counting_extract_page_lines)
+
+    with fitz.open(sample_pdf_path) as doc:
+        toc_pages = ManualToCExtractor().manual_extract(doc)
+        page_count = doc.page_count
+
+    assert toc_pages and page_count > len(toc_pages)
+    assert read == [page.page_index for page in toc_pages]
+    assert "Introduction" in toc_pages[0].clean_text
@@ -0,0 +1,89 @@
+import asyncio
+import io
+
+import fitz
+import pytest
+from fastapi import UploadFile
+
+from app.services import orchestrator as orchestrator_module
+from app.services.document_pool import DocumentPool
+from app.services.orchestrator import Orchestrator
+from app.services.task_queue import InMemoryTaskBroker
+
+
+class FakeGridIn:
+    def __init__(self, file_id):
+        self.file_id = file_id
+        self.chunks = []
+        self.state = "open"
+
+    async def write(self, chunk):
+        self.chunks.append(chunk)
+
+    async def close(self):
+        self.state = "closed"
+
+    async def abort(self):
+        self.state = "aborted"
+
+
+class FakeBucket:
+    uploads = []
+
+    def __init__(self, db):
+        pass
+
+    def open_upload_stream_with_id(self, file_id, filename, metadata=None):
+        grid_in = FakeGridIn(file_id)
+        self.uploads.append(grid_in)
+        return grid_in
+
+
+class FakeEngine:
+    capacity = 4
+    max_workers = 1
+
+
+@pytest.fixture
+def upload_env(monkeypatch):
+    async def get_database():
+        return object()
+
+    FakeBucket.uploads = []
+    pool = DocumentPool()
+    monkeypatch.setattr(orchestrator_module, "AsyncIOMotorGridFSBucket", FakeBucket)
+    monkeypatch.setattr(orchestrator_module, "get_database", get_database)
+    monkeypatch.setattr(orchestrator_module, "document_pool", pool)
+    broker = InMemoryTaskBroker()
+    return Orchestrator(engine=FakeEngine(), cache=object(), broker=broker), pool, broker
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="book.pdf")
+
+
+def test_pdf_upload_is_stored_preloaded_and_queued(upload_env):
+    orchestrator, pool, broker = upload_env
+    with fitz.open() as doc:
+        doc.new_page()
+        data = doc.tobytes()
+
+    task_id = asyncio.run(orchestrator.process_file_async(_upload(data), "Book"))
+
+    (grid_in,) = FakeBucket.uploads
+    assert grid_in.state == "closed"
+    assert b"".join(grid_in.chunks) == data
+    record = asyncio.run(broker.get(task_id))
+    assert record.payload["file_id"] == str(grid_in.file_id)
+    assert pool.get_bytes(str(grid_in.file_id)) == data
+
+
+def test_unreadable_upload_is_aborted_and_rejected(upload_env):
+    orchestrator, pool, broker = upload_env
+
+    with pytest.raises(ValueError):
+        asyncio.run(orchestrator.process_file_async(_upload(b"not a pdf"), "Book"))
+
+    (grid_in,) = FakeBucket.uploads
+    assert grid_in.state == "aborted"
+    assert pool.stats()["open_documents"] == 0
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+from app.services.preview_cache import PreviewCache, preview_etag
+
+
+def test_preview_cache_evicts_least_recently_used():
+    async def scenario():
+        cache = PreviewCache(max_bytes=10, disk_dir="")
+
+        await cache.put(("doc", 1, 2.0, "png"), b"aaaa")
+        await cache.put(("doc", 2, 2.0, "png"), b"bbbb")
+        assert await cache.get(("doc", 1, 2.0, "png")) == b"aaaa"
+
+        await cache.put(("doc", 3, 2.0, "png"), b"cccc")
+
+        assert await cache.get(("doc", 2, 2.0, "png")) is None
+        assert await cache.get(("doc", 1, 2.0, "png")) == b"aaaa"
+        assert cache.resident_bytes == 8
+
+    asyncio.run(scenario())
+
+
+def test_preview_cache_serves_disk_tier(tmp_path):
+    key = ("doc", 1, 2.0, "png")
+    asyncio.run(PreviewCache(max_bytes=10, disk_dir=str(tmp_path)).put(key, b"image"))
+
+    fresh = PreviewCache(max_bytes=10, disk_dir=str(tmp_path))
+    assert asyncio.run(fresh.get(key)) == b"image"
+    assert fresh.disk_hits == 1
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    async def scenario():
+        cache = PreviewCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=10)
+        await cache.put(("doc", 1, 2.0, "png"), b"aaaa")
+        await cache.put(("doc", 2, 2.0, "png"), b"bbbb")
+        assert await cache.get(("doc", 1, 2.0, "png")) == b"aaaa"
+
+        await cache.put(("doc", 3, 2.0, "png"), b"cccc")
+
+        assert await cache.get(("doc", 2, 2.0, "png")) is None
+        return cache
+
+    cache = asyncio.run(scenario())
+
+    assert sorted(os.listdir(tmp_path)) == ["doc_1_2_v1.png", "doc_3_2_v1.png"]
+    assert cache.disk_bytes == 8
+
+
+def test_disk_tier_budget_includes_files_from_earlier_runs(tmp_path):
+    for page, mtime in ((1, 100), (2, 200)):
+        path = tmp_path / f"doc_{page}_2_v1.png"
+        path.write_bytes(b"xxxx")
+        os.utime(path, (mtime, mtime))
+
+    cache = PreviewCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=10)
+    asyncio.run(cache.put(("doc", 3, 2.0, "png"), b"cccc"))
+
+    assert sorted(os.listdir(tmp_path)) == ["doc_2_2_v1.png", "doc_3_2_v1.png"]
+
+
+def test_preview_etag_is_stable_per_render():
+    assert preview_etag("f1", 3, 2.0, "png") == preview_etag("f1", 3, 2, "png")
+    assert preview_etag("f1", 3, 2.0, "png") != preview_etag("f1", 3, 1.0, "png")
@@ -0,0 +1,36 @@
+from app.core.llm import registry
+from app.core.llm.config import Settings
+from app.core.llm.model import ModelProfile
+from app.core.pdf.toc.toc_model import TableOfContents
+
+
+def test_connection_and_chains_are_built_once(monkeypatch):
+    monkeypatch.setattr(registry, "_connections", {})
+    monkeypatch.setattr(registry, "_chains", {})
+    settings = Settings(api_key="test-key", default_model=ModelProfile.NANO.model_id)
+
+    connection = registry.get_connection(ModelProfile.NANO, settings=settings)
+    again = registry.get_connection(ModelProfile.NANO, settings=settings)
+
+    structured = registry.get_chain(connection, "System.", TableOfContents)
+    partial = registry.get_chain(connection, "System.", TableOfContents, partial=True)
+
+    assert again is connection
+    assert registry.get_chain(connection, "System.", TableOfContents) is structured
+    assert registry.get_chain(connection, "System.", TableOfContents, partial=True) is partial
+    assert partial is not structured
+    assert registry.get_chain(connection, "Other.", TableOfContents) is not structured
+    assert registry.get_chain(connection, "System.") is registry.get_chain(connection, "System.")
+
+
+def test_connections_share_pooled_http_clients(monkeypatch):
+    monkeypatch.setattr(registry, "_connections", {})
+    settings = Settings(api_key="test-key", default_model=ModelProfile.NANO.model_id)
+
+    nano = registry.get_connection(ModelProfile.NANO, settings=settings)
+    other = registry.get_connection(ModelProfile.NANO, temperature=0.5, settings=settings)
+    http_client, http_async_client = registry.get_http_clients()
+
+    assert nano is not other
+    assert nano.chat_model.http_client is http_client
+    assert other.chat_model.http_async_client is http_async_client
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.llm.model import ModelProfile
+from app.core.llm.rag_service import LangChainRAGService
+from app.core.llm import response_cache
+from app.core.llm.response_cache import (
+    InMemoryResponseCache,
+    MongoResponseCache,
+    ResponseCache,
+    response_cache_key,
+)
+from app.core.pdf.toc.toc_model import Section, TableOfContents
+
+
+class FakeChain:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return TableOfContents(sections=[
+            Section(section_number="1", title=inputs["context"], start_page=1)
+        ])
+
+    async def ainvoke(self, inputs):
+        return self.invoke(inputs)
+
+
+def _service(monkeypatch):
+    chain = FakeChain()
+    service = LangChainRAGService(
+        SimpleNamespace(model=ModelProfile.NANO), cache=InMemoryResponseCache()
+    )
+    monkeypatch.setattr(service, "_build_chain", lambda structured_model=None: chain)
+    return service, chain
+
+
+def test_key_ignores_whitespace_layout():
+    a = response_cache_key("m", "sys", "  Make\n   a quiz ", "ctx", TableOfContents)
+    b = response_cache_key("m", "sys", "Make a quiz", "ctx", TableOfContents)
+
+    assert a == b
+    assert a != response_cache_key("m", "sys", "Make a quiz", "ctx", None)
+    assert a != response_cache_key("other", "sys", "Make a quiz", "ctx", TableOfContents)
+
+
+def test_structured_answers_are_served_from_cache(monkeypatch):
+    service, chain = _service(monkeypatch)
+
+    first = service.answer_structured("q", TableOfContents, context="Intro")
+    second = asyncio.run(service.aanswer_structured("q", TableOfContents, context="Intro"))
+
+    assert chain.calls == 1
+    assert second == first
+    assert service.cache.stats()["hits"] == 1
+
+
+def test_cache_hits_are_not_logged_as_llm_calls(monkeypatch, caplog):
+    service, chain = _service(monkeypatch)
+
+    with caplog.at_level(logging.INFO, logger="app.core.llm.context"):
+        service.answer_structured("q", TableOfContents, context="Intro")
+        service.answer_structured("q", TableOfContents, context="Intro")
+
+    calls = [r for r in caplog.records if r.getMessage().startswith("LLM call")]
+    assert len(calls) == chain.calls == 1
+
+
+def test_cache_without_put_cannot_be_created():
+    class ReadOnlyCache(ResponseCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnlyCache()
+
+
+def test_use_cache_false_bypasses_cache(monkeypatch):
+    service, chain = _service(monkeypatch)
+
+    service.answer_structured("q", TableOfContents, context="Intro")
+    service.answer_structured("q", TableOfContents, context="Intro", use_cache=False)
+
+    assert chain.calls == 2
+
+
+class FakeStreamChain:
+    def __init__(self):
+        self.calls = 0
+
+    async def astream(self, inputs):
+        self.calls += 1
+        yield {"sections": []}
+        yield {"sections": [{"section_number": "1", "title": inputs["context"], "start_page": 1}]}
+
+
+def test_streamed_answers_are_cached_whole(monkeypatch):
+    chain = FakeStreamChain()
+    service = LangChainRAGService(
+        SimpleNamespace(model=ModelProfile.NANO), cache=InMemoryResponseCache()
+    )
+    monkeypatch.setattr(
+        service, "_build_chain", lambda structured_model=None, partial=False: chain
+    )
+
+    async def collect():
+        return [a async for a in service.astream_structured("q", TableOfContents, context="Intro")]
+
+    streamed = asyncio.run(collect())
+    cached = asyncio.run(collect())
+
+    assert len(streamed) == 2 and chain.calls == 1
+    assert cached == [streamed[-1]]
+    assert service.answer_structured("q", TableOfContents, context="Intro").sections[0].title == "Intro"
+
+
+def test_mongo_cache_uses_the_shared_database(monkeypatch):
+    class FakeCollection:
+        def __init__(self):
+            self.entries = {}
+
+        async def create_index(self, *args, **kwargs):
+            pass
+
+        async def find_one(self, query):
+            return self.entries.get(query["_id"])
+
+        async def replace_one(self, query, entry, upsert=False):
+            self.entries[query["_id"]] = entry
+
+    collection = FakeCollection()
+
+    async def shared_database():
+        return {"llm_cache": collection}
+
+    monkeypatch.setattr(response_cache, "get_database", shared_database)
+    cache = MongoResponseCache("mongodb://unused:1", "test")
+
+    async def scenario():
+        await cache.aput("k", {"answer": 1})
+        return await cache.aget("k")
+
+    assert asyncio.run(scenario()) == {"answer": 1}
+    assert cache._sync_collection is None
@@ -0,0 +1,67 @@
+from app.core.pdf.toc.section_tree import SectionTree
+from app.core.pdf.toc.toc_model import Section
+
+
+def _tree(total_pages=40):
+    rows = [
+        ("", "Preface", 2),
+        ("1", "Introduction", 5),
+        ("1.1", "Motivation", 6),
+        ("1.2", "Outline", 9),
+        ("1.2.1", "Reading guide", 10),
+        ("2", "Methods", 15),
+        ("2.1", "Sampling", 15),
+        ("3", "Results", 30),
+    ]
+    return SectionTree(
+        [Section(section_number=n, title=t, start_page=p) for n, t, p in rows],
+        total_pages,
+    )
+
+
+def test_chapter_range_covers_its_subsections():
+    tree = _tree()
+
+    assert tree.page_range("1") == (5, 14)
+    assert tree.page_range("1.1") == (6, 8)
+    assert tree.page_range("1.2") == (9, 14)
+    assert tree.page_range("Results") == (30, 40)
+    assert tree.page_range("Preface") == (2, 4)
+
+
+def test_hierarchy_follows_section_numbers():
+    tree = _tree()
+    outline = tree.find("1.2")
+
+    assert tree.nodes[outline.parent].title == "Introduction"
+    assert [tree.nodes[i].title for i in outline.children] == ["Reading guide"]
+    assert tree.find("1.2.1").depth == 2
+    assert tree.find("Preface").depth == 0
+
+
+def test_find_by_title_ignores_case_and_spacing():
+    assert _tree().find("  methods ").section_number == "2"
+    assert _tree().find("Missing") is None
+
+
+def test_select_merges_adjacent_and_nested_ranges():
+    tree = _tree()
+
+    assert tree.select(["1", "1.2", "Methods"]) == [(5, 29)]
+    assert tree.select(["Preface", "3", "unknown"]) == [(2, 4), (30, 40)]
+
+
+def test_section_at_returns_deepest_section():
+    tree = _tree()
+
+    assert tree.section_at(1) is None
+    assert tree.section_at(7).title == "Motivation"
+    assert tree.section_at(12).title == "Reading guide"
+    assert tree.section_at(15).title == "Sampling"
+    assert tree.section_at(35).title == "Results"
+
+
+def test_sections_outside_the_document_are_skipped():
+    tree = SectionTree([Section(section_number="9", title="Beyond", start_page=99)], 10)
+
+    assert len(tree) == 0
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.schemas.tasks import TaskKind, TaskRecord, TaskState
+from app.services.task_queue import InMemoryTaskBroker
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def test_subscribers_receive_every_change():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc))
+
+        watchers = [
+            asyncio.create_task(_collect(broker.events.subscribe(record.task_id)))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        await broker.claim([TaskKind.extract_toc], "w", 60)
+        await broker.update(record.task_id, status="extracting", progress={"percent": 50.0})
+        await broker.complete(record.task_id, {"sections": []})
+
+        streams = await asyncio.wait_for(asyncio.gather(*watchers), 1)
+        return streams, broker
+
+    streams, broker = asyncio.run(scenario())
+
+    for events in streams:
+        assert [e.state for e in events] == ["queued", "running", "running", "completed"]
+        assert events[2].status == "extracting"
+        assert events[2].progress.percent == 50.0
+        assert events[-1].result.sections == []
+    assert broker.events.subscriber_count() == 0
+
+
+def test_changes_made_elsewhere_are_polled():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        broker.events.poll_interval = 0.01
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz))
+        watcher = asyncio.create_task(_collect(broker.events.subscribe(record.task_id)))
+        await asyncio.sleep(0)
+
+        # Bypass the broker, as a worker in another process would.
+        stored = broker._records[record.task_id]
+        stored.state = TaskState.failed
+        stored.status = "failed"
+        stored.updated_at = stored.updated_at.replace(year=stored.updated_at.year + 1)
+
+        return await asyncio.wait_for(watcher, 1)
+
+    events = asyncio.run(scenario())
+
+    assert [e.state for e in events] == ["queued", "failed"]
+
+
+def test_heartbeat_and_unknown_task():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        unknown = await _collect(broker.events.subscribe("missing"))
+
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz))
+        events = broker.events.subscribe(record.task_id, heartbeat=0.01)
+        first = await events.__anext__()
+        idle = await events.__anext__()
+        await events.aclose()
+        return unknown, first, idle, broker
+
+    unknown, first, idle, broker = asyncio.run(scenario())
+
+    assert unknown == []
+    assert first.state == "queued"
+    assert idle is None
+    assert broker.events.subscriber_count() == 0
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.schemas.tasks import TaskKind, TaskRecord, TaskState
+from app.services import task_queue
+from app.services.task_queue import InMemoryTaskBroker
+from app.services.task_worker import TaskFailed, TaskWorker
+
+
+async def _run_until(worker, broker, task_id, states, timeout=2.0):
+    worker.start()
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while asyncio.get_running_loop().time() < deadline:
+            record = await broker.get(task_id)
+            if record.state in states:
+                return record
+            await asyncio.sleep(0.01)
+        raise AssertionError(f"task {task_id} stuck in {record.state}")
+    finally:
+        await worker.stop()
+
+
+def test_claim_prefers_priority_then_age():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        old = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz))
+        urgent = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz, priority=5))
+        await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc, priority=9))
+
+        first = await broker.claim([TaskKind.generate_quiz], "w", 60)
+        second = await broker.claim([TaskKind.generate_quiz], "w", 60)
+        return first, second, urgent, old, broker
+
+    first, second, urgent, old, broker = asyncio.run(scenario())
+
+    assert first.task_id == urgent.task_id
+    assert second.task_id == old.task_id
+    assert first.state == TaskState.running and first.attempts == 1
+    assert asyncio.run(broker.claim([TaskKind.generate_quiz], "w", 60)) is None
+
+
+def test_expired_lease_is_claimed_again():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc))
+        await broker.claim([TaskKind.extract_toc], "dead", 60)
+        assert await broker.claim([TaskKind.extract_toc], "other", 60) is None
+
+        await broker.update(
+            record.task_id, lease_expires_at=datetime.utcnow() - timedelta(seconds=1)
+        )
+        reclaimed = await broker.claim([TaskKind.extract_toc], "other", 60)
+        lost = await broker.extend_lease(record.task_id, "dead", 60)
+        return reclaimed, lost
+
+    reclaimed, lost = asyncio.run(scenario())
+
+    assert reclaimed.lease_owner == "other"
+    assert reclaimed.attempts == 2
+    assert lost is False
+
+
+def test_worker_retries_then_completes(monkeypatch):
+    monkeypatch.setattr(task_queue, "RETRY_DELAY", 0)
+    calls = []
+
+    async def flaky(record):
+        calls.append(record.attempts)
+        if record.attempts < 2:
+            raise ConnectionError("mongo hiccup")
+        return {"ok": True}
+
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz))
+        worker = TaskWorker(broker, {TaskKind.generate_quiz: flaky}, poll_interval=0.01)
+        return await _run_until(worker, broker, record.task_id, {TaskState.completed})
+
+    record = asyncio.run(scenario())
+
+    assert calls == [1, 2]
+    assert record.result == {"ok": True}
+    assert record.status == "completed"
+
+
+def test_task_failed_is_not_retried():
+    calls = []
+
+    async def broken(record):
+        calls.append(record.attempts)
+        raise TaskFailed("Document not found")
+
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.generate_quiz))
+        worker = TaskWorker(broker, {TaskKind.generate_quiz: broken}, poll_interval=0.01)
+        return await _run_until(worker, broker, record.task_id, {TaskState.failed})
+
+    record = asyncio.run(scenario())
+
+    assert calls == [1]
+    assert record.error == "Document not found"
+
+
+def test_retries_stop_at_max_attempts(monkeypatch):
+    monkeypatch.setattr(task_queue, "RETRY_DELAY", 0)
+
+    async def always_fails(record):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc, max_attempts=2))
+        worker = TaskWorker(broker, {TaskKind.extract_toc: always_fails}, poll_interval=0.01)
+        return await _run_until(worker, broker, record.task_id, {TaskState.failed})
+
+    record = asyncio.run(scenario())
+
+    assert record.attempts == 2
+    assert record.error == "boom"
+    assert record.finished_at is not None
+
+
+def test_worker_that_lost_its_lease_cannot_overwrite_the_task():
+    async def scenario():
+        broker = InMemoryTaskBroker()
+        record = await broker.enqueue(TaskRecord(kind=TaskKind.extract_toc))
+        await broker.claim([TaskKind.extract_toc], "stale", 60)
+        await broker.update(
+            record.task_id, lease_expires_at=datetime.utcnow() - timedelta(seconds=1)
+        )
+        await broker.claim([TaskKind.extract_toc], "current", 60)
+
+        writes = [
+            await broker.update(record.task_id, "stale", status="extracting"),
+            await broker.complete(record.task_id, {"stale": True}, worker_id="stale"),
+            await broker.fail(record.task_id, "stale", retry=False, worker_id="stale"),
+        ]
+        return writes, await broker.get(record.task_id)
+
+    writes, record = asyncio.run(scenario())
+
+    assert writes == [False, False, False]
+    assert record.state == TaskState.running
+    assert record.lease_owner == "current"
+    assert record.result is None and record.error is None
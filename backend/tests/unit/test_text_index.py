@@ -0,0 +1,35 @@
+from uuid import uuid4
+
+import fitz
+
+from app.db.models import DocumentTextIndex
+from app.services.text_index import _extract_pages, section_ranges, text_index
+
+
+def test_section_ranges_end_before_next_section():
+    toc = {"sections": [
+        {"section_number": "1", "title": "Intro", "start_page": 2},
+        {"section_number": "2", "title": "Body", "start_page": 5},
+        {"section_number": "3", "title": "Same page", "start_page": 5},
+    ]}
+
+    ranges = section_ranges(toc, total_pages=9)
+
+    assert [(r.title, r.start_page, r.end_page) for r in ranges] == [
+        ("Intro", 2, 4),
+        ("Body", 5, 5),
+        ("Same page", 5, 9),
+    ]
+
+
+def test_page_texts_slice_the_compressed_text(sample_pdf_path: str):
+    with fitz.open(sample_pdf_path) as pdf:
+        text, offsets = _extract_pages(pdf)
+        expected = [page.get_text() for page in pdf]
+
+    index = DocumentTextIndex.model_construct(
+        doc_id=uuid4(), page_count=len(expected), text=text, page_offsets=offsets
+    )
+
+    assert text_index.page_texts(index, range(len(expected))) == expected
+    assert text_index.page_texts(index, [1]) == [expected[1]]
@@ -0,0 +1,72 @@
+import asyncio
+
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.toc_model import Section, TableOfContents
+from app.services import toc_cache as toc_cache_module
+from app.services.toc_cache import ToCCache
+
+
+class _Field:
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, value):
+        return self.name, value
+
+
+class FakeEntry:
+    """Stands in for the Beanie model: exact-match lookups over a list."""
+    stored = []
+    content_hash = _Field("content_hash")
+    config_version = _Field("config_version")
+    prompt_version = _Field("prompt_version")
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    async def insert(self):
+        FakeEntry.stored.append(self)
+
+    @classmethod
+    async def find_one(cls, *conditions):
+        for entry in cls.stored:
+            if all(getattr(entry, name) == value for name, value in conditions):
+                return entry
+        return None
+
+
+TOC = TableOfContents(sections=[Section(section_number="1", title="Intro", start_page=1)])
+
+
+def _use_fake_store(monkeypatch):
+    monkeypatch.setattr(FakeEntry, "stored", [])
+    monkeypatch.setattr(toc_cache_module, "ToCCacheEntry", FakeEntry)
+
+
+def test_hit_after_put_and_miss_for_other_content(monkeypatch):
+    _use_fake_store(monkeypatch)
+    cache = ToCCache()
+
+    async def scenario():
+        before = await cache.get("abc")
+        await cache.put("abc", TOC)
+        return before, await cache.get("abc"), await cache.get("other")
+
+    before, hit, other = asyncio.run(scenario())
+
+    assert before is None and other is None
+    assert hit == TOC
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_config_or_prompt_change_misses(monkeypatch):
+    _use_fake_store(monkeypatch)
+    asyncio.run(ToCCache().put("abc", TOC))
+
+    other_config = ToCCache(ToCConfiguration(parser_min_confidence=0.95))
+    monkeypatch.setattr(toc_cache_module, "PROMPT_VERSION", "changed-prompt")
+    other_prompt = ToCCache()
+
+    assert other_config.config_version != ToCCache().config_version
+    assert asyncio.run(other_config.get("abc")) is None
+    assert asyncio.run(other_prompt.get("abc")) is None
@@ -0,0 +1,157 @@
+import fitz
+
+from app.core.llm.agent.extraction_toc_agent import ToCExtractor, ToCOrigin
+from app.core.pdf.toc.configuration import ToCConfiguration
+from app.core.pdf.toc.text_cleaner import TextCleaner
+from app.core.pdf.toc.toc_model import TableOfContents
+from app.core.pdf.toc.toc_parser import ParsedToC, ToCParser, roman_to_int
+
+
+def _parse(raw: str):
+    config = ToCConfiguration()
+    return ToCParser(config).parse(TextCleaner(config).clean(raw))
+
+
+def _rows(parsed):
+    return [(s.section_number, s.title, s.start_page) for s in parsed.toc.sections]
+
+
+def test_roman_to_int():
+    assert roman_to_int("XIV") == 14
+    assert roman_to_int("vii") == 7
+    assert roman_to_int("IIII") is None
+    assert roman_to_int("Mild") is None
+
+
+def test_parses_numbered_entries_with_leaders():
+    parsed = _parse(
+        "Table of Contents\n"
+        "1 Introduction .......... 1\n"
+        "1.1 Background .......... 3\n"
+        "2 Methods 10\n"
+    )
+
+    assert _rows(parsed) == [
+        ("1", "Introduction", 1),
+        ("1.1", "Background", 3),
+        ("2", "Methods", 10),
+    ]
+    assert parsed.confidence == 1.0
+
+
+def test_converts_roman_numbering_and_keeps_unnumbered_entries():
+    parsed = _parse(
+        "Preface ... vii\n"
+        "I. Origins ... 1\n"
+        "II.1 Early days ... 5\n"
+        "Chapter III: Growth ... 9\n"
+        "Index ... 20\n"
+    )
+
+    assert _rows(parsed) == [
+        ("", "Preface", 7),
+        ("1", "Origins", 1),
+        ("2.1", "Early days", 5),
+        ("3", "Growth", 9),
+        ("", "Index", 20),
+    ]
+
+
+def test_page_offset_comes_from_link_markers():
+    parsed = _parse(
+        "1 Introduction ... 1 [links->pages: 13]\n"
+        "2 Methods ... 8 [links->pages: 20]\n"
+        "3 Results ... 15\n"
+    )
+
+    assert parsed.page_offset == 12
+    assert [s.start_page for s in parsed.toc.sections] == [13, 20, 27]
+
+
+def test_number_and_wrapped_title_on_separate_lines():
+    parsed = _parse(
+        "1. [links->pages: 2]\n"
+        "Egypt...2 [links->pages: 2]\n"
+        "2 A title that is long enough\n"
+        "to wrap ... 5\n"
+    )
+
+    assert _rows(parsed) == [("1", "Egypt", 2), ("2", "A title that is long enough to wrap", 5)]
+
+
+def test_prose_gets_low_confidence():
+    parsed = _parse(
+        "1 Introduction ... 1\n"
+        "This book describes the history of the region\n"
+        "and the people who lived there in the 1800s\n"
+        "The last chapter ... 3\n"
+        "covers everything else\n"
+    )
+
+    assert parsed.confidence < ToCConfiguration().parser_min_confidence
+
+
+def test_confident_parse_skips_the_llm(sample_pdf_path: str):
+    class NoLLM:
+        def answer_structured(self, **kwargs):
+            raise AssertionError("LLM should not be called")
+
+    with fitz.open(sample_pdf_path) as doc:
+        toc = ToCExtractor(doc, rag=NoLLM()).extract_toc()
+
+    assert [(s.section_number, s.title, s.start_page) for s in toc.sections] == [
+        ("1", "Introduction", 2),
+        ("2", "Chapter One", 5),
+    ]
+
+
+def test_title_ending_in_invalid_roman_word_is_not_a_page():
+    parsed = _parse(
+        "1 Introduction ... 1\n"
+        "2 Methods ... 5\n"
+        "3 Law and the civil\n"
+        "4 Results ... 9\n"
+    )
+
+    assert _rows(parsed) == [("1", "Introduction", 1), ("2", "Methods", 5), ("4", "Results", 9)]
+    assert parsed.confidence < ToCConfiguration().parser_min_confidence
+
+
+def test_title_ending_in_large_roman_word_is_not_a_page():
+    parsed = _parse(
+        "1 Introduction ... 1\n"
+        "2 Methods ... 5\n"
+        "3 Appendix: Tips to mix\n"
+        "4 Results ... 9\n"
+    )
+
+    assert all(s.start_page < 1000 for s in parsed.toc.sections)
+    assert parsed.confidence < ToCConfiguration().parser_min_confidence
+
+
+def test_parser_errors_fall_back_to_the_llm(sample_pdf_path: str):
+    class BrokenParser(ToCParser):
+        def parse(self, text):
+            raise ValueError("unparseable")
+
+    class FakeLLM:
+        def answer_structured(self, **kwargs):
+            return TableOfContents(sections=[])
+
+    with fitz.open(sample_pdf_path) as doc:
+        toc = ToCExtractor(doc, rag=FakeLLM(), parser=BrokenParser()).extract_toc()
+
+    assert toc == TableOfContents(sections=[])
+
+
+def test_doubtful_parse_without_llm_is_not_cacheable(sample_pdf_path: str):
+    class DoubtfulParser(ToCParser):
+        def parse(self, text):
+            return ParsedToC(toc=TableOfContents(sections=[]), confidence=0.1)
+
+    with fitz.open(sample_pdf_path) as doc:
+        doubtful = ToCExtractor(doc, rag=None, parser=DoubtfulParser()).extract()
+        confident = ToCExtractor(doc, rag=None).extract()
+
+    assert doubtful.origin == ToCOrigin.unverified and not doubtful.cacheable
+    assert confident.origin == ToCOrigin.parsed and confident.cacheable
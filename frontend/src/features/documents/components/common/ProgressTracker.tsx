@@ -3,6 +3,7 @@ import type { TaskStatus } from '../../types';
 
 interface ProgressTrackerProps {
     status: TaskStatus['status'] | 'idle';
+    percent?: number;
 }
 
 // Map backend status to UI stages
@@ -10,7 +11,8 @@ const getStageStatus = (currentStatus: TaskStatus['status'] | 'idle', stageId: n
 
     let currentStage = 0;
     switch (currentStatus) {
-        case 'uploading': currentStage = 1; break;
+        case 'uploading':
+        case 'queued': currentStage = 1; break;
         case 'extracting': currentStage = 2; break;
         case 'processing_llm': currentStage = 3; break;
         case 'completed': currentStage = 5; break;
@@ -31,7 +33,7 @@ const stages = [
     { id: 4, label: 'Finalizing Table of Contents' },
 ];
 
-export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ status }) => {
+export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ status, percent }) => {
     return (
         <div className="flex flex-col gap-6 py-4">
             {stages.map((stage) => {
@@ -71,7 +73,9 @@ export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ status }) => {
                                 {stage.label}
                             </span>
                             {stageStatus === 'active' && (
-                                <span className="text-xs text-indigo-400/70 animate-pulse">Processing...</span>
+                                <span className="text-xs text-indigo-400/70 animate-pulse">
+                                    Processing...{percent !== undefined && ` ${Math.round(percent)}%`}
+                                </span>
                             )}
                         </div>
                     </div>
@@ -28,6 +28,29 @@ export const usePdfProcessor = () => {
         }, 2000);
     }, []);
 
+    // Status changes are pushed over server-sent events; polling is the fallback.
+    const watchStatus = useCallback((id: string) => {
+        const source = new EventSource(`${getBackendUrl()}/api/pdf/events/${id}`);
+
+        source.onmessage = (event) => {
+            const data: TaskStatus = JSON.parse(event.data);
+            setStatus(data);
+
+            if (data.status === 'completed' || data.status === 'failed') {
+                source.close();
+                setIsLoading(false);
+            }
+        };
+
+        source.onerror = () => {
+            // The browser retries dropped streams itself; it gives up only when
+            // the endpoint is unavailable.
+            if (source.readyState === EventSource.CLOSED) {
+                pollStatus(id);
+            }
+        };
+    }, [pollStatus]);
+
     const uploadPdf = useCallback(async (name: string, file: File) => {
         setIsLoading(true);
         setError(null);
@@ -51,13 +74,13 @@ export const usePdfProcessor = () => {
             const data = await response.json();
             if (data.task_id) {
                 setTaskId(data.task_id);
-                pollStatus(data.task_id);
+                watchStatus(data.task_id);
             }
         } catch (err) {
             setError(err instanceof Error ? err.message : 'An error occurred');
             setIsLoading(false);
         }
-    }, [pollStatus]);
+    }, [watchStatus]);
 
     const generateQuiz = useCallback(async (docId: string, config: QuizConfig) => {
         setIsLoading(true);
@@ -77,13 +100,13 @@ export const usePdfProcessor = () => {
             const data = await response.json();
             if (data.task_id) {
                 setTaskId(data.task_id);
-                pollStatus(data.task_id);
+                watchStatus(data.task_id);
             }
         } catch (err) {
             setError(err instanceof Error ? err.message : 'An error occurred');
             setIsLoading(false);
         }
-    }, [pollStatus]);
+    }, [watchStatus]);
 
     return {
         uploadPdf,
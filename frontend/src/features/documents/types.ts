@@ -15,9 +15,20 @@ export interface UploadResponse {
 
 import type { QuizOutput } from '../quiz/types';
 
+export interface TaskProgress {
+    percent?: number;
+    pages_scored?: number;
+    pages_total?: number;
+    batches_done?: number;
+    batches_total?: number;
+    tokens?: number;
+    questions?: number;
+}
+
 export interface TaskStatus {
     task_id: string;
-    status: 'uploading' | 'extracting' | 'processing_llm' | 'completed' | 'failed';
+    status: 'uploading' | 'queued' | 'extracting' | 'processing_llm' | 'completed' | 'failed';
+    progress?: TaskProgress;
     result?: TableOfContents;
     quiz_result?: QuizOutput;
     doc_id?: string;
@@ -29,6 +40,7 @@ export interface DocumentSummary {
     name: string;
     pdf_name: string;
     total_pages: number;
+    updated_at?: string;
 }
 
 export interface Tab {
@@ -55,7 +55,7 @@ export const CreateWizard: React.FC = () => {
                         <h3 className="text-sm font-semibold text-slate-400 uppercase tracking-wider mb-4 border-t border-slate-800 pt-6">
                             Processing Status
                         </h3>
-                        <ProgressTracker status={status?.status || 'idle'} />
+                        <ProgressTracker status={status?.status || 'idle'} percent={status?.progress?.percent} />
                         {error && (
                             <div className="mt-4 space-y-3">
                                 <div className="p-3 bg-red-500/10 border border-red-500/30 rounded-lg text-red-200 text-sm">
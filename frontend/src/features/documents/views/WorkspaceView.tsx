@@ -243,7 +243,9 @@ export const WorkspaceView: React.FC = () => {
                                                         <span className="text-sm font-medium text-slate-200">
                                                             Inserting quiz configuration into process
                                                         </span>
-                                                        <span className="text-xs text-indigo-400/70 animate-pulse">Processing...</span>
+                                                        <span className="text-xs text-indigo-400/70 animate-pulse">
+                                                            Processing...{quizStatus?.progress?.questions !== undefined && ` ${quizStatus.progress.questions} questions ready`}
+                                                        </span>
                                                     </div>
                                                 </div>
                                             </div>
@@ -12,6 +12,7 @@ export interface QuestionConfig {
 export interface QuizConfig {
     scope: QuizScope;
     selectedChapter?: string;
+    selectedChapters?: string[];
     pageRange?: { start: number; end: number };
     singlePage?: number;
     questions: QuestionConfig[];
@@ -5,10 +5,12 @@ interface WorkspacesListProps {
     documents: DocumentSummary[];
     isLoading: boolean;
     onSelect?: (id: string) => void;
+    // Shown as a "Load more" button when more pages are available.
+    onLoadMore?: () => void;
 }
 
-export const WorkspacesList: React.FC<WorkspacesListProps> = ({ documents, isLoading, onSelect }) => {
-    if (isLoading) {
+export const WorkspacesList: React.FC<WorkspacesListProps> = ({ documents, isLoading, onSelect, onLoadMore }) => {
+    if (isLoading && documents.length === 0) {
         return (
             <div className="space-y-3">
                 {[...Array(3)].map((_, i) => (
@@ -53,6 +55,15 @@ export const WorkspacesList: React.FC<WorkspacesListProps> = ({ documents, isLoa
                     </div>
                 </div>
             ))}
+            {onLoadMore && (
+                <button
+                    onClick={onLoadMore}
+                    disabled={isLoading}
+                    className="w-full py-2 text-sm text-slate-400 hover:text-white disabled:opacity-50 transition-colors"
+                >
+                    {isLoading ? 'Loading...' : 'Load more'}
+                </button>
+            )}
         </div>
     );
 };
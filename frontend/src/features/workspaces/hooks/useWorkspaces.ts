@@ -2,19 +2,26 @@ import { useState, useEffect, useCallback } from 'react';
 import { getBackendUrl } from '../../../config';
 import type { DocumentSummary } from '../../documents/types';
 
+const PAGE_SIZE = 50;
+
 export const useWorkspaces = () => {
     const [documents, setDocuments] = useState<DocumentSummary[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
-    const fetchWorkspaces = useCallback(async () => {
+    // Without a cursor the list starts over; with one the next page is appended.
+    const fetchPage = useCallback(async (cursor: string | null) => {
         setIsLoading(true);
         setError(null);
         try {
-            const response = await fetch(`${getBackendUrl()}/api/documents`);
+            const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`${getBackendUrl()}/api/documents?${params}`);
             if (!response.ok) throw new Error('Failed to fetch workspaces');
-            const data = await response.json();
-            setDocuments(data);
+            const data: DocumentSummary[] = await response.json();
+            setDocuments(prev => (cursor ? [...prev, ...data] : data));
+            setNextCursor(response.headers.get('X-Next-Cursor'));
         } catch (err) {
             setError(err instanceof Error ? err.message : 'Unknown error');
             console.error(err);
@@ -23,9 +30,22 @@ export const useWorkspaces = () => {
         }
     }, []);
 
+    const fetchWorkspaces = useCallback(() => fetchPage(null), [fetchPage]);
+
+    const loadMore = useCallback(() => {
+        if (nextCursor) fetchPage(nextCursor);
+    }, [fetchPage, nextCursor]);
+
     useEffect(() => {
         fetchWorkspaces();
     }, [fetchWorkspaces]);
 
-    return { workspaces: documents, isLoading, error, refresh: fetchWorkspaces };
+    return {
+        workspaces: documents,
+        isLoading,
+        error,
+        refresh: fetchWorkspaces,
+        hasMore: nextCursor !== null,
+        loadMore,
+    };
 };
@@ -8,7 +8,7 @@ interface HomeViewProps {
 }
 
 export const HomeView: React.FC<HomeViewProps> = ({ onCreateNew, onSelectWorkspace }) => {
-    const { workspaces, isLoading } = useWorkspaces();
+    const { workspaces, isLoading, hasMore, loadMore } = useWorkspaces();
 
     return (
         <div className="flex h-screen bg-slate-950 text-white overflow-hidden">
@@ -59,6 +59,7 @@ export const HomeView: React.FC<HomeViewProps> = ({ onCreateNew, onSelectWorkspa
                             documents={workspaces}
                             isLoading={isLoading}
                             onSelect={onSelectWorkspace}
+                            onLoadMore={hasMore ? loadMore : undefined}
                         />
                     </div>
                 </div>